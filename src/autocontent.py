@@ -1,14 +1,536 @@
 import argparse
+import json
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
 from utils import (
     youtube_downloader,
+    youtube_section_downloader,
+    download_format,
+    source_height_cap,
     extract_audio,
     load_and_match_from_files,
 )
 from video_editor.vertical_video import (
+    DETECTION_SETTINGS,
+    PIPELINE_SETTINGS,
     VerticalVideoCreator,
+    parse_layouts,
     trim_video,
 )
+from video_editor.trimming import trim_clips as cut_clips
+from video_editor.speaker_framing import SpeakerFraming, SpeakerTimeline, calibrate_speaker_faces
+from video_editor.face_index import FaceTrackIndex, load_or_build_face_index
+from main_pipeline.transcript_store import load_transcript
+from main_pipeline.api_clients import ResponseCache
+from main_pipeline.audio_diarization import assemblyai_client_from_env
+from main_pipeline.live_ingest import AssemblyAITranscriber, DemoTranscriber, LiveDownload, LiveIngest
+from main_pipeline.stage_cache import StageCache, file_hash, youtube_video_id
+from main_pipeline.stage_graph import StageGraph
+from main_pipeline.metrics import FrameTimings, build_report, write_report
+
+class CreatorPool:
+    def __init__(self, args: argparse.Namespace, size: int = 1):
+        """
+        Fixed set of VerticalVideoCreator instances shared by concurrent renders.
+
+        The cascade is loaded once per instance up front; a render leases an
+        instance for its duration since creators keep per-render state.
+        """
+        self._creators = queue.Queue()
+        for _ in range(max(1, size)):
+            self._creators.put(VerticalVideoCreator(
+                face_cascade_path=args.face_cascade_path,
+                writer_backend=args.writer,
+                codec=args.codec,
+                preset=args.preset,
+                crf=args.crf,
+                threaded=args.threaded,
+                pipeline_workers=args.pipeline_workers,
+                queue_depth=args.queue_depth,
+                face_detector=args.face_detector,
+                face_model_path=args.face_model_path,
+                face_config_path=args.face_config_path,
+            ))
+        self.settings = self._creators.queue[0].settings()
+
+    @contextmanager
+    def lease(self, speaker_framing: Optional[SpeakerFraming] = None,
+              face_index: Optional[FaceTrackIndex] = None):
+        creator = self._creators.get()
+        creator.speaker_framing = speaker_framing
+        creator.face_index = face_index
+        try:
+            yield creator
+        finally:
+            creator.speaker_framing = None
+            creator.face_index = None
+            self._creators.put(creator)
+
+
+def discard_failed_render(paths: List[str], what: str):
+    """
+    Remove the partial outputs of a failed render and raise, so neither the
+    next stage nor the stage cache picks them up.
+    """
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    raise RuntimeError(f"Rendering {what} failed")
+
+
+def layout_output_path(path: str, name: str, primary_layout: str) -> str:
+    """
+    Output file of layout `name`: `path` itself for the primary layout, else `path` with a layout suffix.
+    """
+    if name == primary_layout:
+        return path
+    base, ext = os.path.splitext(path)
+    return f"{base}_{name.replace(':', 'x')}{ext}"
+
+
+def build_pipeline(args: argparse.Namespace, project_folder: str, creators: CreatorPool,
+                   cache: Optional[StageCache],
+                   resources: Optional[Dict[str, threading.Semaphore]] = None) -> StageGraph:
+    """
+    Express one project as a graph of stages.
+
+    Audio extraction and rendering both only wait for the download, and
+    transcript matching has no dependency at all, so they overlap. The
+    download holds the "network" resource and audio, rendering and clip
+    trimming the "cpu" resource when `resources` provides them.
+
+    With `download_sections` (clip-only mode) the download waits for the
+    matched timestamps and fetches only the ranges of clips not already
+    cached; audio extraction is skipped since there is no full episode.
+
+    With `framing` set to "speaker", a calibration stage locates each
+    speaker's face on a few sampled frames and the renders take the crop
+    from the diarization timeline instead of running face detection.
+    Otherwise, with `face_index`, face detections of each source file are
+    stored under <project>/face_index, keyed by the file hash and the
+    detection settings, and every render replays them.
+
+    With several `layouts`, every render produces all of them from one
+    decode and detection pass. Files of the first layout keep their usual
+    names; the others get the layout as a suffix (clip_1_4x5.mp4).
+    """
+    def run_stage(stage, key, dest_dir, produce, output_path=None):
+        if cache is None:
+            return produce()
+        return cache.run(stage, key, dest_dir, produce, output_path)
+
+    layouts = parse_layouts(args.layouts)
+    primary_layout = next(iter(layouts))
+
+    def layout_params(name):
+        width, height = layouts[name]
+        return {"target_width": width, "target_height": height, "face_height_ratio": 0.4}
+
+    def layout_path(path, name):
+        return layout_output_path(path, name, primary_layout)
+
+    render_params = layout_params(primary_layout)
+    max_height = max(source_height_cap(w, h) for w, h in layouts.values()) if args.cap_resolution else None
+    download_key = StageCache.make_key("download", video_id=youtube_video_id(args.link), format=download_format(max_height))
+    render_settings = {key: value for key, value in creators.settings.items() if key not in PIPELINE_SETTINGS}
+    for path_setting in ("face_cascade_path", "face_model_path", "face_config_path"):
+        if render_settings.get(path_setting):
+            render_settings[path_setting] = file_hash(render_settings[path_setting])
+    detection_settings = {key: render_settings[key] for key in DETECTION_SETTINGS}
+    if args.face_index:
+        render_settings["face_index"] = {"interpolate": True}
+    if args.framing == "speaker":
+        render_settings["framing"] = {
+            "transcript": file_hash(args.audio_transcript_file),
+            "samples_per_speaker": args.speaker_samples,
+        }
+    clips_folder = os.path.join(project_folder, "CLIPS")
+
+    def download(results):
+        print("Downloading video...")
+        video_path = run_stage(
+            "download", download_key, project_folder,
+            lambda: youtube_downloader(url=args.link, folder=project_folder, max_height=max_height),
+        )
+        print(f"Video downloaded to: {video_path}")
+        return [{"path": video_path, "start": 0.0, "end": float("inf")}]
+
+    def download_sections(results):
+        timestamps = results["match"]
+        _, _, pending = pending_clips(timestamps)
+        if not pending:
+            return []
+        print(f"Downloading {len(pending)} clip sections...")
+        sections = youtube_section_downloader(
+            url=args.link,
+            folder=project_folder,
+            sections=[(timestamps[i]['start_time'], timestamps[i]['end_time']) for i in pending],
+            margin=args.section_margin,
+            max_height=max_height,
+        )
+        for section in sections:
+            print(f"  Section {section['start']:.1f}-{section['end']:.1f}s downloaded to: {section['path']}")
+        return sections
+
+    def audio(results):
+        print("Extracting audio...")
+
+        def produce_audio():
+            return extract_audio(
+                input_path=results["download"][0]["path"],
+                output_base=os.path.join(project_folder, "audio"),
+                mode=args.audio_mode,
+                asr_format=args.audio_format,
+            )
+
+        audio_key = StageCache.make_key("audio", source=download_key, mode=args.audio_mode, format=args.audio_format)
+        audio_output_path = run_stage("audio", audio_key, project_folder, produce_audio)
+        print(f"Audio extracted to: {audio_output_path}")
+        return audio_output_path
+
+    def match(results):
+        print("Matching transcripts and finding timestamps...")
+        timestamps = load_and_match_from_files(
+            viral_segments_file=args.viral_segments_file,
+            audio_transcript_file=args.audio_transcript_file,
+            similarity_threshold=args.similarity_threshold,
+            matcher=args.matcher,
+        )
+        print("Timestamps found:")
+        for ts in timestamps:
+            print(f"  Segment: {ts['segment']}, Start: {ts['start_time']}, End: {ts['end_time']}")
+        return timestamps
+
+    def framing(results):
+        print("Calibrating speaker faces...")
+        timeline = SpeakerTimeline.from_transcript(load_transcript(args.audio_transcript_file))
+        with creators.lease() as video_creator:
+            faces = calibrate_speaker_faces(
+                results["download"], timeline, video_creator.detect_faces_batch,
+                samples_per_speaker=args.speaker_samples, scale=video_creator.detection_scale,
+            )
+        for speaker, box in faces.items():
+            print(f"  Speaker {speaker}: face at {box}")
+        return SpeakerFraming(timeline, faces)
+
+    def face_index(results):
+        print("Indexing faces...")
+        indexes = {}
+        index_dir = os.path.join(project_folder, "face_index")
+        with creators.lease() as video_creator:
+            for source in results["download"]:
+                key = FaceTrackIndex.key(file_hash(source["path"]), detection_settings)
+                index_path = os.path.join(index_dir, f"{key}.npz")
+                reused = os.path.exists(index_path)
+                indexes[source["path"]] = load_or_build_face_index(video_creator, source["path"], index_path)
+                print(f"  {'Reusing' if reused else 'Built'} face index: {index_path}")
+        return indexes
+
+    def clip_paths_for(timestamps):
+        os.makedirs(clips_folder, exist_ok=True)
+        return [os.path.join(clips_folder, f"clip_{i+1}.mp4") for i in range(len(timestamps))]
+
+    def pending_clips(timestamps):
+        # Links cached clips into place and returns (paths, keys, indices still to render),
+        # with paths and keys by layout name
+        clip_paths = clip_paths_for(timestamps)
+        paths = {name: [layout_path(path, name) for path in clip_paths] for name in layouts}
+        keys = {
+            name: [
+                StageCache.make_key(
+                    "clip", source=download_key, settings=render_settings, window=[ts['start_time'], ts['end_time']],
+                    **layout_params(name),
+                )
+                for ts in timestamps
+            ]
+            for name in layouts
+        }
+        pending = []
+        for i, clip_path in enumerate(clip_paths):
+            if cache is not None and all(
+                cache.fetch(keys[name][i], clips_folder, os.path.basename(paths[name][i])) for name in layouts
+            ):
+                print(f"  Reusing cached clip: {clip_path}")
+            else:
+                for name in layouts:
+                    if os.path.exists(paths[name][i]):
+                        os.remove(paths[name][i])
+                pending.append(i)
+        return paths, keys, pending
+
+    def render_clips(results):
+        print("Rendering vertical clips...")
+        timestamps = results["match"]
+        paths, keys, pending = pending_clips(timestamps)
+        if pending:
+            # Render each clip from the downloaded file (or section) that contains it.
+            frame_timings = FrameTimings()
+            with creators.lease() as video_creator:
+                for source in results["download"]:
+                    if results.get("framing") is not None:
+                        video_creator.speaker_framing = results["framing"].shifted(source["start"])
+                    video_creator.face_index = results.get("face_index", {}).get(source["path"])
+                    members = [
+                        i for i in pending
+                        if source["start"] <= timestamps[i]['start_time'] and timestamps[i]['end_time'] <= source["end"]
+                    ]
+                    if not members:
+                        continue
+                    clips = [
+                        (timestamps[i]['start_time'] - source["start"], timestamps[i]['end_time'] - source["start"])
+                        for i in members
+                    ]
+                    if len(layouts) == 1:
+                        if not video_creator.render_clips(
+                            input_path=source["path"],
+                            clips=clips,
+                            output_paths=[paths[primary_layout][i] for i in members],
+                            **render_params,
+                        ):
+                            discard_failed_render([paths[primary_layout][i] for i in pending],
+                                                  f"clips from {source['path']}")
+                    elif not video_creator.render_layouts(
+                        input_path=source["path"],
+                        layouts=layouts,
+                        output_paths={name: [paths[name][i] for i in members] for name in layouts},
+                        clips=clips,
+                        face_height_ratio=render_params["face_height_ratio"],
+                    ):
+                        discard_failed_render([paths[name][i] for name in layouts for i in pending],
+                                              f"clip layouts from {source['path']}")
+                    frame_timings.merge(video_creator.frame_timings)
+            graph.metrics["clips"] = frame_timings.summary()
+            if cache is not None:
+                for name in layouts:
+                    for i in pending:
+                        if os.path.exists(paths[name][i]):
+                            cache.store(keys[name][i], paths[name][i], "clip")
+        for name in layouts:
+            for clip_path in paths[name]:
+                print(f"  Created clip: {clip_path}")
+        return paths[primary_layout]
+
+    def vertical(results):
+        print("Creating vertical video...")
+        vertical_video_path = os.path.join(project_folder, "vertical_video.mp4")
+
+        layout_paths = {name: layout_path(vertical_video_path, name) for name in layouts}
+
+        def produce_vertical_video():
+            source_path = results["download"][0]["path"]
+            index = results.get("face_index", {}).get(source_path)
+            with creators.lease(results.get("framing"), index) as video_creator:
+                if len(layouts) == 1:
+                    if not video_creator.convert_video_to_vertical(
+                        input_path=source_path,
+                        output_path=vertical_video_path,
+                        workers=args.workers,
+                        **render_params,
+                    ):
+                        discard_failed_render([vertical_video_path], f"the vertical video of {source_path}")
+                elif not video_creator.render_layouts(
+                    input_path=source_path,
+                    layouts=layouts,
+                    output_paths={name: [path] for name, path in layout_paths.items()},
+                    face_height_ratio=render_params["face_height_ratio"],
+                ):
+                    discard_failed_render(list(layout_paths.values()), f"the vertical layouts of {source_path}")
+                graph.metrics["vertical"] = video_creator.frame_timings.summary()
+            return vertical_video_path
+
+        vertical_keys = {
+            name: StageCache.make_key("vertical", source=download_key, settings=render_settings, **layout_params(name))
+            for name in layouts
+        }
+        if len(layouts) == 1:
+            run_stage("vertical video", vertical_keys[primary_layout], project_folder, produce_vertical_video, vertical_video_path)
+        elif cache is not None and all(
+            cache.fetch(vertical_keys[name], project_folder, os.path.basename(path)) for name, path in layout_paths.items()
+        ):
+            print(f"  Reusing cached vertical videos: {', '.join(layout_paths.values())}")
+        else:
+            for path in layout_paths.values():
+                if os.path.exists(path):
+                    os.remove(path)  # may be a hard link into the stage cache
+            produce_vertical_video()
+            if cache is not None:
+                for name, path in layout_paths.items():
+                    cache.store(vertical_keys[name], path, "vertical video")
+        for path in layout_paths.values():
+            print(f"Vertical video created at: {path}")
+        return vertical_video_path
+
+    def trim_clips(results):
+        print("Trimming video clips...")
+        timestamps = results["match"]
+        clip_paths = clip_paths_for(timestamps)
+        windows = [(ts['start_time'], ts['end_time']) for ts in timestamps]
+
+        for name in layouts:
+            vertical_video_path = layout_path(results["vertical"], name)
+            layout_clip_paths = [layout_path(clip_path, name) for clip_path in clip_paths]
+            for clip_path in layout_clip_paths:
+                if os.path.exists(clip_path):
+                    os.remove(clip_path)  # may be a hard link into the stage cache
+
+            if args.trim_mode == "legacy":
+                def trim(item):
+                    (start_time, end_time), clip_path = item
+                    trim_video(
+                        input_file=vertical_video_path,
+                        start_time=start_time,
+                        end_time=end_time,
+                        output_file=clip_path,
+                    )
+
+                with ThreadPoolExecutor(max_workers=max(1, args.clip_workers)) as pool:
+                    list(pool.map(trim, zip(windows, layout_clip_paths)))
+            elif windows:
+                cut_clips(vertical_video_path, windows, layout_clip_paths, mode=args.trim_mode, workers=args.clip_workers)
+            for clip_path in layout_clip_paths:
+                print(f"  Created clip: {clip_path}")
+        return clip_paths
+
+    resources = resources or {}
+    network = "network" if "network" in resources else None
+    cpu = "cpu" if "cpu" in resources else None
+    graph = StageGraph(resources)
+    graph.add("match", match)
+    if args.download_sections:
+        if not args.clips_only:
+            raise ValueError("--download_sections requires --clips_only")
+        graph.add("download", download_sections, deps=["match"], resource=network)
+    else:
+        graph.add("download", download, resource=network)
+        graph.add("audio", audio, deps=["download"], resource=cpu)
+    render_deps = ["download"]
+    if args.framing == "speaker":
+        graph.add("framing", framing, deps=["download"], resource=cpu)
+        render_deps.append("framing")
+    elif args.face_index:
+        graph.add("face_index", face_index, deps=["download"], resource=cpu)
+        render_deps.append("face_index")
+    if args.clips_only:
+        graph.add("clips", render_clips, deps=render_deps + ["match"], resource=cpu)
+    else:
+        graph.add("vertical", vertical, deps=render_deps, resource=cpu)
+        graph.add("clips", trim_clips, deps=["vertical", "match"], resource=cpu)
+    return graph
+
+
+def add_pipeline_arguments(parser: argparse.ArgumentParser):
+    """
+    Options shared by the single-project CLI and the batch runner.
+    """
+    parser.add_argument("--similarity_threshold", type=float, default=0.6, help="Similarity threshold for matching transcripts.")
+    parser.add_argument("--matcher", type=str, choices=["indexed", "legacy"], default="indexed", help="Transcript matching engine.")
+    parser.add_argument("--face_cascade_path", type=str, default="src/cascade.xml", help="Path to the Haar cascade file for face detection.")
+    parser.add_argument("--face_detector", type=str, choices=["haar", "dnn", "yunet"], default="haar", help="Face detector backend.")
+    parser.add_argument("--face_model_path", type=str, default=None, help="Model weights of the dnn (.caffemodel) or yunet (.onnx) face detector.")
+    parser.add_argument("--framing", type=str, choices=["tracking", "speaker"], default="tracking", help="Follow faces by detection, or frame the active speaker from the diarized transcript.")
+    parser.add_argument("--face_index", action="store_true", help="Store face detections per source video in the project and reuse them in every render.")
+    parser.add_argument("--speaker_samples", type=int, default=6, help="Frames sampled per speaker to calibrate --framing speaker.")
+    parser.add_argument("--face_config_path", type=str, default=None, help="Network definition (.prototxt) of the dnn face detector.")
+    parser.add_argument("--layouts", type=str, default="9:16", help="Comma-separated output layouts rendered in one pass: 9:16, 4:5, 1:1 or WIDTHxHEIGHT. The first keeps the usual file names.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes used to render the vertical video.")
+    parser.add_argument("--writer", type=str, choices=["ffmpeg", "opencv"], default="ffmpeg", help="Video writer backend (ffmpeg keeps the audio track).")
+    parser.add_argument("--codec", type=str, default="libx264", help="Video encoder used by the ffmpeg writer (e.g. libx264, libx265).")
+    parser.add_argument("--preset", type=str, default="veryfast", help="Encoder preset used by the ffmpeg writer.")
+    parser.add_argument("--crf", type=int, default=23, help="Constant rate factor used by the ffmpeg writer.")
+    parser.add_argument("--threaded", action="store_true", help="Decode, detect faces, compose and encode renders on separate threads.")
+    parser.add_argument("--pipeline_workers", type=int, default=2, help="Number of frame processing threads with --threaded.")
+    parser.add_argument("--queue_depth", type=int, default=8, help="Frames buffered between pipeline stages with --threaded.")
+    parser.add_argument("--clips_only", action="store_true", help="Render only the matched clip windows instead of the whole video.")
+    parser.add_argument("--download_sections", action="store_true", help="With --clips_only, download only the clip time ranges instead of the whole video.")
+    parser.add_argument("--section_margin", type=float, default=2.0, help="Seconds added around each downloaded section.")
+    parser.add_argument("--cap_resolution", action="store_true", help="Download no more resolution than the vertical output needs.")
+    parser.add_argument("--audio_mode", type=str, choices=["asr", "copy"], default="asr", help="Audio extraction: 16 kHz mono for speech recognition, or stream-copy of a native AAC/Opus track.")
+    parser.add_argument("--audio_format", type=str, choices=["flac", "wav"], default="flac", help="File format of the speech-recognition audio.")
+    parser.add_argument("--prometheus_metrics", action="store_true", help="Also write the project metrics in Prometheus text format (metrics.prom).")
+    parser.add_argument("--cache_dir", type=str, default="./videos_projects/.cache", help="Folder of the stage artifact cache.")
+    parser.add_argument("--cache_max_gb", type=float, default=50.0, help="Size limit of the stage artifact cache in GB.")
+    parser.add_argument("--no_cache", action="store_true", help="Run every stage even if a cached artifact exists.")
+    parser.add_argument("--stage_workers", type=int, default=4, help="Number of pipeline stages allowed to run at the same time.")
+    parser.add_argument("--clip_workers", type=int, default=4, help="Number of clips trimmed in parallel.")
+    parser.add_argument("--trim_mode", type=str, choices=["exact", "precise", "legacy"], default="exact", help="Clip cutting: keyframe-snapped stream copy, smart cut, or moviepy per clip.")
+
+
+def run_live_pipeline(args: argparse.Namespace, project_folder: str, creators: CreatorPool) -> List[Dict]:
+    """
+    Live-ingest mode: emit clips while the episode (a live stream or premiere) is still downloading.
+
+    The download is followed as its fragments arrive, its audio is
+    transcribed in rolling windows and the viral segments are matched
+    against the partial transcript; each clip is cut and rendered as soon
+    as its range is on disk (see main_pipeline.live_ingest). Clips are
+    named after their segment number.
+    """
+    layouts = parse_layouts(args.layouts)
+    primary_layout = next(iter(layouts))
+    clips_folder = os.path.join(project_folder, "CLIPS")
+    os.makedirs(clips_folder, exist_ok=True)
+    with open(args.viral_segments_file, "r", encoding="utf-8") as f:
+        viral_segments = json.load(f)
+    if args.live_transcriber == "demo":
+        transcribe = DemoTranscriber(args.audio_transcript_file)
+    else:
+        cache = None if args.no_cache else ResponseCache(os.path.join(args.cache_dir, "api"))
+        transcribe = AssemblyAITranscriber(assemblyai_client_from_env(cache=cache))
+    max_height = max(source_height_cap(w, h) for w, h in layouts.values()) if args.cap_resolution else None
+
+    def render_clip(section, timestamp):
+        clip_path = os.path.join(clips_folder, f"clip_{timestamp['segment']}.mp4")
+        window = (timestamp['start_time'] - section["start"], timestamp['end_time'] - section["start"])
+        with creators.lease() as video_creator:
+            if len(layouts) == 1:
+                width, height = layouts[primary_layout]
+                if not video_creator.render_clips(
+                    input_path=section["path"], clips=[window], output_paths=[clip_path],
+                    target_width=width, target_height=height, face_height_ratio=0.4,
+                ):
+                    discard_failed_render([clip_path], f"clip {timestamp['segment']}")
+            else:
+                layout_paths = {name: layout_output_path(clip_path, name, primary_layout) for name in layouts}
+                if not video_creator.render_layouts(
+                    input_path=section["path"],
+                    layouts=layouts,
+                    output_paths={name: [path] for name, path in layout_paths.items()},
+                    clips=[window],
+                    face_height_ratio=0.4,
+                ):
+                    discard_failed_render(list(layout_paths.values()), f"clip {timestamp['segment']}")
+        print(f"  Created clip: {clip_path}")
+
+    download = LiveDownload(args.link, project_folder, max_height).start()
+    ingest = LiveIngest(
+        download, viral_segments, transcribe, render_clip,
+        work_dir=os.path.join(project_folder, "live"),
+        window=args.live_window,
+        overlap=args.live_overlap,
+        similarity_threshold=args.similarity_threshold,
+    )
+    try:
+        return ingest.run()
+    finally:
+        if isinstance(transcribe, AssemblyAITranscriber):
+            transcribe.close()
+
+
+def write_metrics(args: argparse.Namespace, project_folder: str, graph: StageGraph) -> str:
+    """
+    Write the stage and per-frame metrics of the last run of `graph` into the project folder.
+    """
+    report = build_report(args.project_name, graph.timings, graph.metrics)
+    return write_report(project_folder, report, prometheus=args.prometheus_metrics)
+
+
+def create_cache(args: argparse.Namespace) -> Optional[StageCache]:
+    return None if args.no_cache else StageCache(args.cache_dir, int(args.cache_max_gb * 1024 ** 3))
+
 
 def main():
     parser = argparse.ArgumentParser(description="AutoContent: A tool for automatic video content creation.")
@@ -17,51 +539,26 @@ def main():
     parser.add_argument("--project_name", type=str, required=True, help="Name of the project folder.")
     parser.add_argument("--viral_segments_file", type=str, required=True, help="Path to the JSON file containing viral segments.")
     parser.add_argument("--audio_transcript_file", type=str, required=True, help="Path to the JSON file containing the audio transcript.")
-    parser.add_argument("--similarity_threshold", type=float, default=0.6, help="Similarity threshold for matching transcripts.")
-    parser.add_argument("--face_cascade_path", type=str, default="src/cascade.xml", help="Path to the Haar cascade file for face detection.")
+    parser.add_argument("--live", action="store_true", help="Emit clips while a live stream or premiere is still downloading.")
+    parser.add_argument("--live_window", type=float, default=30.0, help="Seconds of audio per transcribed window in --live mode.")
+    parser.add_argument("--live_overlap", type=float, default=2.5, help="Seconds each transcribed window repeats of the previous one in --live mode.")
+    parser.add_argument("--live_transcriber", type=str, choices=["assemblyai", "demo"], default="assemblyai", help="Transcription of the --live windows: AssemblyAI, or slices of --audio_transcript_file for offline runs.")
+    add_pipeline_arguments(parser)
 
     args = parser.parse_args()
 
     project_folder = os.path.join("./videos_projects", args.project_name)
     os.makedirs(project_folder, exist_ok=True)
 
-    print("Downloading video...")
-    video_path = youtube_downloader(url=args.link, folder=project_folder)
-    print(f"Video downloaded to: {video_path}")
-
-    audio_output_path = os.path.join(project_folder, "audio.mp3")
-    print("Extracting audio...")
-    extract_audio(input_path=video_path, output_path=audio_output_path)
-    print(f"Audio extracted to: {audio_output_path}")
-
-    print("Creating vertical video...")
-    vertical_video_path = os.path.join(project_folder, "vertical_video.mp4")
-    video_creator = VerticalVideoCreator(face_cascade_path=args.face_cascade_path)
-    video_creator.convert_video_to_vertical(input_path=video_path, output_path=vertical_video_path)
-    print(f"Vertical video created at: {vertical_video_path}")
-
-    print("Matching transcripts and finding timestamps...")
-    timestamps = load_and_match_from_files(
-        viral_segments_file=args.viral_segments_file,
-        audio_transcript_file=args.audio_transcript_file,
-        similarity_threshold=args.similarity_threshold,
-    )
-    print("Timestamps found:")
-    for ts in timestamps:
-        print(f"  Segment: {ts['segment']}, Start: {ts['start_time']}, End: {ts['end_time']}")
+    if args.live:
+        timestamps = run_live_pipeline(args, project_folder, CreatorPool(args))
+        print(f"Rendered {len(timestamps)} clips")
+        return
 
-    print("Trimming video clips...")
-    clips_folder = os.path.join(project_folder, "CLIPS")
-    os.makedirs(clips_folder, exist_ok=True)
-    for i, ts in enumerate(timestamps):
-        clip_path = os.path.join(clips_folder, f"clip_{i+1}.mp4")
-        trim_video(
-            input_file=vertical_video_path,
-            start_time=ts['start_time'],
-            end_time=ts['end_time'],
-            output_file=clip_path,
-        )
-        print(f"  Created clip: {clip_path}")
+    graph = build_pipeline(args, project_folder, CreatorPool(args), create_cache(args))
+    graph.run(max_workers=args.stage_workers)
+    graph.print_timings()
+    print(f"Metrics written to: {write_metrics(args, project_folder, graph)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Set
+
+from autocontent import CreatorPool, add_pipeline_arguments, build_pipeline, create_cache, write_metrics
+
+EPISODE_FIELDS = ("link", "project_name", "viral_segments_file", "audio_transcript_file")
+# Fields a manifest entry may override on top of the command-line options.
+EPISODE_OPTIONAL_FIELDS = ("similarity_threshold",)
+
+
+def load_manifest(manifest_path: str) -> List[Dict]:
+    """
+    Read a batch manifest in CSV (with a header row) or JSONL format.
+
+    Every episode needs link, project_name, viral_segments_file and
+    audio_transcript_file; an optional similarity_threshold overrides the
+    command-line value for that episode. Any other field is rejected, so a
+    manifest cannot override pipeline options such as cache_dir.
+
+    Raises:
+        ValueError: If an entry misses a field, has an unknown one, or its
+            project_name is not a plain folder name
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        if manifest_path.endswith(".jsonl"):
+            episodes = [json.loads(line) for line in f if line.strip()]
+        else:
+            episodes = [dict(row) for row in csv.DictReader(f)]
+
+    for number, episode in enumerate(episodes, start=1):
+        missing = [field for field in EPISODE_FIELDS if not episode.get(field)]
+        if missing:
+            raise ValueError(f"Manifest entry {number} is missing: {', '.join(missing)}")
+        unknown = [field for field in episode if field not in EPISODE_FIELDS + EPISODE_OPTIONAL_FIELDS]
+        if unknown:
+            raise ValueError(f"Manifest entry {number} has unknown fields: {', '.join(map(str, unknown))}")
+        if os.path.basename(episode["project_name"]) != episode["project_name"] or episode["project_name"] in (".", ".."):
+            raise ValueError(f"Manifest entry {number} has an invalid project_name: {episode['project_name']}")
+        if episode.get("similarity_threshold") not in (None, ""):
+            episode["similarity_threshold"] = float(episode["similarity_threshold"])
+        else:
+            episode.pop("similarity_threshold", None)
+    return episodes
+
+
+class BatchProgress:
+    def __init__(self, progress_file: str):
+        """
+        Append-only JSONL log of finished episodes, used to resume a batch.
+        """
+        self.progress_file = progress_file
+        self._lock = threading.Lock()
+        self.done: Set[str] = set()
+        if os.path.exists(progress_file):
+            with open(progress_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record.get("status") == "done":
+                        self.done.add(record["project_name"])
+
+    def record(self, **record):
+        with self._lock:
+            with open(self.progress_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if record.get("status") == "done":
+                self.done.add(record["project_name"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AutoContent batch mode: process a manifest of YouTube links.")
+
+    parser.add_argument("--manifest", type=str, required=True, help="CSV or JSONL file with link, project_name, viral_segments_file and audio_transcript_file.")
+    parser.add_argument("--progress_file", type=str, default=None, help="JSONL file recording finished episodes (default: <manifest>.progress.jsonl).")
+    parser.add_argument("--download_workers", type=int, default=4, help="Number of concurrent downloads.")
+    parser.add_argument("--render_workers", type=int, default=2, help="Number of concurrent CPU-bound stages (audio extraction, rendering).")
+    add_pipeline_arguments(parser)
+
+    args = parser.parse_args()
+
+    episodes = load_manifest(args.manifest)
+    progress = BatchProgress(args.progress_file or f"{args.manifest}.progress.jsonl")
+    pending = [episode for episode in episodes if episode["project_name"] not in progress.done]
+    print(f"{len(episodes)} episodes in manifest, {len(episodes) - len(pending)} already done, {len(pending)} to process")
+
+    # Heavy objects are created once and shared by every episode.
+    creators = CreatorPool(args, size=args.render_workers)
+    cache = create_cache(args)
+    resources = {
+        "network": threading.Semaphore(max(1, args.download_workers)),
+        "cpu": threading.Semaphore(max(1, args.render_workers)),
+    }
+
+    def process(episode: Dict):
+        overrides = {field: episode[field] for field in EPISODE_FIELDS + EPISODE_OPTIONAL_FIELDS if field in episode}
+        episode_args = argparse.Namespace(**{**vars(args), **overrides})
+        project_folder = os.path.join("./videos_projects", episode_args.project_name)
+        os.makedirs(project_folder, exist_ok=True)
+        start = time.perf_counter()
+        try:
+            # A failed download, audio extraction or render raises out of graph.run.
+            graph = build_pipeline(episode_args, project_folder, creators, cache, resources)
+            graph.run(max_workers=args.stage_workers)
+        except Exception as e:
+            print(f"Episode {episode_args.project_name} failed: {e}")
+            progress.record(project_name=episode_args.project_name, link=episode_args.link,
+                            status="failed", error=str(e), seconds=round(time.perf_counter() - start, 2))
+            return
+        write_metrics(episode_args, project_folder, graph)
+        progress.record(project_name=episode_args.project_name, link=episode_args.link,
+                        status="done", seconds=round(time.perf_counter() - start, 2),
+                        timings=graph.timings)
+        print(f"Episode {episode_args.project_name} done in {time.perf_counter() - start:.1f}s")
+
+    # Enough episodes in flight to keep both the network and the CPU slots busy.
+    with ThreadPoolExecutor(max_workers=max(1, args.download_workers + args.render_workers)) as pool:
+        list(pool.map(process, pending))
+
+    failed = len(pending) - sum(1 for episode in pending if episode["project_name"] in progress.done)
+    print(f"Batch finished: {len(pending) - failed} done, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Compare the face detector backends on a labelled sample of frames.
+
+The labels file is a JSON list of {"image": path, "faces": [[x, y, w, h], ...]}
+entries, with image paths relative to the labels file. Without labels,
+frames sampled from `--video` are used and only the speed is reported.
+Run from the `src` folder:
+
+    python -m benchmarks.bench_face_detectors --labels frames/labels.json \
+        --backends haar,yunet --yunet_model face_detection_yunet_2023mar.onnx
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from video_editor.face_detectors import create_face_detector
+from video_editor.face_tracking import box_iou
+
+
+def load_labelled_frames(labels_path: str) -> Tuple[List[np.ndarray], List[List[Tuple]]]:
+    with open(labels_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    root = os.path.dirname(os.path.abspath(labels_path))
+    frames, labels = [], []
+    for entry in entries:
+        frame = cv2.imread(os.path.join(root, entry["image"]))
+        if frame is None:
+            raise ValueError(f"Could not read labelled frame: {entry['image']}")
+        frames.append(frame)
+        labels.append([tuple(face) for face in entry.get("faces", [])])
+    return frames, labels
+
+
+def sample_video_frames(video_path: str, count: int) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    for index in np.linspace(0, max(0, total - 1), count).astype(int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run(backend: str, options: Dict, frames: List[np.ndarray], labels: Optional[List[List[Tuple]]],
+        batch_size: int, scale: float, iou_threshold: float) -> Dict:
+    detector = create_face_detector(backend, **options)
+    detector.detect_batch(frames[:1], scale)  # warm-up (model load, allocations)
+
+    start = time.perf_counter()
+    detections = []
+    for i in range(0, len(frames), batch_size):
+        detections.extend(detector.detect_batch(frames[i:i + batch_size], scale))
+    seconds = time.perf_counter() - start
+
+    found = sum(len(faces) for faces in detections)
+    report = {
+        "backend": backend,
+        "batched": detector.batched,
+        "frames": len(frames),
+        "seconds": round(seconds, 4),
+        "frames_per_sec": round(len(frames) / max(seconds, 1e-9), 2),
+        "detections": found,
+        "detections_per_sec": round(found / max(seconds, 1e-9), 2),
+    }
+    if labels is not None:
+        matched = 0
+        true_positives = 0
+        for truth, faces in zip(labels, detections):
+            unused = list(faces)
+            for box in truth:
+                best = max(unused, key=lambda face: box_iou(face, box), default=None)
+                if best is not None and box_iou(best, box) >= iou_threshold:
+                    matched += 1
+                    unused.remove(best)
+            true_positives += len(faces) - len(unused)
+        total = sum(len(truth) for truth in labels)
+        report["recall"] = round(matched / total, 4) if total else None
+        report["precision"] = round(true_positives / found, 4) if found else None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the face detector backends.")
+    parser.add_argument("--labels", type=str, default=None, help="JSON list of labelled frames.")
+    parser.add_argument("--video", type=str, default=None, help="Video to sample unlabelled frames from.")
+    parser.add_argument("--frames", type=int, default=100, help="Number of frames sampled from --video.")
+    parser.add_argument("--backends", type=str, default="haar", help="Comma-separated backends: haar, dnn, yunet.")
+    parser.add_argument("--cascade", type=str, default="cascade.xml", help="Haar cascade file.")
+    parser.add_argument("--dnn_model", type=str, default=None, help="ResNet-10 SSD .caffemodel.")
+    parser.add_argument("--dnn_config", type=str, default=None, help="ResNet-10 SSD deploy .prototxt.")
+    parser.add_argument("--yunet_model", type=str, default=None, help="YuNet .onnx model.")
+    parser.add_argument("--batch_size", type=int, default=8, help="Frames per detector call.")
+    parser.add_argument("--scale", type=float, default=0.5, help="Downscale factor applied before detection.")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU needed for a detection to match a label.")
+    args = parser.parse_args()
+
+    if args.labels:
+        frames, labels = load_labelled_frames(args.labels)
+    elif args.video:
+        frames, labels = sample_video_frames(args.video, args.frames), None
+    else:
+        parser.error("one of --labels or --video is required")
+
+    options = {
+        "haar": {"cascade_path": args.cascade},
+        "dnn": {"model_path": args.dnn_model, "config_path": args.dnn_config},
+        "yunet": {"model_path": args.yunet_model},
+    }
+    reports = []
+    for backend in args.backends.split(","):
+        backend = backend.strip()
+        if backend not in options:
+            parser.error(f"unknown backend: {backend}")
+        reports.append(run(backend, options[backend], frames, labels, args.batch_size, args.scale, args.iou))
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
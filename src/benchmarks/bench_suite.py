@@ -0,0 +1,339 @@
+"""
+Reproducible performance suite for the rendering, detection, trimming and matching paths.
+
+Synthetic talking-head fixtures (see benchmarks.fixtures) are generated
+offline for every case of the chosen profile. Each benchmark runs in a
+fresh process so its peak RSS is its own, and reports throughput (frames
+per second, realtime factor: media seconds processed per wall second)
+and memory. Before benchmarking, every fixture is checked to be detected
+by the cascade in use, so the detection and tracking paths are measured
+rather than the centre-crop fallback.
+
+Runs are compared against the baseline of their profile next to this
+file (benchmarks/baseline_<profile>.json), or `--baseline`; the run fails
+(exit code 1) when a metric regresses by more than the threshold.
+Baselines are only meaningful on the machine that recorded them, so none
+is committed (they are git-ignored): record one with `--save_baseline`
+before changing the code, then compare. Run from the `src` folder:
+
+    python -m benchmarks.bench_suite --profile quick --save_baseline
+    python -m benchmarks.bench_suite --profile quick --threshold 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import cv2
+
+from benchmarks.fixtures import ensure_fixture, fixture_name
+from main_pipeline.metrics import StageProbe
+
+# OpenCV's frontal human face cascade: the repo's cascade.xml detects cat faces, so it finds none of the drawn heads.
+DEFAULT_CASCADE = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+DEFAULT_TRANSCRIPT = "demo_files/assembly_transcript.json"
+BASELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROFILES = {
+    "quick": [
+        {"width": 640, "height": 360, "fps": 25, "seconds": 4, "faces": 1},
+        {"width": 1280, "height": 720, "fps": 30, "seconds": 4, "faces": 2},
+    ],
+    "full": [
+        {"width": 640, "height": 360, "fps": 25, "seconds": 10, "faces": 1},
+        {"width": 1280, "height": 720, "fps": 30, "seconds": 10, "faces": 1},
+        {"width": 1280, "height": 720, "fps": 60, "seconds": 10, "faces": 2},
+        {"width": 1920, "height": 1080, "fps": 30, "seconds": 20, "faces": 2},
+        {"width": 1920, "height": 1080, "fps": 30, "seconds": 10, "faces": 3},
+    ],
+}
+
+VIDEO_BENCHMARKS = ("convert_video_to_vertical", "create_vertical_frame", "detect_faces", "trim_video")
+# Matcher benchmarks and how often their snippets have a word replaced (0: exact quotes).
+MATCHER_BENCHMARKS = {"transcript_matcher": 0, "transcript_matcher_fuzzy": 3}
+
+# Metrics compared against the baseline: name -> True when higher is better.
+COMPARED_METRICS = {
+    "frames_per_sec": True,
+    "realtime_factor": True,
+    "snippets_per_sec": True,
+    "process_peak_rss_mb": False,
+}
+# Memory differences below this many MB are noise, whatever the threshold.
+RSS_SLACK_MB = 16.0
+
+
+def _read_frames(video_path: str, count: int) -> Tuple[list, float]:
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frames = []
+    try:
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+    finally:
+        cap.release()
+    return frames, fps
+
+
+def _bench_video(name: str, video_path: str, spec: Dict, options: Dict) -> Dict:
+    from video_editor.vertical_video import VerticalVideoCreator, trim_video
+
+    creator = VerticalVideoCreator(options["cascade"])
+    media_seconds = spec["seconds"]
+    frames_total = int(round(spec["fps"] * spec["seconds"]))
+    if name in ("create_vertical_frame", "detect_faces"):
+        frames, fps = _read_frames(video_path, options["frames"])
+        frames_total, media_seconds = len(frames), len(frames) / fps
+
+    with tempfile.TemporaryDirectory() as out_dir, StageProbe() as probe:
+        if name == "convert_video_to_vertical":
+            if not creator.convert_video_to_vertical(video_path, os.path.join(out_dir, "vertical.mp4")):
+                raise RuntimeError(f"convert_video_to_vertical failed on {video_path}")
+        elif name == "create_vertical_frame":
+            for frame in frames:
+                creator.create_vertical_frame(frame)
+        elif name == "detect_faces":
+            for frame in frames:
+                creator.detect_faces(frame, creator.detection_scale)
+        elif name == "trim_video":
+            start, end = spec["seconds"] * 0.25, spec["seconds"] * 0.75
+            for i in range(options["trims"]):
+                trim_video(video_path, start, end, os.path.join(out_dir, f"trim_{i}.mp4"))
+            media_seconds = (end - start) * options["trims"]
+            frames_total = None
+        else:
+            raise ValueError(f"Unknown benchmark: {name}")
+
+    wall = probe.result["wall_seconds"]
+    result = {
+        "wall_seconds": round(wall, 4),
+        "cpu_seconds": round(probe.result["cpu_seconds"], 4),
+        "realtime_factor": round(media_seconds / wall, 3),
+        "process_peak_rss_mb": probe.result["process_peak_rss_mb"],
+    }
+    if frames_total is not None:
+        result["frames_per_sec"] = round(frames_total / wall, 2)
+    if probe.result["children_peak_rss_mb"]:
+        result["children_peak_rss_mb"] = probe.result["children_peak_rss_mb"]
+    return result
+
+
+def _bench_matcher(name: str, options: Dict) -> Dict:
+    from benchmarks.bench_transcript_matcher import make_snippets
+    from utils import MATCHERS
+
+    with open(options["transcript"], "r", encoding="utf-8") as f:
+        audio_transcript = json.load(f)
+    snippets = make_snippets(audio_transcript, options["snippets"], 30, 120, seed=0,
+                             replace_every=MATCHER_BENCHMARKS[name])
+    with StageProbe() as probe:
+        matcher = MATCHERS["indexed"]({"viral_segments": snippets}, audio_transcript)
+        matched = matcher.match_all_segments(0.6)
+    wall = probe.result["wall_seconds"]
+    return {
+        "wall_seconds": round(wall, 4),
+        "cpu_seconds": round(probe.result["cpu_seconds"], 4),
+        "snippets_per_sec": round(len(snippets) / wall, 2),
+        "matched": len(matched),
+        "process_peak_rss_mb": probe.result["process_peak_rss_mb"],
+    }
+
+
+def fixture_detection_rate(video_path: str, cascade: str, frames: int) -> float:
+    """
+    Fraction of the first `frames` frames of a fixture in which the cascade finds at least one face.
+    """
+    from video_editor.vertical_video import VerticalVideoCreator
+
+    creator = VerticalVideoCreator(cascade)
+    sample, _ = _read_frames(video_path, frames)
+    if not sample:
+        return 0.0
+    found = sum(1 for frame in sample if len(creator.detect_faces(frame, creator.detection_scale)))
+    return found / len(sample)
+
+
+def check_fixtures(specs: List[Dict], options: Dict) -> Dict[str, float]:
+    """
+    Detection rate of every fixture with the benchmark cascade.
+
+    Raises:
+        RuntimeError: If a fixture is detected in fewer than
+            `options["min_detection_rate"]` of its frames, since its renders
+            would only measure the centre-crop fallback
+    """
+    rates = {}
+    for spec in specs:
+        path = ensure_fixture(options["fixtures_dir"], spec)
+        rate = fixture_detection_rate(path, options["cascade"], options["frames"])
+        rates[fixture_name(spec)] = round(rate, 3)
+        if rate < options["min_detection_rate"]:
+            raise RuntimeError(
+                f"{options['cascade']} detects a face in {rate:.0%} of the frames of fixture {fixture_name(spec)} "
+                f"(minimum {options['min_detection_rate']:.0%}); use a frontal face cascade"
+            )
+    return rates
+
+
+def default_baseline(profile: str) -> str:
+    return os.path.join(BASELINE_DIR, f"baseline_{profile}.json")
+
+
+def _run_case(name: str, video_path: str, spec: Dict, options: Dict) -> Dict:
+    # Renders print progress; keep the report readable.
+    with contextlib.redirect_stdout(io.StringIO()):
+        if name in MATCHER_BENCHMARKS:
+            return _bench_matcher(name, options)
+        return _bench_video(name, video_path, spec, options)
+
+
+def run_suite(specs: List[Dict], benchmarks: List[str], options: Dict, repeat: int = 1) -> Dict[str, Dict]:
+    """
+    Run every benchmark on every fixture, each in a fresh process.
+
+    With `repeat` above 1 the fastest run of each case is kept, which is
+    the least noisy estimate of what the code costs.
+
+    Returns:
+        Results keyed by "<benchmark>/<fixture>" (the benchmark name alone for the matchers)
+    """
+    if any(name in VIDEO_BENCHMARKS for name in benchmarks):
+        rates = check_fixtures(specs, options)
+        print(f"Fixture detection rates: {json.dumps(rates)}", file=sys.stderr)
+    cases = []
+    for name in benchmarks:
+        if name in MATCHER_BENCHMARKS:
+            cases.append((name, name, None, None))
+            continue
+        for spec in specs:
+            path = ensure_fixture(options["fixtures_dir"], spec)
+            cases.append((f"{name}/{fixture_name(spec)}", name, path, spec))
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for key, name, path, spec in cases:
+        runs = []
+        for _ in range(repeat):
+            # A fresh interpreter per run, so peak RSS is not inherited from earlier cases.
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                runs.append(pool.submit(_run_case, name, path, spec, options).result())
+        results[key] = min(runs, key=lambda r: r["wall_seconds"])
+        print(f"{key}: {json.dumps(results[key])}", file=sys.stderr)
+    return results
+
+
+def compare_to_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Describe every metric that regressed by more than `threshold` (a fraction) from the baseline.
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = reference.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            if higher_is_better:
+                regressed = new < old * (1.0 - threshold)
+            else:
+                regressed = new > old * (1.0 + threshold) and new - old > RSS_SLACK_MB
+            if regressed:
+                change = (new - old) / old * 100.0
+                regressions.append(f"{key} {metric}: {old} -> {new} ({change:+.1f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the performance suite on synthetic fixtures.")
+    parser.add_argument("--profile", type=str, default="quick", choices=sorted(PROFILES), help="Set of fixture videos to generate and benchmark.")
+    parser.add_argument("--benchmarks", type=str, default=",".join(VIDEO_BENCHMARKS + tuple(MATCHER_BENCHMARKS)), help="Comma-separated benchmarks to run.")
+    parser.add_argument("--fixtures_dir", type=str, default=os.path.join(tempfile.gettempdir(), "autocontent_bench_fixtures"), help="Folder caching the generated fixture videos.")
+    parser.add_argument("--cascade", type=str, default=DEFAULT_CASCADE, help="Haar cascade used by the renders (default: OpenCV's frontal face cascade).")
+    parser.add_argument("--min_detection_rate", type=float, default=0.9, help="Fraction of fixture frames the cascade must find a face in.")
+    parser.add_argument("--transcript", type=str, default=DEFAULT_TRANSCRIPT, help="AssemblyAI transcript JSON for the matcher benchmark.")
+    parser.add_argument("--frames", type=int, default=60, help="Frames per fixture for the per-frame benchmarks.")
+    parser.add_argument("--trims", type=int, default=5, help="Trims per fixture for the trim_video benchmark.")
+    parser.add_argument("--snippets", type=int, default=20, help="Snippets for the matcher benchmark.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is kept.")
+    parser.add_argument("--output", type=str, default=None, help="Write the report JSON to this file.")
+    parser.add_argument("--baseline", type=str, default=None, help="Baseline JSON to compare against (default: the saved baseline of the profile).")
+    parser.add_argument("--no_compare", action="store_true", help="Do not compare against a baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression, as a fraction of the baseline value.")
+    parser.add_argument("--save_baseline", type=str, nargs="?", const="", default=None, help="Save the results as a baseline JSON (default path: the profile's baseline next to this file).")
+    args = parser.parse_args()
+
+    benchmarks = [name.strip() for name in args.benchmarks.split(",") if name.strip()]
+    unknown = set(benchmarks) - set(VIDEO_BENCHMARKS) - set(MATCHER_BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    options = {
+        "fixtures_dir": args.fixtures_dir,
+        "cascade": args.cascade,
+        "min_detection_rate": args.min_detection_rate,
+        "transcript": args.transcript,
+        "frames": args.frames,
+        "trims": args.trims,
+        "snippets": args.snippets,
+    }
+
+    baseline_path, baseline = args.baseline or default_baseline(args.profile), None
+    if args.no_compare:
+        pass
+    elif os.path.exists(baseline_path):
+        # Read before the run, so --save_baseline over the same file still compares with the old one.
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    elif args.baseline:
+        parser.error(f"Baseline not found: {args.baseline}")
+    else:
+        print(f"No baseline for profile {args.profile} at {baseline_path}; not comparing", file=sys.stderr)
+
+    try:
+        results = run_suite(PROFILES[args.profile], benchmarks, options, args.repeat)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    report = {
+        "profile": args.profile,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "opencv": cv2.__version__, "cpus": os.cpu_count()},
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline is not None:
+        save_path = args.save_baseline or default_baseline(args.profile)
+        with open(save_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {save_path}")
+
+    if baseline is not None:
+        if baseline.get("machine") != report["machine"]:
+            print(f"Warning: {baseline_path} was recorded on another machine ({json.dumps(baseline.get('machine'))})",
+                  file=sys.stderr)
+        regressions = compare_to_baseline(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} of {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
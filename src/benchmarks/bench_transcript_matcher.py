@@ -0,0 +1,103 @@
+"""
+Compare the legacy and indexed transcript matchers on the bundled AssemblyAI transcript.
+
+Snippets are cut from the transcript words (with light punctuation/case
+noise, like an LLM quoting the episode), so the true start/end of every
+snippet is known. `--replace_every N` swaps every Nth word of a snippet for
+a filler word, which stands in for an LLM paraphrasing the quote. Run from
+the `src` folder:
+
+    python -m benchmarks.bench_transcript_matcher --snippets 20
+    python -m benchmarks.bench_transcript_matcher --snippets 20 --replace_every 3
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, List
+
+from utils import MATCHERS
+
+DEFAULT_TRANSCRIPT = "demo_files/assembly_transcript.json"
+FILLER_WORDS = ["basically", "honestly", "something", "really"]
+
+
+def make_snippets(audio_transcript: Dict, count: int, min_words: int, max_words: int, seed: int,
+                  replace_every: int = 0) -> List[Dict]:
+    """
+    Build viral segments from random word spans, with their true start/end in ms.
+
+    With `replace_every` above 0, every `replace_every`th word of a snippet
+    (never the first or last one, so the true boundaries stay) is replaced
+    by a filler word.
+    """
+    rng = random.Random(seed)
+    words = audio_transcript["words"]
+    snippets = []
+    for _ in range(count):
+        length = rng.randint(min_words, max_words)
+        start = rng.randrange(0, len(words) - length)
+        span = words[start:start + length]
+        texts = [w["text"] for w in span]
+        if replace_every > 0:
+            for i in range(replace_every - 1, length - 1, replace_every):
+                texts[i] = rng.choice(FILLER_WORDS)
+        text = " ".join(texts)
+        if rng.random() < 0.5:
+            text = text.lower().replace(",", "")
+        snippets.append({
+            "transcript": text,
+            "true_start_ms": span[0]["start"],
+            "true_end_ms": span[-1]["end"],
+        })
+    return snippets
+
+
+def run(matcher_name: str, audio_transcript: Dict, snippets: List[Dict], threshold: float) -> Dict:
+    start = time.perf_counter()
+    matcher = MATCHERS[matcher_name]({"viral_segments": snippets}, audio_transcript)
+    build_seconds = time.perf_counter() - start
+    results = matcher.match_all_segments(threshold)
+    total_seconds = time.perf_counter() - start
+
+    errors = []
+    for result in results:
+        truth = snippets[result["segment"] - 1]
+        errors.append(abs(result["start_time"] * 1000 - truth["true_start_ms"]))
+        errors.append(abs(result["end_time"] * 1000 - truth["true_end_ms"]))
+    errors.sort()
+    return {
+        "matcher": matcher_name,
+        "build_seconds": round(build_seconds, 4),
+        "total_seconds": round(total_seconds, 4),
+        "matched": len(results),
+        "snippets": len(snippets),
+        "median_boundary_error_ms": errors[len(errors) // 2] if errors else None,
+        "max_boundary_error_ms": errors[-1] if errors else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the transcript matchers.")
+    parser.add_argument("--transcript", type=str, default=DEFAULT_TRANSCRIPT, help="AssemblyAI transcript JSON.")
+    parser.add_argument("--snippets", type=int, default=20, help="Number of snippets to match.")
+    parser.add_argument("--min_words", type=int, default=30, help="Minimum snippet length in words.")
+    parser.add_argument("--max_words", type=int, default=120, help="Maximum snippet length in words.")
+    parser.add_argument("--similarity_threshold", type=float, default=0.6, help="Similarity threshold for matching.")
+    parser.add_argument("--replace_every", type=int, default=0, help="Replace every Nth snippet word with a filler word (0 keeps snippets exact).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for snippet selection.")
+    args = parser.parse_args()
+
+    with open(args.transcript, "r", encoding="utf-8") as f:
+        audio_transcript = json.load(f)
+    snippets = make_snippets(audio_transcript, args.snippets, args.min_words, args.max_words, args.seed,
+                             args.replace_every)
+
+    reports = [run(name, audio_transcript, snippets, args.similarity_threshold) for name in ("legacy", "indexed")]
+    print(json.dumps(reports, indent=2))
+    speedup = reports[0]["total_seconds"] / max(reports[1]["total_seconds"], 1e-9)
+    print(f"Indexed matcher speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Synthetic talking-head videos for the benchmarks, generated offline.
+
+Each fixture shows `faces` drawn heads on a textured background. One head
+talks at a time (its mouth opens and closes), the heads drift slowly like
+a handheld camera, and a hard cut halfway through swaps the layout so the
+scene-change path of the tracker is exercised. Fixtures are deterministic
+for a given spec and seed, and cached by spec in the fixtures folder.
+"""
+import math
+import os
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+SKIN = (140, 170, 215)
+
+
+def fixture_name(spec: Dict) -> str:
+    return f"{spec['width']}x{spec['height']}_{spec['fps']}fps_{spec['seconds']}s_{spec['faces']}faces"
+
+
+def _head_positions(width: int, height: int, faces: int, swapped: bool) -> List[Tuple[int, int, int]]:
+    radius = int(height * 0.16)
+    xs = [int(width * (i + 1) / (faces + 1)) for i in range(faces)]
+    if swapped:
+        xs = xs[::-1]
+        radius = int(radius * 1.3)
+    return [(x, int(height * 0.42), radius) for x in xs]
+
+
+def _draw_head(frame: np.ndarray, cx: int, cy: int, radius: int, mouth_open: float):
+    cv2.ellipse(frame, (cx, cy), (int(radius * 0.8), radius), 0, 0, 360, SKIN, -1, cv2.LINE_AA)
+    eye_y = cy - radius // 4
+    for dx in (-radius // 3, radius // 3):
+        cv2.ellipse(frame, (cx + dx, eye_y), (radius // 7, radius // 12), 0, 0, 360, (255, 255, 255), -1)
+        cv2.circle(frame, (cx + dx, eye_y), radius // 16, (40, 30, 20), -1)
+        cv2.line(frame, (cx + dx - radius // 6, eye_y - radius // 6),
+                 (cx + dx + radius // 6, eye_y - radius // 6), (50, 40, 30), max(1, radius // 25))
+    cv2.line(frame, (cx, eye_y + radius // 10), (cx - radius // 12, cy + radius // 8), (100, 120, 170), max(1, radius // 30))
+    mouth_h = max(1, int(radius * (0.04 + 0.16 * mouth_open)))
+    cv2.ellipse(frame, (cx, cy + radius // 2), (radius // 4, mouth_h), 0, 0, 360, (40, 40, 120), -1)
+    cv2.ellipse(frame, (cx, cy + int(radius * 1.6)), (int(radius * 1.3), int(radius * 0.7)), 0, 180, 360, (90, 60, 40), -1)
+
+
+def make_talking_head_video(path: str, width: int, height: int, fps: int, seconds: float,
+                            faces: int = 1, seed: int = 0) -> str:
+    """
+    Write a synthetic talking-head video (mp4v, no audio) and return its path.
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width]
+    background = np.stack([
+        60 + 40 * xx / width,
+        70 + 30 * yy / height,
+        80 + 20 * (xx + yy) / (width + height),
+    ], axis=-1).astype(np.uint8)
+    background = cv2.add(background, rng.integers(0, 25, background.shape, dtype=np.uint8))
+
+    total = int(round(fps * seconds))
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    try:
+        for i in range(total):
+            t = i / fps
+            frame = background.copy()
+            shift = (int(6 * math.sin(t * 0.7)), int(4 * math.cos(t * 0.5)))
+            frame = np.roll(frame, shift, axis=(1, 0))
+            speaker = int(t // 2.0) % max(1, faces)
+            for index, (cx, cy, radius) in enumerate(_head_positions(width, height, faces, i >= total // 2)):
+                mouth = 0.5 + 0.5 * math.sin(t * 2 * math.pi * 4.0) if index == speaker else 0.0
+                _draw_head(frame, cx + shift[0], cy + shift[1], radius, mouth)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+def ensure_fixture(fixtures_dir: str, spec: Dict, seed: int = 0) -> str:
+    """
+    Path of the fixture for `spec`, generating it if it is not cached yet.
+    """
+    os.makedirs(fixtures_dir, exist_ok=True)
+    path = os.path.join(fixtures_dir, f"{fixture_name(spec)}_seed{seed}.mp4")
+    if not os.path.exists(path):
+        make_talking_head_video(path + ".tmp.mp4", spec["width"], spec["height"], spec["fps"],
+                                spec["seconds"], spec["faces"], seed)
+        os.replace(path + ".tmp.mp4", path)
+    return path
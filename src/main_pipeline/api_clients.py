@@ -0,0 +1,484 @@
+import asyncio
+import json
+import os
+import random
+import ssl
+import threading
+import time
+import urllib.parse
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from main_pipeline.stage_cache import StageCache, file_hash
+
+# Statuses worth retrying: rate limited, or a transient server-side failure.
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+# Statuses that guarantee the request was not acted upon, so even non-idempotent requests can be retried.
+REJECTED_STATUSES = {429}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com"
+ASSEMBLYAI_BASE_URL = "https://api.assemblyai.com"
+
+
+class APIError(RuntimeError):
+    def __init__(self, url: str, status: int, body: str):
+        self.url = url
+        self.status = status
+        self.body = body
+        super().__init__(f"{url} returned HTTP {status}: {body[:500]}")
+
+
+class HTTPProtocolError(ConnectionError):
+    pass
+
+
+class RequestNotSentError(ConnectionError):
+    """
+    The connection could not be opened, or was closed before the request was written, so the server never saw it.
+    """
+
+
+class HTTPResponse:
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class HTTPConnectionPool:
+    def __init__(self, max_connections_per_host: int = 8, timeout: float = 120.0):
+        """
+        Minimal asyncio HTTP/1.1 client keeping connections alive per host.
+
+        At most `max_connections_per_host` requests are in flight per host;
+        finished connections are kept for the next request unless the server
+        closes them. A pool belongs to the event loop it is first used in.
+
+        The dependencies include no asyncio HTTP client (aiohttp, httpx), and
+        the two model APIs need little of HTTP: JSON bodies, one streamed
+        upload, keep-alive and chunked responses. A reused connection is only
+        retried when it was closed before the request was written; any later
+        failure is raised, and AsyncAPIClient decides whether resending the
+        request is safe.
+
+        Args:
+            max_connections_per_host: Concurrent connections per (scheme, host, port)
+            timeout: Seconds allowed for one request, from connecting to the last body byte
+        """
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self._idle: Dict[Tuple, List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self._limits: Dict[Tuple, asyncio.Semaphore] = {}
+        self._ssl = ssl.create_default_context()
+
+    async def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                      body: bytes = b"", body_path: Optional[str] = None) -> HTTPResponse:
+        """
+        Send one request and read the whole response.
+
+        Args:
+            body: Request body
+            body_path: File streamed as the request body instead of `body`
+        """
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        limit = self._limits.setdefault(key, asyncio.Semaphore(self.max_connections_per_host))
+        async with limit:
+            idle = self._idle.setdefault(key, [])
+            while idle:
+                reader, writer = idle.pop()
+                # Let a close the server sent while the connection was idle arrive before writing.
+                await asyncio.sleep(0)
+                try:
+                    return await self._exchange(key, reader, writer, method, target, parts.netloc,
+                                                headers, body, body_path)
+                except RequestNotSentError:
+                    # The idle connection was closed before any byte was written; try the next one.
+                    # Failures after the write reach the caller, whose retry policy knows if resending is safe.
+                    continue
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(parts.hostname, port, ssl=self._ssl if parts.scheme == "https" else None),
+                    self.timeout,
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                raise RequestNotSentError(f"Could not connect to {parts.netloc}: {e!r}") from e
+            return await self._exchange(key, reader, writer, method, target, parts.netloc, headers, body, body_path)
+
+    async def _exchange(self, key: Tuple, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                        method: str, target: str, host: str, headers: Optional[Dict[str, str]],
+                        body: bytes, body_path: Optional[str]) -> HTTPResponse:
+        try:
+            response, keep_alive = await asyncio.wait_for(
+                self._send(reader, writer, method, target, host, headers, body, body_path), self.timeout
+            )
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self._idle[key].append((reader, writer))
+        else:
+            writer.close()
+        return response
+
+    async def _send(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str,
+                    target: str, host: str, headers: Optional[Dict[str, str]], body: bytes,
+                    body_path: Optional[str]) -> Tuple[HTTPResponse, bool]:
+        if reader.at_eof() or writer.is_closing():
+            raise RequestNotSentError("The server closed the connection before the request was written")
+        length = os.path.getsize(body_path) if body_path else len(body)
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host}", f"Content-Length: {length}",
+                 "Connection: keep-alive", "Accept-Encoding: identity"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if body_path:
+            with open(body_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    writer.write(chunk)
+                    await writer.drain()
+        else:
+            writer.write(body)
+        await writer.drain()
+
+        while True:
+            status_line = await reader.readline()
+            if not status_line:
+                raise HTTPProtocolError("Connection closed before the response")
+            try:
+                version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+                status = int(status)
+            except ValueError:
+                raise HTTPProtocolError(f"Malformed status line: {status_line!r}") from None
+            response_headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+            if status == 101:
+                raise HTTPProtocolError("Unexpected protocol switch")
+            # Interim responses (100 Continue, 103 Early Hints) precede the final one.
+            if not 100 <= status < 200:
+                break
+
+        if method == "HEAD" or status in (204, 304):
+            payload = b""
+        elif "chunked" in response_headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            payload = b"".join(chunks)
+        elif "content-length" in response_headers:
+            payload = await reader.readexactly(int(response_headers["content-length"]))
+        else:
+            payload = await reader.read()
+            response_headers["connection"] = "close"
+
+        connection = response_headers.get("connection", "").lower()
+        keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+        return HTTPResponse(status, response_headers, payload), keep_alive
+
+    async def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """
+        Token-bucket rate limiter: `rate` tokens per second, bursts up to `capacity`.
+
+        Each caller reserves its tokens immediately (the balance may go
+        negative) and sleeps until they are earned, so waiters are served in
+        arrival order without holding a lock across the wait. Usable from
+        several event loops and threads.
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take `tokens` from the bucket and return the seconds to wait before using them.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self, tokens: float = 1.0):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def rate_limiter(service: str, api_key: str, requests_per_minute: float, burst: Optional[float] = None) -> TokenBucket:
+    """
+    Shared token bucket of an API key, so every client using the key draws from one budget.
+    """
+    with _buckets_lock:
+        bucket = _buckets.get((service, api_key))
+        if bucket is None:
+            bucket = TokenBucket(requests_per_minute / 60.0, burst or max(1.0, requests_per_minute / 60.0))
+            _buckets[(service, api_key)] = bucket
+        return bucket
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: str):
+        """
+        API responses stored as JSON files under their request key.
+
+        Keys come from StageCache.make_key over a hash of the request's
+        inputs (prompt, audio file), so repeating a request never calls the
+        service again. Entries are small and never evicted.
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, key: str, value: Dict):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+
+class AsyncAPIClient(ABC):
+    service = "api"
+
+    def __init__(self, api_key: str, base_url: str, requests_per_minute: float = 60.0,
+                 cache: Optional[ResponseCache] = None, pool: Optional[HTTPConnectionPool] = None,
+                 max_retries: int = 5, backoff: float = 1.0, max_backoff: float = 60.0):
+        """
+        Shared plumbing of the model API clients: pooled connections, a
+        per-key rate limit, retries with exponential backoff and jitter
+        (honouring Retry-After), and an optional response cache. Identical
+        requests in flight at the same time share one upstream call.
+
+        Args:
+            api_key: Key sent with every request; also selects the rate-limit bucket
+            base_url: Service root, e.g. the local stub server for offline runs
+            requests_per_minute: Request budget of the key
+            cache: Response cache; None calls the service every time
+            pool: Connection pool, shared to reuse connections across clients
+            max_retries: Retries after the first attempt of a request
+            backoff: First retry delay in seconds, doubled on every retry
+            max_backoff: Longest retry delay in seconds
+        """
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.limiter = rate_limiter(self.service, api_key, requests_per_minute)
+        self.cache = cache
+        self.pool = pool or HTTPConnectionPool()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @abstractmethod
+    def auth_headers(self) -> Dict[str, str]:
+        """
+        Headers authenticating a request with `api_key`.
+        """
+
+    async def _cached(self, key: str, fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        """
+        Return the cached response of `key`, or fetch and cache it.
+
+        Concurrent calls with the same key wait for the first one's fetch
+        instead of calling the service again. Fetches are tied to the event
+        loop of the first call, like the connection pool.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        future = self._in_flight.get(key)
+        if future is None:
+            async def fetch_and_store():
+                response = await fetch()
+                if self.cache is not None:
+                    self.cache.put(key, response)
+                return response
+
+            future = asyncio.ensure_future(fetch_and_store())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded, so one caller being cancelled does not cancel the fetch the others wait for.
+        return await asyncio.shield(future)
+
+    async def request(self, method: str, path: str, payload: Optional[Dict] = None,
+                      body_path: Optional[str] = None, idempotent: Optional[bool] = None) -> Dict:
+        """
+        Send a request to the service and return its decoded JSON body.
+
+        Idempotent requests are retried after connection errors, timeouts and
+        RETRY_STATUSES. Others (POSTs by default) are only retried when the
+        service cannot have acted on them: REJECTED_STATUSES, or no
+        connection. A lost response to a transcript submit is not resent,
+        since that would create and bill a second job. Other HTTP errors
+        raise APIError at once.
+
+        Args:
+            idempotent: Whether repeating the request is harmless; defaults
+                to True for IDEMPOTENT_METHODS
+        """
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        url = path if path.startswith(("http://", "https://")) else self.base_url + path
+        headers = self.auth_headers()
+        body = b""
+        if payload is not None:
+            headers["Content-Type"] = "application/json"
+            body = json.dumps(payload).encode("utf-8")
+        elif body_path is not None:
+            headers["Content-Type"] = "application/octet-stream"
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            retry_after = None
+            try:
+                response = await self.pool.request(method, url, headers, body, body_path)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                if not idempotent and not isinstance(e, RequestNotSentError):
+                    raise
+                error: Exception = e
+            else:
+                if response.status < 400:
+                    return response.json()
+                error = APIError(url, response.status, response.body.decode("utf-8", "replace"))
+                if response.status not in (RETRY_STATUSES if idempotent else REJECTED_STATUSES):
+                    raise error
+                try:
+                    retry_after = float(response.headers.get("retry-after", ""))
+                except ValueError:
+                    pass
+            if attempt == self.max_retries:
+                raise error
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+            if retry_after is not None:
+                delay = min(self.max_backoff, max(delay, retry_after))
+            print(f"{self.service} request failed ({error}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        await self.pool.close()
+
+
+class GeminiClient(AsyncAPIClient):
+    service = "gemini"
+
+    def __init__(self, api_key: str, model: str = "gemini-2.5-flash", base_url: str = GEMINI_BASE_URL, **options):
+        """
+        Client of the Gemini generateContent API. See AsyncAPIClient for the options.
+        """
+        super().__init__(api_key, base_url, **options)
+        self.model = model
+
+    def auth_headers(self) -> Dict[str, str]:
+        return {"X-goog-api-key": self.api_key}
+
+    async def generate(self, prompt: str, generation_config: Optional[Dict] = None) -> Dict:
+        """
+        Run a single-turn prompt and return the raw generateContent response.
+
+        Responses are cached by model, prompt and generation config.
+        generateContent creates nothing on the service, so it is retried
+        like an idempotent request.
+        """
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        if generation_config:
+            payload["generationConfig"] = generation_config
+        key = StageCache.make_key("gemini", model=self.model, payload=payload)
+        return await self._cached(key, lambda: self.request(
+            "POST", f"/v1beta/models/{self.model}:generateContent", payload, idempotent=True,
+        ))
+
+    async def generate_text(self, prompt: str, generation_config: Optional[Dict] = None) -> str:
+        """
+        Text of the first candidate of `generate`.
+        """
+        response = await self.generate(prompt, generation_config)
+        try:
+            parts = response["candidates"][0]["content"]["parts"]
+        except (KeyError, IndexError):
+            raise ValueError(f"Gemini response has no candidate text: {json.dumps(response)[:500]}") from None
+        return "".join(part.get("text", "") for part in parts)
+
+
+class AssemblyAIClient(AsyncAPIClient):
+    service = "assemblyai"
+
+    def __init__(self, api_key: str, base_url: str = ASSEMBLYAI_BASE_URL, poll_interval: float = 3.0,
+                 **options):
+        """
+        Client of the AssemblyAI transcription API. See AsyncAPIClient for the options.
+
+        Args:
+            poll_interval: Seconds between two status checks of a transcript
+        """
+        super().__init__(api_key, base_url, **options)
+        self.poll_interval = poll_interval
+
+    def auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": self.api_key}
+
+    async def transcribe(self, audio_path: str, options: Optional[Dict] = None) -> Dict:
+        """
+        Upload an audio file, transcribe it and return the finished transcript JSON.
+
+        Speaker labels are on by default. Transcripts are cached by the audio
+        file's content hash and the options, so the same audio is never sent twice.
+        """
+        options = {"speaker_labels": True, **(options or {})}
+        key = StageCache.make_key("assemblyai", audio=await asyncio.to_thread(file_hash, audio_path), options=options)
+        return await self._cached(key, lambda: self._transcribe(audio_path, options))
+
+    async def _transcribe(self, audio_path: str, options: Dict) -> Dict:
+        upload = await self.request("POST", "/v2/upload", body_path=audio_path)
+        transcript = await self.request("POST", "/v2/transcript", {"audio_url": upload["upload_url"], **options})
+        while transcript["status"] not in ("completed", "error"):
+            await asyncio.sleep(self.poll_interval)
+            transcript = await self.request("GET", f"/v2/transcript/{transcript['id']}")
+        if transcript["status"] == "error":
+            raise RuntimeError(f"AssemblyAI transcription of {audio_path} failed: {transcript.get('error')}")
+        return transcript
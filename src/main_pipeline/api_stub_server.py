@@ -0,0 +1,171 @@
+"""
+Local stand-in for the Gemini and AssemblyAI APIs, serving the demo files.
+
+Gemini generateContent calls answer with demo_files/gemini_prompt_result_pt.json
+as the candidate text; AssemblyAI uploads and transcripts go through the
+usual upload / submit / poll sequence and finish with
+demo_files/assembly_transcript.json. Point the clients at it for offline runs:
+
+    python -m main_pipeline.api_stub_server --port 8765
+    GeminiClient("any-key", base_url="http://127.0.0.1:8765")
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+DEMO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "demo_files")
+DEMO_HIGHLIGHTS = os.path.join(DEMO_DIR, "gemini_prompt_result_pt.json")
+DEMO_TRANSCRIPT = os.path.join(DEMO_DIR, "assembly_transcript.json")
+
+_GENERATE = re.compile(r"^/v1beta/models/([^/:]+):generateContent$")
+_TRANSCRIPT = re.compile(r"^/v2/transcript/([\w-]+)$")
+
+
+class StubAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], error_every: int = 0, polls_before_done: int = 1):
+        """
+        Args:
+            address: (host, port) to listen on; port 0 picks a free port
+            error_every: Answer every Nth request with HTTP 429 (0 never), to exercise retries
+            polls_before_done: Status checks answered "processing" before a transcript completes
+        """
+        super().__init__(address, StubAPIHandler)
+        self.error_every = error_every
+        self.polls_before_done = polls_before_done
+        self.lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.transcripts: Dict[str, Dict] = {}
+        self._requests = itertools.count(1)
+        self._ids = itertools.count(1)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubAPIServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, payload: Dict, headers: Dict[str, str] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _start(self, route: str) -> bool:
+        """
+        Count the call and decide whether it fails; False when an error reply was sent.
+        """
+        with self.server.lock:
+            self.server.calls[route] = self.server.calls.get(route, 0) + 1
+            number = next(self.server._requests)
+        if self.server.error_every and number % self.server.error_every == 0:
+            self._reply(429, {"error": "rate limited (stub)"}, {"Retry-After": "0"})
+            return False
+        return True
+
+    def do_POST(self):
+        body = self._body()
+        generate = _GENERATE.match(self.path)
+        if generate:
+            if not self.headers.get("X-goog-api-key"):
+                return self._reply(401, {"error": {"code": 401, "message": "API key missing"}})
+            if not self._start("gemini"):
+                return
+            with open(DEMO_HIGHLIGHTS, "r", encoding="utf-8") as f:
+                text = f.read()
+            return self._reply(200, {
+                "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+                "modelVersion": generate.group(1),
+            })
+        if not self.headers.get("Authorization"):
+            return self._reply(401, {"error": "Authentication error, API token missing/invalid"})
+        if self.path == "/v2/upload":
+            if not self._start("upload"):
+                return
+            digest = hashlib.sha256(body).hexdigest()
+            return self._reply(200, {"upload_url": f"{self.server.base_url}/uploads/{digest}"})
+        if self.path == "/v2/transcript":
+            if not self._start("transcript"):
+                return
+            request = json.loads(body or b"{}")
+            if "audio_url" not in request:
+                return self._reply(400, {"error": "audio_url is required"})
+            with self.server.lock:
+                transcript_id = f"stub-{next(self.server._ids)}"
+                self.server.transcripts[transcript_id] = {"request": request, "polls": 0}
+            return self._reply(200, {"id": transcript_id, "status": "queued", "audio_url": request["audio_url"]})
+        self._reply(404, {"error": f"Unknown path {self.path}"})
+
+    def do_GET(self):
+        match = _TRANSCRIPT.match(self.path)
+        if not match:
+            return self._reply(404, {"error": f"Unknown path {self.path}"})
+        if not self.headers.get("Authorization"):
+            return self._reply(401, {"error": "Authentication error, API token missing/invalid"})
+        if not self._start("poll"):
+            return
+        transcript_id = match.group(1)
+        with self.server.lock:
+            job = self.server.transcripts.get(transcript_id)
+            if job is not None:
+                job["polls"] += 1
+        if job is None:
+            return self._reply(404, {"error": "Transcript not found"})
+        if job["polls"] <= self.server.polls_before_done:
+            return self._reply(200, {"id": transcript_id, "status": "processing"})
+        with open(DEMO_TRANSCRIPT, "r", encoding="utf-8") as f:
+            transcript = json.load(f)
+        transcript.update({"id": transcript_id, "status": "completed", "audio_url": job["request"]["audio_url"]})
+        self._reply(200, transcript)
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, **options) -> StubAPIServer:
+    """
+    Start the stub server on a background thread; stop it with `server.shutdown()`.
+    """
+    server = StubAPIServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="api-stub-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the demo files as a local Gemini/AssemblyAI API.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    parser.add_argument("--error_every", type=int, default=0, help="Answer every Nth request with HTTP 429 to exercise retries.")
+    parser.add_argument("--polls_before_done", type=int, default=1, help="Status checks before a transcript completes.")
+    args = parser.parse_args()
+
+    server = StubAPIServer((args.host, args.port), args.error_every, args.polls_before_done)
+    print(f"Stub API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,54 @@
 # Assembly AI
+import asyncio
+import json
+import os
+from typing import List, Sequence
 
-import json 
+from main_pipeline.api_clients import ASSEMBLYAI_BASE_URL, AssemblyAIClient
+from main_pipeline.transcript_store import ColumnarTranscript, load_transcript
 
-with open('src/demo_files/assembly_transcript_pt.json', 'r') as f:
-    my_file = json.load(f)
+DEMO_TRANSCRIPT = 'src/demo_files/assembly_transcript.json'
 
 def audio_diariazation_demo(audio_file): # should calls api with audio_file (any type)
-    return my_file
\ No newline at end of file
+    # Read on call instead of at import time
+    with open(DEMO_TRANSCRIPT, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def audio_diarization_demo_columnar(audio_file) -> ColumnarTranscript:
+    """
+    Demo transcript in columnar form, streamed into a sidecar on first use and memory-mapped afterwards.
+    """
+    return load_transcript(DEMO_TRANSCRIPT)
+
+def assemblyai_client_from_env(**options) -> AssemblyAIClient:
+    """
+    AssemblyAI client using ASSEMBLYAI_API_KEY, and ASSEMBLYAI_BASE_URL when set (e.g. the stub server).
+    """
+    api_key = os.environ.get("ASSEMBLYAI_API_KEY")
+    if not api_key:
+        raise ValueError("ASSEMBLYAI_API_KEY is not set")
+    return AssemblyAIClient(api_key, base_url=os.environ.get("ASSEMBLYAI_BASE_URL", ASSEMBLYAI_BASE_URL), **options)
+
+async def audio_diarization(audio_file: str, output_path: str, client: AssemblyAIClient) -> ColumnarTranscript:
+    """
+    Transcribe an episode's audio with speaker labels and save the transcript JSON.
+
+    Returns:
+        The transcript loaded from `output_path`
+    """
+    transcript = await client.transcribe(audio_file)
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(transcript, f)
+    os.replace(tmp_path, output_path)
+    return await asyncio.to_thread(load_transcript, output_path)
+
+async def diarize_episodes(audio_files: Sequence[str], output_paths: Sequence[str],
+                           client: AssemblyAIClient) -> List[ColumnarTranscript]:
+    """
+    Transcribe several episodes concurrently, within the client's rate limit.
+    """
+    return await asyncio.gather(*(
+        audio_diarization(audio_file, output_path, client)
+        for audio_file, output_path in zip(audio_files, output_paths)
+    ))
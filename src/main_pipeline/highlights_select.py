@@ -1,44 +1,47 @@
-import json 
+import asyncio
+import json
+import os
+import re
+from typing import Dict, List, Sequence
 
-with open('./demo_files/gemini_prompt_result_pt.json', 'r') as f:
-    my_file = json.load(f)
+from main_pipeline.api_clients import GEMINI_BASE_URL, GeminiClient
+
+DEMO_HIGHLIGHTS = './demo_files/gemini_prompt_result_pt.json'
 
 def highlights_select_demo():
-    return my_file
-
-import subprocess
-def run_command(command):
-    try:
-        # Run the command and wait for it to finish
-        result = subprocess.run(command, shell=True, text=True, capture_output=True)
-        
-        # Print the command's output and errors
-        print("STDOUT:\n", result.stdout)
-        print("STDERR:\n", result.stderr)
-
-        # Check if command was successful
-        if result.returncode == 0:
-            print("Command executed successfully.")
-        else:
-            print(f"Command failed with return code {result.returncode}")
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-api_key = "from dotenv"
-
-def run_gemini_curl():
-    f"""curl "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent" \
-  -H 'Content-Type: application/json' \
-  -H 'X-goog-api-key: {api_key} \
-  -X POST \
-  -d '{
-    "contents": [
-      {
-        "parts": [
-          {
-            "text": "Just say yes"
-          }
-        ]
-      }
-    ]
-  }'"""
\ No newline at end of file
+    with open(DEMO_HIGHLIGHTS, 'r') as f:
+        return json.load(f)
+
+def gemini_client_from_env(**options) -> GeminiClient:
+    """
+    Gemini client using GEMINI_API_KEY, and GEMINI_BASE_URL when set (e.g. the stub server).
+    """
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY is not set")
+    return GeminiClient(api_key, base_url=os.environ.get("GEMINI_BASE_URL", GEMINI_BASE_URL), **options)
+
+def parse_json_reply(text: str) -> Dict:
+    """
+    Decode a JSON model reply, tolerating a surrounding ```json fence.
+    """
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    return json.loads(fenced.group(1) if fenced else text)
+
+async def highlights_select(prompt: str, transcript_text: str, client: GeminiClient) -> Dict:
+    """
+    Ask Gemini for the viral segments of an episode.
+
+    Returns:
+        The decoded reply, with "viral_segments" like the demo file
+    """
+    text = await client.generate_text(
+        f"{prompt}\n\n{transcript_text}", generation_config={"responseMimeType": "application/json"}
+    )
+    return parse_json_reply(text)
+
+async def select_episodes(prompt: str, transcript_texts: Sequence[str], client: GeminiClient) -> List[Dict]:
+    """
+    Select the highlights of several episodes concurrently, within the client's rate limit.
+    """
+    return await asyncio.gather(*(highlights_select(prompt, text, client) for text in transcript_texts))
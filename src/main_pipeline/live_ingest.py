@@ -0,0 +1,390 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import yt_dlp
+
+from main_pipeline.api_clients import AssemblyAIClient
+from utils import IndexedTranscriptMatcher, extract_audio_ranges
+from video_editor.ffmpeg_tools import FFmpegError, probe_duration, run_ffmpeg
+
+# Transcribes an audio file covering [start, end) of the episode; times in the result are file relative.
+Transcriber = Callable[[str, float, float], Dict]
+
+
+def live_download_format(max_height: Optional[int] = None) -> str:
+    """
+    Single muxed format, preferring HLS so the partial download is a playable MPEG-TS stream.
+    """
+    cap = f"[height<={max_height}]" if max_height else ""
+    return f"best{cap}[protocol^=m3u8]/best{cap}"
+
+
+class LiveDownload:
+    def __init__(self, url: str, folder: str, max_height: Optional[int] = None):
+        """
+        Download a (live or premiere) video on a background thread, exposing the partial file.
+
+        HLS fragments are appended to an MPEG-TS .part file that can be read
+        while it grows; yt-dlp renames it when the download ends. Non
+        fragmented formats only become readable once finished.
+        """
+        self.url = url
+        self.folder = folder
+        self.max_height = max_height
+        self.finished = threading.Event()
+        self.error: Optional[BaseException] = None
+        self._path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="live-download", daemon=True)
+
+    def start(self) -> "LiveDownload":
+        self._thread.start()
+        return self
+
+    def current_path(self) -> Optional[str]:
+        """
+        File holding the data downloaded so far, or None before the first fragment.
+        """
+        with self._lock:
+            return self._path
+
+    def _hook(self, d: dict):
+        path = d.get("tmpfilename") if d.get("status") == "downloading" else d.get("filename")
+        if path:
+            with self._lock:
+                self._path = path
+
+    def _run(self):
+        ydl_opts = {
+            "outtmpl": os.path.join(self.folder, "%(title)s.%(ext)s"),
+            "format": live_download_format(self.max_height),
+            "live_from_start": True,
+            "hls_use_mpegts": True,
+            "noprogress": True,
+            "progress_hooks": [self._hook],
+        }
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                ydl.download([self.url])
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.finished.set()
+
+
+class PartialTranscript:
+    def __init__(self, overlap: float = 0.0):
+        """
+        Transcript of an episode assembled from consecutive audio windows.
+
+        Holds the AssemblyAI shape ("words", "utterances") with episode
+        relative times, so it can be handed to the transcript matchers.
+
+        Args:
+            overlap: Seconds each window repeats of the previous one. Words
+                are taken from the earlier window before the middle of the
+                overlap and from the later one after it, so a word cut off at
+                a window edge is replaced by its complete transcription.
+        """
+        self.overlap = overlap
+        self.words: List[Dict] = []
+        self.utterances: List[Dict] = []
+        self.end_seconds = 0.0
+
+    @staticmethod
+    def _words_from(utterance: Dict, cut: int, before: bool) -> Optional[Dict]:
+        """
+        Copy of `utterance` keeping only its words before (or from) `cut` ms, or None if nothing is left.
+        """
+        words = utterance.get("words") or []
+        kept = [word for word in words if (word["start"] < cut) == before]
+        if not words:
+            return utterance if (utterance["start"] < cut) == before else None
+        if not kept:
+            return None
+        if len(kept) < len(words):
+            utterance = {**utterance, "start": kept[0]["start"], "end": kept[-1]["end"],
+                         "text": " ".join(word.get("text", "") for word in kept)}
+        utterance["words"] = kept
+        return utterance
+
+    def add_window(self, transcript: Dict, start: float, end: float):
+        """
+        Append the transcript of the window [start, end), whose times are relative to `start`.
+
+        A window may start before the end of the previous one (by up to
+        `overlap` seconds); words in the overlap are deduplicated by their
+        start time around its middle.
+        """
+        offset = int(round(start * 1000))
+
+        def shifted(item: Dict) -> Dict:
+            item = dict(item)
+            item["start"] = item.get("start", 0) + offset
+            item["end"] = item.get("end", 0) + offset
+            return item
+
+        cut = offset
+        if start < self.end_seconds:
+            cut = int(round((start + self.end_seconds) * 500))
+            while self.words and self.words[-1]["start"] >= cut:
+                self.words.pop()
+            while self.utterances:
+                last = self._words_from(self.utterances[-1], cut, before=True)
+                if last is not None:
+                    self.utterances[-1] = last
+                    break
+                self.utterances.pop()
+
+        utterances = []
+        for utterance in transcript.get("utterances") or []:
+            utterance = shifted(utterance)
+            utterance["words"] = [shifted(word) for word in utterance.get("words") or []]
+            utterance = self._words_from(utterance, cut, before=False)
+            if utterance is not None:
+                utterances.append(utterance)
+        words = [shifted(word) for word in transcript.get("words") or []]
+        if not words:
+            words = [word for utterance in utterances for word in utterance["words"]]
+        self.words.extend(word for word in words if word["start"] >= cut)
+        self.utterances.extend(utterances)
+        self.end_seconds = end
+
+    def stable_word_count(self, final: bool = False) -> int:
+        """
+        Number of leading words no later window can replace (all of them once the transcript is final).
+        """
+        if final:
+            return len(self.words)
+        boundary = (self.end_seconds - self.overlap) * 1000
+        count = len(self.words)
+        while count and self.words[count - 1]["start"] >= boundary:
+            count -= 1
+        return count
+
+    def as_dict(self) -> Dict:
+        return {"words": self.words, "utterances": self.utterances}
+
+
+class DemoTranscriber:
+    def __init__(self, transcript_path: str):
+        """
+        Offline stand-in for live transcription: slices a full transcript by window.
+        """
+        with open(transcript_path, "r", encoding="utf-8") as f:
+            self.transcript = json.load(f)
+
+    def __call__(self, audio_path: str, start: float, end: float) -> Dict:
+        start_ms, end_ms = start * 1000, end * 1000
+
+        def window(items):
+            return [
+                {**item, "start": item["start"] - start_ms, "end": item["end"] - start_ms}
+                for item in items or [] if start_ms <= item["start"] < end_ms
+            ]
+
+        utterances = []
+        for utterance in self.transcript.get("utterances") or []:
+            words = window(utterance.get("words"))
+            if words:
+                text = " ".join(word["text"] for word in words)
+                utterances.append({**utterance, "start": words[0]["start"], "end": words[-1]["end"],
+                                   "text": text, "words": words})
+        return {"words": window(self.transcript.get("words")), "utterances": utterances}
+
+
+class AssemblyAITranscriber:
+    def __init__(self, client: AssemblyAIClient):
+        """
+        Transcribe windows with AssemblyAI from any thread.
+
+        The client runs on its own event loop thread so its connection pool
+        and rate limiter are shared by every window.
+        """
+        self.client = client
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="assemblyai-loop", daemon=True).start()
+
+    def __call__(self, audio_path: str, start: float, end: float) -> Dict:
+        return asyncio.run_coroutine_threadsafe(self.client.transcribe(audio_path), self.loop).result()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def cut_section(input_path: str, start: float, end: float, output_path: str):
+    """
+    Re-encode [start, end) of a (possibly growing) file into a standalone MP4 starting exactly at `start`.
+    """
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    run_ffmpeg([
+        "ffmpeg", "-y", "-v", "error",
+        "-ss", f"{start:.3f}", "-i", input_path, "-t", f"{end - start:.3f}",
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-c:a", "aac",
+        "-movflags", "+faststart", output_path,
+    ])
+
+
+class LiveIngest:
+    def __init__(self, download: LiveDownload, viral_segments: Dict, transcribe: Transcriber,
+                 render_clip: Callable[[Dict, Dict], None], work_dir: str, window: float = 30.0,
+                 overlap: float = 2.5, poll_interval: float = 5.0, safety: float = 2.0, settle: float = 10.0,
+                 margin: float = 2.0, similarity_threshold: float = 0.6, transcribe_workers: int = 2):
+        """
+        Turn a download in progress into clips as soon as their footage is on disk.
+
+        Every poll, the duration on disk is probed. Each new `window` seconds
+        of it has its audio extracted and transcribed (on worker threads, in
+        order of arrival), starting `overlap` seconds early so words at the
+        window edges are heard whole; finished windows extend a
+        PartialTranscript. Its words that no later window can change are
+        added to one IndexedTranscriptMatcher as they arrive, and the viral
+        snippets still unmatched are looked up in it. A match is accepted once the
+        transcript runs `settle` seconds past its end, so a snippet is not
+        cut short by a window that is still missing. An accepted clip is cut
+        from the partial file (with `margin` seconds around it) as soon as
+        that range is on disk, and handed to `render_clip` on a render thread.
+
+        Args:
+            download: Download in progress
+            viral_segments: Viral segments JSON ({"viral_segments": [...]})
+            transcribe: Transcriber of one audio window
+            render_clip: Called with the section ({"path", "start", "end"},
+                positions in the episode in seconds) and the timestamp
+                ({"segment", "start_time", "end_time"}) of each clip
+            work_dir: Folder for the audio windows and cut sections
+            window: Seconds of media per transcribed audio window
+            overlap: Seconds each audio window repeats of the previous one
+            poll_interval: Seconds between two probes of the download
+            safety: Seconds at the end of the partial file treated as not yet usable
+            settle: Seconds of transcript needed past a match before accepting it
+            margin: Seconds cut around each clip for the renderer
+            similarity_threshold: Threshold of the transcript matcher
+            transcribe_workers: Audio windows transcribed concurrently
+        """
+        self.download = download
+        self.segments = viral_segments.get("viral_segments", [])
+        self.transcribe = transcribe
+        self.render_clip = render_clip
+        self.work_dir = work_dir
+        self.window = window
+        self.poll_interval = poll_interval
+        self.safety = safety
+        self.settle = settle
+        self.margin = margin
+        self.similarity_threshold = similarity_threshold
+        self.transcribe_workers = transcribe_workers
+        self.overlap = overlap
+        self.transcript = PartialTranscript(overlap)
+        self.matcher = IndexedTranscriptMatcher(viral_segments, {"words": []})
+        self.indexed_words = 0
+        self.accepted: Dict[int, Dict] = {}
+        self.rendered: Dict[int, Future] = {}
+
+    def _available_seconds(self, last: float) -> float:
+        path = self.download.current_path()
+        if path is None or not os.path.exists(path):
+            return last
+        try:
+            return max(last, probe_duration(path))
+        except (FFmpegError, ValueError):
+            # Nothing decodable yet, or the file is being renamed at the end of the download.
+            return last
+
+    def _transcribe_window(self, index: int, start: float, end: float) -> Dict:
+        output_base = os.path.join(self.work_dir, f"audio_window_{index:05d}")
+        for attempt in range(3):
+            try:
+                audio_path = extract_audio_ranges(self.download.current_path(), output_base, [(start, end)])[0]
+                break
+            except FFmpegError:
+                if attempt == 2:
+                    raise
+                time.sleep(1.0)  # the partial file may be renamed under us
+        return self.transcribe(audio_path, start, end)
+
+    def _match(self, final: bool):
+        stable = self.transcript.stable_word_count(final)
+        self.matcher.extend((word.get("text", ""), word["start"], word["end"])
+                            for word in self.transcript.words[self.indexed_words:stable])
+        self.indexed_words = stable
+        for index, segment in enumerate(self.segments):
+            if index in self.accepted:
+                continue
+            result = self.matcher.find_timestamp_for_segment(segment, self.similarity_threshold)
+            if result and (final or result["end_seconds"] + self.settle <= self.transcript.end_seconds):
+                self.accepted[index] = {"segment": index + 1, "start_time": result["start_seconds"],
+                                        "end_time": result["end_seconds"]}
+                print(f"  Matched segment {index + 1}: {result['start_seconds']:.1f}-{result['end_seconds']:.1f}s")
+
+    def _cut_and_render(self, index: int, timestamp: Dict, available: float) -> None:
+        start = max(0.0, timestamp["start_time"] - self.margin)
+        end = min(timestamp["end_time"] + self.margin, available)
+        section_path = os.path.join(self.work_dir, f"section_{index + 1}.mp4")
+        cut_section(self.download.current_path(), start, end, section_path)
+        self.render_clip({"path": section_path, "start": start, "end": end}, timestamp)
+
+    def run(self) -> List[Dict]:
+        """
+        Follow the download until it ends and every matched clip is rendered.
+
+        Returns:
+            Timestamps of the rendered clips, by segment order
+        """
+        os.makedirs(self.work_dir, exist_ok=True)
+        available = 0.0
+        submitted = 0.0
+        submitted_windows = 0
+        windows: List[Tuple[float, float, Future]] = []
+        with ThreadPoolExecutor(max_workers=self.transcribe_workers, thread_name_prefix="live-transcribe") as transcribe_pool, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-render") as render_pool:
+            while True:
+                finished = self.download.finished.is_set()
+                if finished and self.download.error is not None:
+                    raise self.download.error
+                available = self._available_seconds(available)
+                usable = available if finished else max(0.0, available - self.safety)
+
+                while usable - submitted >= self.window or (finished and usable - submitted > 0.5):
+                    end = min(submitted + self.window, usable)
+                    start = max(0.0, submitted - self.overlap)
+                    future = transcribe_pool.submit(self._transcribe_window, submitted_windows, start, end)
+                    windows.append((start, end, future))
+                    submitted = end
+                    submitted_windows += 1
+
+                # Windows join the transcript in order, so it never has holes.
+                added = False
+                while windows and windows[0][2].done():
+                    start, end, future = windows.pop(0)
+                    self.transcript.add_window(future.result(), start, end)
+                    added = True
+                done = finished and not windows and submitted >= usable - 0.5
+                if added or done:
+                    self._match(final=done)
+
+                for index, timestamp in sorted(self.accepted.items()):
+                    if index not in self.rendered and (done or timestamp["end_time"] + self.margin <= usable):
+                        self.rendered[index] = render_pool.submit(self._cut_and_render, index, timestamp, usable)
+                for future in self.rendered.values():
+                    if future.done():
+                        future.result()
+
+                if done:
+                    break
+                time.sleep(self.poll_interval if not finished else 0.1)
+
+            for future in self.rendered.values():
+                future.result()
+        unmatched = len(self.segments) - len(self.accepted)
+        if unmatched:
+            print(f"  {unmatched} segment(s) never matched the transcript")
+        return [self.accepted[i] for i in sorted(self.accepted)]
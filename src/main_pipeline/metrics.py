@@ -0,0 +1,202 @@
+import json
+import os
+import sys
+import time
+from array import array
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Per-frame phases of a render.
+FRAME_PHASES = ("decode", "detect", "resize", "compose", "encode")
+
+
+def _maxrss_mb(who) -> Optional[float]:
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def _children_cpu_seconds() -> Optional[float]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageProbe:
+    def __init__(self):
+        """
+        Measure the resources used by a stage running on the current thread.
+
+        Records wall time, the CPU time of the process (all its threads, so
+        the decode, encode and detection threads of a render count), the CPU
+        time of child processes (ffmpeg, render workers) reaped meanwhile,
+        and memory:
+        `process_peak_rss_mb` is the high-water mark of the whole process
+        since it started (and `children_peak_rss_mb` that of its largest
+        child), not of the stage; `peak_rss_growth_mb` is how much the stage
+        raised that high-water mark, 0 when it stayed below an earlier peak.
+        CPU time, children and memory are process wide, so stages running
+        concurrently share them.
+        """
+        self.result: Dict[str, Optional[float]] = {}
+
+    def __enter__(self) -> "StageProbe":
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._children = _children_cpu_seconds()
+        self._peak_rss = _maxrss_mb(resource.RUSAGE_SELF) if resource else None
+        return self
+
+    def __exit__(self, *exc_info):
+        children = _children_cpu_seconds()
+        peak_rss = _maxrss_mb(resource.RUSAGE_SELF) if resource else None
+        self.result = {
+            "wall_seconds": time.perf_counter() - self._wall,
+            "cpu_seconds": time.process_time() - self._cpu,
+            "children_cpu_seconds": children - self._children if children is not None else None,
+            "process_peak_rss_mb": peak_rss,
+            "peak_rss_growth_mb": peak_rss - self._peak_rss if peak_rss is not None else None,
+            "children_peak_rss_mb": _maxrss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+        }
+        return False
+
+
+class _PhaseTimer:
+    __slots__ = ("timings", "phase", "start")
+
+    def __init__(self, timings: "FrameTimings", phase: str):
+        self.timings = timings
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.phase, time.perf_counter() - self.start)
+        return False
+
+
+class FrameTimings:
+    def __init__(self):
+        """
+        Per-frame durations of the render phases (decode, detect, resize, compose, encode).
+
+        Samples are appended from any thread and summarised as percentiles.
+        """
+        self.samples: Dict[str, array] = {phase: array("d") for phase in FRAME_PHASES}
+
+    def phase(self, name: str) -> _PhaseTimer:
+        """
+        Context manager timing one occurrence of a phase.
+        """
+        return _PhaseTimer(self, name)
+
+    def add(self, phase: str, seconds: float):
+        self.samples[phase].append(seconds)
+
+    def merge(self, other: "FrameTimings"):
+        for phase, values in other.samples.items():
+            self.samples[phase].extend(values)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Count, total and mean/p50/p90/p99/max in milliseconds of every phase with samples.
+        """
+        summary = {}
+        for phase, values in self.samples.items():
+            if not values:
+                continue
+            ms = np.frombuffer(values, dtype=np.float64) * 1000.0
+            p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+            summary[phase] = {
+                "count": int(ms.size),
+                "total_seconds": round(float(ms.sum()) / 1000.0, 4),
+                "mean_ms": round(float(ms.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p90_ms": round(float(p90), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(ms.max()), 3),
+            }
+        return summary
+
+
+def build_report(project_name: str, stage_timings: Dict[str, Dict[str, Any]],
+                 frame_timings: Dict[str, Dict[str, Dict[str, float]]]) -> Dict:
+    """
+    Assemble the metrics report of one project run.
+
+    Args:
+        project_name: Project the run belongs to
+        stage_timings: StageGraph.timings of the run
+        frame_timings: FrameTimings summaries by stage name
+    """
+    return {
+        "project": project_name,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "stages": stage_timings,
+        "frames": frame_timings,
+    }
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(report: Dict, prefix: str = "autocontent") -> str:
+    """
+    Render a report in the Prometheus text exposition format (e.g. for a textfile collector).
+    """
+    project = _label(report["project"])
+    lines = []
+    stage_metrics = [
+        ("seconds", "stage_wall_seconds", "Wall-clock time of the stage"),
+        ("queued", "stage_queued_seconds", "Time the stage waited for its resource"),
+        ("cpu_seconds", "stage_cpu_seconds", "CPU time of the process (all threads) during the stage"),
+        ("children_cpu_seconds", "stage_children_cpu_seconds", "CPU time of child processes reaped during the stage"),
+        ("process_peak_rss_mb", "process_peak_rss_megabytes", "Peak resident set size of the process since it started, at the end of the stage"),
+        ("peak_rss_growth_mb", "stage_peak_rss_growth_megabytes", "Increase of the process peak resident set size during the stage"),
+    ]
+    for key, name, help_text in stage_metrics:
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} gauge")
+        for stage, timing in report["stages"].items():
+            if timing.get(key) is not None:
+                lines.append(f'{prefix}_{name}{{project="{project}",stage="{_label(stage)}"}} {timing[key]:.6f}')
+
+    name = f"{prefix}_frame_phase_milliseconds"
+    lines.append(f"# HELP {name} Per-frame duration of a render phase")
+    lines.append(f"# TYPE {name} summary")
+    for stage, phases in report["frames"].items():
+        for phase, stats in phases.items():
+            labels = f'project="{project}",stage="{_label(stage)}",phase="{phase}"'
+            for quantile in ("50", "90", "99"):
+                lines.append(f'{name}{{{labels},quantile="0.{quantile}"}} {stats[f"p{quantile}_ms"]}')
+            lines.append(f"{name}_sum{{{labels}}} {stats['total_seconds'] * 1000.0:.3f}")
+            lines.append(f"{name}_count{{{labels}}} {stats['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(project_folder: str, report: Dict, prometheus: bool = False) -> str:
+    """
+    Write metrics.json (and metrics.prom when `prometheus` is set) into the project folder.
+
+    Returns:
+        Path of the JSON report
+    """
+    path = os.path.join(project_folder, "metrics.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if prometheus:
+        with open(os.path.join(project_folder, "metrics.prom"), "w", encoding="utf-8") as f:
+            f.write(to_prometheus(report))
+    return path
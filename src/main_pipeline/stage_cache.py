@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def youtube_video_id(url: str) -> str:
+    """
+    Extract the 11-character video ID from a YouTube URL, or return the URL unchanged.
+    """
+    match = re.search(r"(?:v=|youtu\.be/|shorts/|embed/|live/)([\w-]{11})", url)
+    return match.group(1) if match else url
+
+
+def _link_or_copy(source: str, destination: str):
+    if os.path.abspath(source) == os.path.abspath(destination):
+        return
+    if os.path.exists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+class StageCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 50 * 1024 ** 3):
+        """
+        Content-addressed store for pipeline artifacts with LRU eviction.
+
+        Each artifact is stored under a key derived from the inputs and
+        parameters of the stage that produced it. Artifacts are hard-linked
+        (or copied, across filesystems) in and out of the cache, so evicting
+        an entry never removes a file from a project folder.
+
+        Args:
+            cache_dir: Folder holding the artifacts and the index
+            max_bytes: Total artifact size kept before least recently used entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries: Dict[str, Dict] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def make_key(stage: str, **params) -> str:
+        """
+        Build a cache key from a stage name and its JSON-serialisable parameters.
+        """
+        payload = json.dumps({"stage": stage, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _artifact_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def fetch(self, key: str, dest_dir: str, name: Optional[str] = None) -> Optional[str]:
+        """
+        Link a cached artifact into dest_dir, by default under its original file name.
+
+        Returns:
+            Path of the linked artifact, or None on a cache miss
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            artifact = self._artifact_path(key)
+            if not os.path.exists(artifact):
+                del self.entries[key]
+                self._save_index()
+                return None
+            entry["last_used"] = time.time()
+            self._save_index()
+            os.makedirs(dest_dir, exist_ok=True)
+            destination = os.path.join(dest_dir, name or entry["name"])
+            _link_or_copy(artifact, destination)
+            return destination
+
+    def store(self, key: str, path: str, stage: str = ""):
+        """
+        Add an artifact to the cache and evict old entries if over budget.
+        """
+        with self._lock:
+            artifact = self._artifact_path(key)
+            os.makedirs(os.path.dirname(artifact), exist_ok=True)
+            _link_or_copy(path, artifact)
+            self.entries[key] = {
+                "name": os.path.basename(path),
+                "stage": stage,
+                "size": os.path.getsize(artifact),
+                "last_used": time.time(),
+            }
+            self._evict(keep=key)
+            self._save_index()
+
+    def _evict(self, keep: str):
+        total = sum(entry["size"] for entry in self.entries.values())
+        for key in sorted(self.entries, key=lambda k: self.entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self.entries.pop(key)["size"]
+            artifact = self._artifact_path(key)
+            if os.path.exists(artifact):
+                os.remove(artifact)
+
+    def run(self, stage: str, key: str, dest_dir: str, produce: Callable[[], str],
+            output_path: Optional[str] = None) -> str:
+        """
+        Reuse the artifact for `key` or run `produce` and cache its output.
+
+        Args:
+            stage: Stage name, used for logging and bookkeeping
+            key: Cache key of the stage
+            dest_dir: Folder the artifact should appear in
+            produce: Callable that runs the stage and returns the artifact path;
+                it must raise when the stage fails
+            output_path: File that `produce` writes, if known. A cache hit is
+                linked to this path, and on a miss it is unlinked first so an
+                older cached artifact sharing its inode is never overwritten in place.
+                It is removed again if `produce` raises, so a partial file is
+                neither cached nor left for the next stage.
+
+        Returns:
+            Path of the artifact in dest_dir
+
+        Raises:
+            RuntimeError: If `produce` returned without writing a non-empty artifact
+        """
+        name = os.path.basename(output_path) if output_path else None
+        cached = self.fetch(key, dest_dir, name)
+        if cached:
+            print(f"  Reusing cached {stage}: {cached}")
+            return cached
+        if output_path and os.path.exists(output_path):
+            os.remove(output_path)
+        try:
+            path = produce()
+        except BaseException:
+            if output_path and os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+        if not path or not os.path.isfile(path) or os.path.getsize(path) == 0:
+            raise RuntimeError(f"Stage {stage} produced no artifact (got {path!r})")
+        self.store(key, path, stage)
+        return path
@@ -0,0 +1,180 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from main_pipeline.metrics import StageProbe
+
+
+class StageGraph:
+    def __init__(self, resources: Optional[Dict[str, threading.Semaphore]] = None):
+        """
+        Dependency graph of pipeline stages run on a thread pool.
+
+        Each stage is a callable that receives the results of all finished
+        stages (by name) and returns its own result. A stage is started as soon
+        as every stage it depends on has finished, so independent stages overlap.
+
+        Args:
+            resources: Named semaphores that stages can be bound to, e.g. to cap
+                concurrent downloads or renders across several graphs
+        """
+        self.resources = resources or {}
+        self.stages: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self.dependencies: Dict[str, List[str]] = {}
+        self.stage_resources: Dict[str, Optional[str]] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        # Extra measurements stages attach to the current run, e.g. frame timings.
+        self.metrics: Dict[str, Any] = {}
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Iterable[str] = (),
+            resource: Optional[str] = None):
+        """
+        Register a stage.
+
+        Args:
+            name: Unique stage name
+            func: Callable taking the results dict and returning the stage result
+            deps: Names of the stages that must finish first
+            resource: Name of a semaphore in `resources` held while the stage runs
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage already registered: {name}")
+        self.stages[name] = func
+        self.dependencies[name] = list(deps)
+        self.stage_resources[name] = resource
+
+    def _check(self):
+        for name, deps in self.dependencies.items():
+            for dep in deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage {name}")
+            visiting.add(name)
+            for dep in self.dependencies[name]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+        for name, resource in self.stage_resources.items():
+            if resource is not None and resource not in self.resources:
+                raise ValueError(f"Stage {name} uses unknown resource {resource}")
+
+    def run(self, max_workers: int = 4) -> Dict[str, Any]:
+        """
+        Run every stage, each as soon as its dependencies are done.
+
+        Returns:
+            Dict mapping stage names to their results
+
+        Raises:
+            Exception: The first exception raised by a stage. Stages not yet
+                started (including those waiting for a resource) are skipped,
+                and stages already running are waited for before it is raised
+        """
+        self._check()
+        results: Dict[str, Any] = {}
+        remaining = dict(self.dependencies)
+        origin = time.perf_counter()
+        self.timings = {}
+        self.metrics = {}
+        stopping = threading.Event()
+
+        def execute(name):
+            ready = time.perf_counter()
+            semaphore = self.resources.get(self.stage_resources[name])
+            if semaphore is not None:
+                semaphore.acquire()
+            if stopping.is_set():
+                # Another stage failed while this one was waiting for its resource.
+                if semaphore is not None:
+                    semaphore.release()
+                raise CancelledError(f"Stage {name} skipped after an earlier failure")
+            start = time.perf_counter()
+            probe = StageProbe()
+            try:
+                with probe:
+                    return self.stages[name](results)
+            except BaseException:
+                # Stop other stages from starting before the main loop sees the failure.
+                stopping.set()
+                raise
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+                end = time.perf_counter()
+                self.timings[name] = {
+                    "start": start - origin,
+                    "end": end - origin,
+                    "seconds": end - start,
+                    "queued": start - ready,
+                    "cpu_seconds": probe.result.get("cpu_seconds"),
+                    "children_cpu_seconds": probe.result.get("children_cpu_seconds"),
+                    "process_peak_rss_mb": probe.result.get("process_peak_rss_mb"),
+                    "peak_rss_growth_mb": probe.result.get("peak_rss_growth_mb"),
+                }
+
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        running = {}
+        try:
+            while remaining or running:
+                ready = [name for name, deps in remaining.items() if all(dep in results for dep in deps)]
+                for name in ready:
+                    del remaining[name]
+                    running[pool.submit(execute, name)] = name
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        raise error
+                    results[name] = future.result()
+        except BaseException:
+            stopping.set()
+            for future in running:
+                future.cancel()
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        pool.shutdown()
+        return results
+
+    def critical_path(self) -> List[str]:
+        """
+        Chain of stages that determined the total wall-clock time of the last run.
+        """
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n]["end"])
+        path = [name]
+        while self.dependencies[name]:
+            name = max(self.dependencies[name], key=lambda n: self.timings[n]["end"])
+            path.append(name)
+        return path[::-1]
+
+    def print_timings(self):
+        """
+        Print per-stage wall-clock and CPU timings and the critical path of the last run.
+        """
+        print("Stage timings:")
+        for name, timing in sorted(self.timings.items(), key=lambda item: item[1]["start"]):
+            queued = f", queued {timing['queued']:.2f}s" if timing.get("queued", 0) >= 0.01 else ""
+            cpu = ""
+            if timing.get("cpu_seconds") is not None:
+                cpu = f", cpu {timing['cpu_seconds']:.2f}s"
+                if timing.get("children_cpu_seconds"):
+                    cpu += f" + {timing['children_cpu_seconds']:.2f}s in subprocesses"
+            memory = ""
+            if timing.get("peak_rss_growth_mb"):
+                memory = f", peak RSS +{timing['peak_rss_growth_mb']:.0f} MB to {timing['process_peak_rss_mb']:.0f} MB"
+            print(f"  {name}: {timing['seconds']:.2f}s (started at {timing['start']:.2f}s{queued}{cpu}{memory})")
+        print(f"Critical path: {' -> '.join(self.critical_path())}")
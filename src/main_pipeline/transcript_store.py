@@ -0,0 +1,371 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SIDECAR_SUFFIX = ".columns"
+SIDECAR_VERSION = 1
+
+_STRUCTURE = re.compile(rb'["\[\]{}]')
+_STRING_END = re.compile(rb'["\\]')
+_NON_WS = re.compile(rb'\S')
+_SCALAR_END = re.compile(rb'[,\]}\s]')
+
+
+class _JsonStream:
+    def __init__(self, f, chunk_size: int = 1 << 20):
+        """
+        Minimal pull parser over a binary JSON file.
+
+        Values of interest are located by scanning for structural characters
+        and decoded one at a time, so only the current value is ever held in
+        memory; unwanted values are skipped without being decoded.
+        """
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.pos = 0
+        self.base = 0
+
+    def tell(self) -> int:
+        return self.base + self.pos
+
+    def seek(self, offset: int):
+        self.f.seek(offset)
+        self.buf = b""
+        self.pos = 0
+        self.base = offset
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.base += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> bytes:
+        """
+        Skip whitespace and return the next byte without consuming it (b"" at EOF).
+        """
+        while True:
+            match = _NON_WS.search(self.buf, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buf[self.pos:self.pos + 1]
+            self.pos = len(self.buf)
+            if not self._fill():
+                return b""
+
+    def expect(self, char: bytes):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.tell()}")
+        self.pos += 1
+
+    def _scan_value(self, keep: bool) -> bytes:
+        """
+        Consume the next JSON value and return its raw bytes when `keep` is set.
+        """
+        first = self.peek()
+        if not first:
+            raise ValueError("Unexpected end of JSON")
+        container = first in (b"[", b"{", b'"')
+        start = index = self.pos
+        pieces = []
+        depth = 0
+        in_string = False
+        while True:
+            if in_string:
+                match = _STRING_END.search(self.buf, index)
+            elif container:
+                match = _STRUCTURE.search(self.buf, index)
+            else:
+                match = _SCALAR_END.search(self.buf, index)
+            if match is None or (in_string and match.group() == b"\\" and match.end() >= len(self.buf)):
+                # Refill; a trailing backslash is kept so the escape is rescanned whole.
+                resume = len(self.buf) if match is None else match.start()
+                if keep:
+                    pieces.append(self.buf[start:resume])
+                self.pos = resume
+                if not self._fill():
+                    if not container:
+                        return b"".join(pieces)
+                    raise ValueError("Unexpected end of JSON")
+                start = index = 0
+                continue
+            if not container:
+                index = match.start()
+                break
+            char = match.group()
+            index = match.end()
+            if in_string:
+                if char == b"\\":
+                    index += 1
+                    continue
+                in_string = False
+                if depth == 0:
+                    break
+            elif char == b'"':
+                in_string = True
+            elif char in (b"[", b"{"):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    break
+        if keep:
+            pieces.append(self.buf[start:index])
+        self.pos = index
+        return b"".join(pieces)
+
+    def skip_value(self):
+        self._scan_value(keep=False)
+
+    def read_value(self):
+        return json.loads(self._scan_value(keep=True))
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """
+        Iterate the keys of the object at the cursor; the caller must consume each value.
+        """
+        self.expect(b"{")
+        if self.peek() == b"}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self.expect(b":")
+            yield key
+            if self.peek() == b",":
+                self.pos += 1
+                continue
+            self.expect(b"}")
+            return
+
+    def iter_array(self) -> Iterator[None]:
+        """
+        Iterate the elements of the array at the cursor; the caller must consume each element.
+        """
+        self.expect(b"[")
+        if self.peek() == b"]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            if self.peek() == b",":
+                self.pos += 1
+                continue
+            self.expect(b"]")
+            return
+
+
+class ColumnarTranscript:
+    def __init__(self, tokens: List[str], speakers: List[str], columns: Dict[str, np.ndarray]):
+        """
+        Compact, columnar view of an AssemblyAI transcript.
+
+        Words are stored as int32 arrays (start/end in ms, token id, speaker
+        id, utterance id) plus an interned token table; utterances as int32
+        start/end/speaker arrays and an offset into the word arrays.
+
+        Args:
+            tokens: Interned word texts, indexed by `word_token`
+            speakers: Speaker labels, indexed by `word_speaker`/`utterance_speaker`
+            columns: Arrays named word_start, word_end, word_token, word_speaker,
+                word_utterance, utterance_start, utterance_end, utterance_speaker
+                and utterance_word_offset (len(utterances) + 1 entries)
+        """
+        self.tokens = tokens
+        self.speakers = speakers
+        self.columns = columns
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    def __len__(self) -> int:
+        return len(self.columns["word_start"])
+
+    @property
+    def utterance_count(self) -> int:
+        return len(self.columns["utterance_start"])
+
+    def iter_words(self) -> Iterator[Tuple[str, int, int]]:
+        """
+        Yield (text, start_ms, end_ms) for every word.
+        """
+        tokens = self.tokens
+        for token, start, end in zip(self.word_token.tolist(), self.word_start.tolist(), self.word_end.tolist()):
+            yield tokens[token], start, end
+
+    def iter_utterances(self) -> Iterator[Dict]:
+        """
+        Yield utterances as dicts with speaker, start, end and text (words joined by spaces).
+        """
+        offsets = self.utterance_word_offset.tolist()
+        word_token = self.word_token
+        for i in range(self.utterance_count):
+            ids = word_token[offsets[i]:offsets[i + 1]].tolist()
+            yield {
+                "speaker": self.speakers[int(self.utterance_speaker[i])],
+                "start": int(self.utterance_start[i]),
+                "end": int(self.utterance_end[i]),
+                "text": " ".join(self.tokens[t] for t in ids),
+            }
+
+    @classmethod
+    def from_json_file(cls, path: str) -> "ColumnarTranscript":
+        """
+        Stream an AssemblyAI transcript JSON into columns.
+
+        Only one utterance (or word) is decoded at a time. The top-level
+        `words` array duplicates the words nested in the utterances, so it is
+        skipped and only read when the transcript has no utterances.
+        """
+        token_ids: Dict[str, int] = {}
+        speaker_ids: Dict[str, int] = {}
+        words = {name: array("i") for name in ("start", "end", "token", "speaker", "utterance")}
+        utterances = {name: array("i") for name in ("start", "end", "speaker", "word_offset")}
+
+        def intern(table: Dict[str, int], value) -> int:
+            value = "" if value is None else str(value)
+            if value not in table:
+                table[value] = len(table)
+            return table[value]
+
+        def add_word(word: Dict, utterance_index: int, default_speaker=None):
+            words["start"].append(int(word.get("start", 0)))
+            words["end"].append(int(word.get("end", 0)))
+            words["token"].append(intern(token_ids, word.get("text", "")))
+            words["speaker"].append(intern(speaker_ids, word.get("speaker", default_speaker)))
+            words["utterance"].append(utterance_index)
+
+        with open(path, "rb") as f:
+            stream = _JsonStream(f)
+            words_offset: Optional[int] = None
+            for key in stream.iter_object_keys():
+                if key == "utterances" and stream.peek() == b"[":
+                    for _ in stream.iter_array():
+                        utterance = stream.read_value()
+                        index = len(utterances["start"])
+                        speaker = utterance.get("speaker")
+                        utterances["start"].append(int(utterance.get("start", 0)))
+                        utterances["end"].append(int(utterance.get("end", 0)))
+                        utterances["speaker"].append(intern(speaker_ids, speaker))
+                        utterances["word_offset"].append(len(words["start"]))
+                        for word in utterance.get("words", []):
+                            add_word(word, index, speaker)
+                elif key == "words" and stream.peek() == b"[":
+                    words_offset = stream.tell()
+                    stream.skip_value()
+                else:
+                    stream.skip_value()
+
+            if not words["start"] and words_offset is not None:
+                stream.seek(words_offset)
+                utterances = {name: array("i") for name in utterances}
+                for _ in stream.iter_array():
+                    add_word(stream.read_value(), -1)
+
+        utterances["word_offset"].append(len(words["start"]))
+        columns = {f"word_{name}": np.frombuffer(values, dtype=np.int32).copy() if values else np.zeros(0, np.int32)
+                   for name, values in words.items()}
+        columns.update({
+            f"utterance_{name}": np.frombuffer(values, dtype=np.int32).copy() if values else np.zeros(0, np.int32)
+            for name, values in utterances.items()
+        })
+        return cls(list(token_ids), list(speaker_ids), columns)
+
+    def save(self, sidecar_dir: str, source_path: Optional[str] = None):
+        """
+        Write the columns as .npy files plus a meta.json into `sidecar_dir`.
+
+        The files are written to a private temporary directory that then
+        replaces `sidecar_dir`, so concurrent writers (two episodes loading
+        the same transcript) never leave a mix of both, and readers never
+        see a partial sidecar.
+        """
+        parent = os.path.dirname(os.path.abspath(sidecar_dir))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(sidecar_dir) + ".", suffix=".tmp", dir=parent)
+        try:
+            for name, values in self.columns.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(values, dtype=np.int32))
+            meta = {"version": SIDECAR_VERSION, "tokens": self.tokens, "speakers": self.speakers}
+            if source_path:
+                stat = os.stat(source_path)
+                meta["source"] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            if os.path.isdir(sidecar_dir):
+                # os.replace cannot overwrite a non-empty directory: move the stale one aside first.
+                stale_dir = tempfile.mkdtemp(prefix=os.path.basename(sidecar_dir) + ".", suffix=".old", dir=parent)
+                try:
+                    os.replace(sidecar_dir, os.path.join(stale_dir, "columns"))
+                except FileNotFoundError:
+                    pass  # another writer moved it first
+                shutil.rmtree(stale_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, sidecar_dir)
+            except OSError:
+                if not os.path.isdir(sidecar_dir):
+                    raise
+                # Another writer put an equivalent sidecar in place in the meantime.
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, sidecar_dir: str) -> "ColumnarTranscript":
+        """
+        Open a saved sidecar; the arrays are memory-mapped, not read.
+        """
+        with open(os.path.join(sidecar_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        columns = {
+            name[:-4]: np.load(os.path.join(sidecar_dir, name), mmap_mode="r")
+            for name in os.listdir(sidecar_dir) if name.endswith(".npy")
+        }
+        return cls(meta["tokens"], meta["speakers"], columns)
+
+
+def _sidecar_is_fresh(sidecar_dir: str, source_path: str) -> bool:
+    meta_path = os.path.join(sidecar_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    stat = os.stat(source_path)
+    return meta.get("version") == SIDECAR_VERSION and meta.get("source") == {
+        "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def load_transcript(path: str, use_sidecar: bool = True) -> ColumnarTranscript:
+    """
+    Load an AssemblyAI transcript in columnar form.
+
+    The first load streams the JSON and writes a `<path>.columns` sidecar;
+    later loads memory-map the sidecar as long as the JSON is unchanged.
+    A sidecar that a concurrent `save` swaps out while it is being opened
+    is looked up again, then rebuilt from the JSON.
+    """
+    sidecar_dir = path + SIDECAR_SUFFIX
+    for _ in range(2 if use_sidecar else 0):
+        try:
+            if not _sidecar_is_fresh(sidecar_dir, path):
+                break
+            return ColumnarTranscript.load(sidecar_dir)
+        except FileNotFoundError:
+            continue  # the directory was replaced between the freshness check and the reads
+    transcript = ColumnarTranscript.from_json_file(path)
+    if use_sidecar:
+        transcript.save(sidecar_dir, source_path=path)
+    return transcript
@@ -0,0 +1,194 @@
+import asyncio
+
+import pytest
+
+from main_pipeline import api_clients
+from main_pipeline.api_clients import (APIError, AssemblyAIClient, AsyncAPIClient, GeminiClient, HTTPConnectionPool,
+                                       HTTPResponse, RequestNotSentError, ResponseCache, TokenBucket)
+from main_pipeline.api_stub_server import start_stub_server
+
+
+@pytest.fixture
+def server():
+    server = start_stub_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_token_bucket_bursts_then_waits(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(api_clients.time, "monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=2.0, capacity=2.0)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    now[0] += 1.0
+    assert bucket.reserve() == pytest.approx(0.5)
+    now[0] += 10.0
+    # Idle time refills the bucket up to its capacity only.
+    assert bucket.reserve(2.0) == 0.0
+    assert bucket.reserve() == pytest.approx(0.5)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)
+
+
+def test_client_without_auth_headers_cannot_be_created():
+    class Incomplete(AsyncAPIClient):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("key", "http://127.0.0.1:1")
+
+
+def test_concurrent_identical_prompts_share_one_call(server, tmp_path):
+    async def run():
+        client = GeminiClient("dedupe-key", base_url=server.base_url, requests_per_minute=6000,
+                              cache=ResponseCache(str(tmp_path)))
+        try:
+            texts = await asyncio.gather(*(client.generate_text(prompt) for prompt in ["a", "b", "a", "a"]))
+            again = await client.generate_text("a")
+        finally:
+            await client.close()
+        return texts, again
+
+    texts, again = asyncio.run(run())
+    assert len(set(texts)) == 1 and again == texts[0]
+    assert server.calls["gemini"] == 2
+
+
+def test_transcribe_retries_rate_limited_posts(server, tmp_path):
+    server.error_every = 2
+    audio = tmp_path / "audio.flac"
+    audio.write_bytes(b"not really audio")
+
+    async def run():
+        client = AssemblyAIClient("retry-key", base_url=server.base_url, requests_per_minute=6000,
+                                  poll_interval=0.0, backoff=0.01)
+        try:
+            return await asyncio.gather(client.transcribe(str(audio)), client.transcribe(str(audio)))
+        finally:
+            await client.close()
+
+    first, second = asyncio.run(run())
+    assert first["status"] == "completed" and first is second
+    assert server.calls["transcript"] <= 2
+    assert len(server.transcripts) == 1
+
+
+class FailingPool:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    async def request(self, method, url, headers, body, body_path):
+        self.calls += 1
+        if isinstance(self.error, int):
+            return HTTPResponse(self.error, {}, b"{}")
+        raise self.error
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.parametrize("error, method, idempotent, attempts", [
+    (asyncio.TimeoutError(), "POST", None, 1),
+    (asyncio.TimeoutError(), "GET", None, 3),
+    (asyncio.TimeoutError(), "POST", True, 3),
+    (RequestNotSentError("refused"), "POST", None, 3),
+    (503, "POST", None, 1),
+    (503, "GET", None, 3),
+    (429, "POST", None, 3),
+    (404, "GET", None, 1),
+])
+def test_retry_policy(error, method, idempotent, attempts):
+    pool = FailingPool(error)
+    client = AssemblyAIClient("policy-key", base_url="http://127.0.0.1:1", requests_per_minute=6000,
+                              pool=pool, max_retries=2, backoff=0.0)
+    with pytest.raises((APIError, asyncio.TimeoutError, ConnectionError)):
+        asyncio.run(client.request(method, "/v2/transcript", {"audio_url": "x"} if method == "POST" else None,
+                                   idempotent=idempotent))
+    assert pool.calls == attempts
+
+
+def test_interim_responses_are_skipped():
+    replies = (b"HTTP/1.1 100 Continue\r\n\r\n"
+               b"HTTP/1.1 103 Early Hints\r\nLink: </style.css>\r\n\r\n"
+               b"HTTP/1.1 200 OK\r\nContent-Length: 12\r\n\r\n{\"ok\": true}")
+
+    async def run():
+        async def handle(reader, writer):
+            for _ in range(2):
+                await reader.readuntil(b"\r\n\r\n")
+                writer.write(replies)
+                await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        pool = HTTPConnectionPool()
+        try:
+            # The second request reuses the kept-alive connection, which must still be in sync.
+            return [await pool.request("GET", f"http://127.0.0.1:{port}/") for _ in range(2)]
+        finally:
+            await pool.close()
+            server.close()
+
+    responses = asyncio.run(run())
+    assert [(r.status, r.json()) for r in responses] == [(200, {"ok": True})] * 2
+
+
+def run_against(handle, requests):
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        pool = HTTPConnectionPool()
+        results = []
+        try:
+            for method in requests:
+                # Gives a close the server sent time to arrive, as between real requests.
+                await asyncio.sleep(0.05)
+                try:
+                    results.append((await pool.request(method, f"http://127.0.0.1:{port}/", body=b"{}")).status)
+                except ConnectionError as e:
+                    results.append(type(e))
+        finally:
+            await pool.close()
+            server.close()
+        return results
+
+    return asyncio.run(run())
+
+
+def test_idle_connection_closed_by_the_server_is_replaced():
+    received = []
+
+    async def handle(reader, writer):
+        # Answer one request per connection, then close it as if its keep-alive timed out.
+        received.append(await reader.readuntil(b"\r\n\r\n{}"))
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    assert run_against(handle, ["POST", "POST"]) == [200, 200]
+    assert len(received) == 2
+
+
+def test_connection_lost_after_the_write_is_not_resent():
+    received = []
+
+    async def handle(reader, writer):
+        # Keeps the connection, but drops it after reading the second request.
+        while True:
+            received.append(await reader.readuntil(b"\r\n\r\n{}"))
+            if len(received) == 2:
+                writer.close()
+                return
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+
+    results = run_against(handle, ["GET", "POST"])
+    assert results[0] == 200
+    assert issubclass(results[1], ConnectionError) and not issubclass(results[1], RequestNotSentError)
+    assert len(received) == 2
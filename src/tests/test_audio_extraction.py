@@ -0,0 +1,66 @@
+import subprocess
+
+import pytest
+
+import utils
+from utils import extract_audio_ranges, plan_audio_extraction
+
+
+@pytest.fixture
+def aac_stream(monkeypatch):
+    # ffprobe is not needed to know what the fixtures contain.
+    monkeypatch.setattr(utils, "probe_audio_stream", lambda path: {"codec_name": "aac"})
+
+
+def test_plan_audio_extraction_modes(monkeypatch):
+    streams = {"talk.mp4": {"codec_name": "aac"}, "talk.webm": {"codec_name": "opus"},
+               "talk.mkv": {"codec_name": "mp3"}, "silent.mp4": None}
+    monkeypatch.setattr(utils, "probe_audio_stream", streams.get)
+    assert plan_audio_extraction("talk.mp4", "copy") == (".m4a", ["-c:a", "copy"])
+    assert plan_audio_extraction("talk.webm", "copy") == (".webm", ["-c:a", "copy"])
+    assert plan_audio_extraction("talk.webm", "copy", accepted_codecs=("aac",))[0] == ".flac"
+    assert plan_audio_extraction("talk.mkv", "copy")[0] == ".flac"
+    assert plan_audio_extraction("talk.mp4", "asr", asr_format="wav") == (
+        ".wav", ["-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le"])
+    for args in [("talk.mp4", "lossless"), ("talk.mp4", "asr", ("aac",), "mp3"), ("silent.mp4",)]:
+        with pytest.raises(ValueError):
+            plan_audio_extraction(*args)
+
+
+def test_ranges_are_separate_inputs_and_outputs(monkeypatch, aac_stream, tmp_path):
+    commands = []
+    monkeypatch.setattr(utils, "run_ffmpeg", commands.append)
+    stale = tmp_path / "audio_1.flac"
+    stale.write_bytes(b"old")
+    linked = tmp_path / "cached.flac"
+    linked.hardlink_to(stale)
+    # Overlapping, adjacent, and starting before the track.
+    ranges = [(-2.0, 1.0), (0.5, 2.0), (2.0, 3.5)]
+    outputs = extract_audio_ranges("talk.mp4", str(tmp_path / "audio"), ranges)
+    assert outputs == [str(tmp_path / f"audio_{i}.flac") for i in range(3)]
+    [command] = commands
+    inputs = [command[i - 4:i + 2] for i, arg in enumerate(command) if arg == "-i"]
+    assert inputs == [["-ss", "0.000", "-to", "1.000", "-i", "talk.mp4"],
+                      ["-ss", "0.500", "-to", "2.000", "-i", "talk.mp4"],
+                      ["-ss", "2.000", "-to", "3.500", "-i", "talk.mp4"]]
+    assert [command[i + 1] for i, arg in enumerate(command) if arg == "-map"] == ["0:a:0", "1:a:0", "2:a:0"]
+    # The stale output was unlinked, not overwritten through the stage cache's hard link.
+    assert not stale.exists() and linked.read_bytes() == b"old"
+
+
+def decoded_seconds(path):
+    pcm = subprocess.run(["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1", "-ar", "16000", "-"],
+                         capture_output=True, check=True).stdout
+    return len(pcm) / 32000
+
+
+def test_extracted_ranges_round_trip(aac_stream, tmp_path):
+    source = str(tmp_path / "talk.m4a")
+    subprocess.run(["ffmpeg", "-y", "-v", "error", "-f", "lavfi", "-i", "sine=f=440:d=4", "-c:a", "aac", source],
+                   check=True)
+    ranges = [(-1.0, 1.0), (0.5, 2.0), (2.0, 3.0), (3.0, 9.0)]
+    outputs = extract_audio_ranges(source, str(tmp_path / "audio"), ranges)
+    # Clamped to the track at both ends; AAC priming adds a few ms at the end of the track.
+    assert [decoded_seconds(path) for path in outputs] == pytest.approx([1.0, 1.5, 1.0, 1.0], abs=0.03)
+    [whole] = extract_audio_ranges(source, str(tmp_path / "whole"), mode="copy")
+    assert whole.endswith(".m4a") and decoded_seconds(whole) == pytest.approx(4.0, abs=0.03)
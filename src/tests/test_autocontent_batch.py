@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from autocontent_batch import load_manifest
+
+EPISODE = {"link": "https://youtu.be/aaaaaaaaaaa", "project_name": "ep1",
+           "viral_segments_file": "segments.json", "audio_transcript_file": "transcript.json"}
+
+
+def write_manifest(tmp_path, *episodes):
+    path = tmp_path / "manifest.jsonl"
+    path.write_text("".join(json.dumps(episode) + "\n" for episode in episodes))
+    return str(path)
+
+
+def test_loads_required_and_optional_fields(tmp_path):
+    episodes = load_manifest(write_manifest(tmp_path, {**EPISODE, "similarity_threshold": "0.7"}, EPISODE))
+    assert episodes[0]["similarity_threshold"] == 0.7
+    assert "similarity_threshold" not in episodes[1]
+
+
+def test_csv_manifest(tmp_path):
+    path = tmp_path / "manifest.csv"
+    path.write_text(",".join(EPISODE) + "\n" + ",".join(EPISODE.values()) + "\n")
+    assert load_manifest(str(path)) == [EPISODE]
+
+
+@pytest.mark.parametrize("episode", [
+    {**EPISODE, "cache_dir": "/"},
+    {**EPISODE, "no_cache": True},
+    {**EPISODE, "project_name": "../outside"},
+    {key: value for key, value in EPISODE.items() if key != "link"},
+])
+def test_rejects_invalid_entries(tmp_path, episode):
+    with pytest.raises(ValueError):
+        load_manifest(write_manifest(tmp_path, episode))
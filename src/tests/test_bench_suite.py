@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from benchmarks.bench_suite import DEFAULT_CASCADE, check_fixtures, compare_to_baseline
+
+REPO_CASCADE = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "cascade.xml")
+SPEC = {"width": 320, "height": 180, "fps": 10, "seconds": 1, "faces": 2}
+
+
+def options(tmp_path, cascade):
+    return {"fixtures_dir": str(tmp_path), "cascade": cascade, "frames": 10, "min_detection_rate": 0.9}
+
+
+def test_fixtures_are_detected_by_the_default_cascade(tmp_path):
+    assert check_fixtures([SPEC], options(tmp_path, DEFAULT_CASCADE)) == {"320x180_10fps_1s_2faces": 1.0}
+
+
+def test_fixtures_the_cascade_misses_are_rejected(tmp_path):
+    # The repo's cascade.xml detects cat faces.
+    with pytest.raises(RuntimeError, match="detects a face in"):
+        check_fixtures([SPEC], options(tmp_path, REPO_CASCADE))
+
+
+def test_compare_to_baseline_flags_regressions_only():
+    baseline = {
+        "render/a": {"frames_per_sec": 100.0, "process_peak_rss_mb": 200.0},
+        "matcher": {"snippets_per_sec": 50.0, "process_peak_rss_mb": 100.0},
+    }
+    results = {
+        "render/a": {"frames_per_sec": 79.0, "process_peak_rss_mb": 210.0},
+        "matcher": {"snippets_per_sec": 45.0, "process_peak_rss_mb": 130.0},
+        "new_case": {"frames_per_sec": 1.0},
+    }
+    regressions = compare_to_baseline(results, baseline, 0.2)
+    assert regressions == [
+        "render/a frames_per_sec: 100.0 -> 79.0 (-21.0%)",
+        "matcher process_peak_rss_mb: 100.0 -> 130.0 (+30.0%)",
+    ]
@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+import pytest
+
+from video_editor.face_detectors import FaceDetector, HaarFaceDetector, create_face_detector
+
+
+class FixedDetector(FaceDetector):
+    name = "fixed"
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frame, scale=1.0):
+        self.calls += 1
+        return [(0, 0, frame.shape[1], frame.shape[0])]
+
+    def settings(self):
+        return {}
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        FaceDetector()
+
+    class MissingSettings(FaceDetector):
+        def detect(self, frame, scale=1.0):
+            return []
+
+    with pytest.raises(TypeError):
+        MissingSettings()
+
+
+def test_default_batch_loops_over_detect():
+    detector = FixedDetector()
+    frames = [np.zeros((10, 20, 3), np.uint8), np.zeros((30, 40, 3), np.uint8)]
+    assert detector.detect_batch(frames) == [[(0, 0, 20, 10)], [(0, 0, 40, 30)]]
+    assert detector.calls == 2
+    assert not detector.batched
+
+
+def test_haar_backend():
+    cascade = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+    detector = create_face_detector("haar", cascade_path=cascade)
+    assert isinstance(detector, HaarFaceDetector)
+    blank = np.zeros((120, 160, 3), np.uint8)
+    assert detector.detect(blank, 0.5) == []
+    assert detector.detect_batch([blank, blank]) == [[], []]
+    assert detector.settings()["cascade_path"] == cascade
+    with pytest.raises(ValueError):
+        create_face_detector("haar", cascade_path="missing.xml")
+    with pytest.raises(ValueError):
+        create_face_detector("unknown")
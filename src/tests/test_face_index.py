@@ -0,0 +1,88 @@
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.fixtures import make_talking_head_video
+from video_editor.face_index import FaceTrackIndex, IndexTracker, build_face_index, load_or_build_face_index
+from video_editor.face_tracking import FaceTracker
+from video_editor.vertical_video import VerticalVideoCreator
+
+CASCADE = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    # Two faces: frames with detections and frames between detections.
+    path = str(tmp_path_factory.mktemp("face_index") / "source.mp4")
+    return make_talking_head_video(path, 320, 180, 15, 3.0, faces=2)
+
+
+def live_tracking(creator, path):
+    cap = cv2.VideoCapture(path)
+    tracker = creator.create_face_tracker()
+    faces = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        faces.append(creator.track_face(frame, tracker, len(faces)))
+    cap.release()
+    return faces
+
+
+def test_index_replay_matches_live_tracking(source):
+    creator = VerticalVideoCreator(CASCADE, detect_interval=4)
+    expected = live_tracking(creator, source)
+    assert any(face for face, _ in expected)
+
+    index = build_face_index(creator, source)
+    assert index.meta["total_frames"] == len(expected)
+    replay = IndexTracker(index, creator.create_face_tracker(), interpolate=False)
+    assert [(replay.face_for_frame(i), replay.detected) for i in range(len(expected))] == expected
+
+
+def test_index_round_trip(source, tmp_path):
+    creator = VerticalVideoCreator(CASCADE, detect_interval=4)
+    path = str(tmp_path / "index.npz")
+    built = load_or_build_face_index(creator, source, path)
+    loaded = FaceTrackIndex.load(path)
+    for name in ("detected_frames", "box_offsets", "boxes", "shot_boundaries"):
+        assert np.array_equal(getattr(loaded, name), getattr(built, name))
+    assert loaded.meta == built.meta
+    frame = int(built.detected_frames[0])
+    assert loaded.faces_at(frame) == built.faces_at(frame)
+    assert loaded.faces_at(frame + 1) is None
+
+
+def sparse_index(shot_boundaries=()):
+    # Detections every 10 frames; the face moves right and down between them.
+    frames = [0, 10, 20]
+    boxes = [(0, 0, 40, 40), (20, 10, 40, 40), (20, 10, 40, 40)]
+    return FaceTrackIndex(frames, [0, 1, 2, 3], boxes, list(shot_boundaries), {"fps": 10, "total_frames": 25})
+
+
+def test_replay_interpolates_between_detections():
+    replay = IndexTracker(sparse_index(), FaceTracker(smoothing=0.0))
+    boxes = [replay.face_for_frame(i) for i in range(25)]
+    assert boxes[5] == (10, 5, 40, 40)
+    assert [box[0] for box in boxes[:11]] == [0, 2, 4, 6, 8, 10, 12, 14, 16, 18, 20]
+    # Past the last detection the box holds.
+    assert boxes[20:] == [(20, 10, 40, 40)] * 5
+    held = IndexTracker(sparse_index(), FaceTracker(smoothing=0.0), interpolate=False)
+    assert [held.face_for_frame(i) for i in range(10)] == [(0, 0, 40, 40)] * 10
+
+
+def test_replay_does_not_interpolate_across_shots_or_faces():
+    replay = IndexTracker(sparse_index(shot_boundaries=[10]), FaceTracker(smoothing=0.0))
+    assert [replay.face_for_frame(i) for i in range(11)] == [(0, 0, 40, 40)] * 10 + [(20, 10, 40, 40)]
+    other_face = FaceTrackIndex([0, 10], [0, 1, 2], [(0, 0, 40, 40), (200, 0, 40, 40)], [],
+                                {"fps": 10, "total_frames": 11})
+    replay = IndexTracker(other_face, FaceTracker(smoothing=0.0))
+    assert [replay.face_for_frame(i) for i in range(10)] == [(0, 0, 40, 40)] * 10
+
+
+
+def test_replay_after_a_seek_interpolates_from_the_nearest_detection():
+    replay = IndexTracker(sparse_index(), FaceTracker(smoothing=0.0))
+    # Frame 5 starts from the detection at frame 0, then moves towards the one at frame 10.
+    assert [replay.face_for_frame(i) for i in (5, 6, 10)] == [(0, 0, 40, 40), (4, 2, 40, 40), (20, 10, 40, 40)]
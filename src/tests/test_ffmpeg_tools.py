@@ -0,0 +1,27 @@
+import json
+
+from video_editor import ffmpeg_tools
+
+
+def test_probe_keyframes_is_relative_to_the_stream_start(monkeypatch):
+    probe = {
+        "packets": [
+            {"pts_time": "1.400000", "flags": "K__"},
+            {"pts_time": "1.433333", "flags": "___"},
+            {"pts_time": "3.400000", "flags": "K__"},
+            {"pts_time": "N/A", "flags": "K__"},
+            {"pts_time": "2.400000", "flags": "K_"},
+        ],
+        "streams": [{"start_time": "1.400000"}],
+    }
+    commands = []
+    monkeypatch.setattr(ffmpeg_tools, "run_ffmpeg", lambda command: commands.append(command) or json.dumps(probe))
+    assert ffmpeg_tools.probe_keyframes("video.ts") == [0.0, 1.0, 2.0]
+    assert commands[0][0] == "ffprobe" and commands[0][-1] == "video.ts"
+
+
+def test_probe_keyframes_without_start_time(monkeypatch):
+    probe = {"packets": [{"pts_time": "0.000000", "flags": "K_"}, {"pts_time": "2.0", "flags": "K_"}],
+             "streams": [{}]}
+    monkeypatch.setattr(ffmpeg_tools, "run_ffmpeg", lambda command: json.dumps(probe))
+    assert ffmpeg_tools.probe_keyframes("video.mp4") == [0.0, 2.0]
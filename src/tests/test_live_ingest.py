@@ -0,0 +1,57 @@
+from main_pipeline.live_ingest import LiveIngest, PartialTranscript
+
+
+def word(text, start, end):
+    return {"text": text, "start": start, "end": end}
+
+
+def window(words):
+    return {"words": words, "utterances": [{"speaker": "A", "start": words[0]["start"], "end": words[-1]["end"],
+                                            "text": " ".join(w["text"] for w in words), "words": words}]}
+
+
+def test_windows_without_overlap_are_appended():
+    transcript = PartialTranscript()
+    transcript.add_window(window([word("one", 0, 400), word("two", 500, 900)]), 0.0, 1.0)
+    transcript.add_window(window([word("three", 100, 600)]), 1.0, 2.0)
+    assert [(w["text"], w["start"]) for w in transcript.words] == [("one", 0), ("two", 500), ("three", 1100)]
+    assert [u["start"] for u in transcript.utterances] == [0, 1100]
+    assert transcript.end_seconds == 2.0
+
+
+def test_overlapping_windows_keep_each_word_once():
+    transcript = PartialTranscript(overlap=2.0)
+    # The first window cuts "boundary" short at 10 s; the second one starts at 8 s and hears it whole.
+    transcript.add_window(window([word("before", 7000, 7600), word("near", 8200, 8700),
+                                  word("boundary", 9600, 10000)]), 0.0, 10.0)
+    transcript.add_window(window([word("near", 210, 690), word("boundary", 1600, 2300),
+                                  word("after", 2500, 3000)]), 8.0, 20.0)
+    assert [(w["text"], w["start"], w["end"]) for w in transcript.words] == [
+        ("before", 7000, 7600), ("near", 8200, 8700), ("boundary", 9600, 10300), ("after", 10500, 11000),
+    ]
+    first, second = transcript.utterances
+    assert first["text"] == "before near" and first["end"] == 8700
+    assert second["text"] == "boundary after" and second["start"] == 9600
+
+
+def test_stable_words_exclude_the_next_overlap():
+    transcript = PartialTranscript(overlap=2.0)
+    transcript.add_window(window([word("a", 1000, 1200), word("b", 7900, 8100), word("c", 9000, 9500)]), 0.0, 10.0)
+    assert transcript.stable_word_count() == 2
+    assert transcript.stable_word_count(final=True) == 3
+
+
+def test_live_matching_across_a_window_edge(tmp_path):
+    segments = {"viral_segments": [{"transcript": "the quick brown fox jumps"}, {"transcript": "never said"}]}
+    ingest = LiveIngest(None, segments, None, None, str(tmp_path), overlap=2.0, settle=1.0)
+    ingest.transcript.add_window(window([word("the", 7000, 7300), word("quick", 7400, 7800),
+                                         word("brown", 8500, 8900), word("fo", 9700, 10000)]), 0.0, 10.0)
+    ingest._match(final=False)
+    assert ingest.accepted == {}
+    ingest.transcript.add_window(window([word("brown", 500, 900), word("fox", 1700, 2100),
+                                         word("jumps", 2200, 2600), word("later", 6500, 6900)]), 8.0, 16.0)
+    ingest._match(final=False)
+    assert ingest.accepted == {0: {"segment": 1, "start_time": 7.0, "end_time": 10.6}}
+    assert ingest.matcher.tokens == ["the", "quick", "brown", "fox", "jumps"]
+    ingest._match(final=True)
+    assert ingest.matcher.tokens[-1] == "later" and 1 not in ingest.accepted
@@ -0,0 +1,58 @@
+import threading
+import time
+
+import numpy as np
+
+from main_pipeline.metrics import FrameTimings, StageProbe, build_report, to_prometheus
+
+
+def test_stage_probe_reports_process_peak_and_stage_growth():
+    with StageProbe() as probe:
+        block = np.ones(64 * 1024 * 1024, dtype=np.uint8)  # 64 MB, touched
+        assert block.sum() == block.size
+    assert probe.result["process_peak_rss_mb"] > 0
+    assert probe.result["peak_rss_growth_mb"] >= 0
+
+    # A stage that stays below the earlier peak does not inherit it as growth.
+    del block
+    with StageProbe() as small:
+        pass
+    assert small.result["peak_rss_growth_mb"] == 0
+    assert small.result["process_peak_rss_mb"] >= probe.result["process_peak_rss_mb"]
+
+
+def test_stage_probe_counts_cpu_of_worker_threads():
+    def spin():
+        deadline = time.perf_counter() + 0.3
+        while time.perf_counter() < deadline:
+            pass
+
+    with StageProbe() as probe:
+        worker = threading.Thread(target=spin)
+        worker.start()
+        worker.join()
+    assert probe.result["cpu_seconds"] >= 0.2
+
+
+def test_frame_timings_summary():
+    timings = FrameTimings()
+    for ms in range(1, 101):
+        timings.add("decode", ms / 1000.0)
+    summary = timings.summary()
+    assert set(summary) == {"decode"}
+    assert summary["decode"]["count"] == 100
+    assert summary["decode"]["max_ms"] == 100.0
+    assert 50.0 <= summary["decode"]["p50_ms"] <= 51.0
+
+
+def test_prometheus_export():
+    timings = FrameTimings()
+    timings.add("encode", 0.01)
+    report = build_report("demo", {"vertical": {"seconds": 1.5, "process_peak_rss_mb": 300.0,
+                                                "peak_rss_growth_mb": 12.0}},
+                          {"vertical": timings.summary()})
+    text = to_prometheus(report)
+    assert 'autocontent_stage_wall_seconds{project="demo",stage="vertical"} 1.500000' in text
+    assert 'autocontent_process_peak_rss_megabytes{project="demo",stage="vertical"} 300.000000' in text
+    assert 'autocontent_stage_peak_rss_growth_megabytes{project="demo",stage="vertical"} 12.000000' in text
+    assert 'autocontent_frame_phase_milliseconds_count{project="demo",stage="vertical",phase="encode"} 1' in text
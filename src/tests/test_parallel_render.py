@@ -0,0 +1,63 @@
+import hashlib
+import subprocess
+
+import cv2
+import pytest
+
+from benchmarks.fixtures import make_talking_head_video
+from video_editor import vertical_video
+from video_editor.vertical_video import VerticalVideoCreator, plan_chunks
+
+CASCADE = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+FPS = 15
+GOP = 10
+
+
+def frame_hashes(path):
+    cap = cv2.VideoCapture(path)
+    hashes = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        hashes.append(hashlib.md5(frame.tobytes()).hexdigest())
+    cap.release()
+    return hashes
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("parallel")
+    raw = make_talking_head_video(str(folder / "raw.mp4"), 320, 180, FPS, 4.0, faces=2)
+    path = str(folder / "source.mp4")
+    # A keyframe every GOP frames, so chunks can start on any multiple of it.
+    subprocess.run(["ffmpeg", "-y", "-v", "error", "-i", raw, "-c:v", "libx264", "-preset", "ultrafast",
+                    "-g", str(GOP), "-keyint_min", str(GOP), "-sc_threshold", "0", "-bf", "0", path], check=True)
+    return path
+
+
+def creator(**options):
+    # Lossless output, so serial and chunked encodes decode to the same pixels.
+    return VerticalVideoCreator(CASCADE, writer_backend="ffmpeg", crf=0, preset="ultrafast", keep_audio=False,
+                                detect_interval=4, **options)
+
+
+def test_plan_chunks():
+    assert plan_chunks([0, 10, 20, 30, 40, 50], 60, 3) == [(0, 20), (20, 40), (40, 60)]
+    assert plan_chunks([0, 10, 20, 30, 40, 50], 60, 1) == [(0, 60)]
+    # Few keyframes: fewer, uneven chunks rather than splits inside a GOP.
+    assert plan_chunks([0, 50], 60, 4) == [(0, 50), (50, 60)]
+    assert plan_chunks([], 60, 4) == [(0, 60)]
+    assert plan_chunks([0, 10, 60, 70], 60, 2) == [(0, 10), (10, 60)]
+
+
+def test_parallel_matches_serial(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(vertical_video, "probe_keyframes", lambda path: [i / FPS for i in range(0, 60, GOP)])
+    serial, parallel = creator(), creator()
+    assert serial.convert_video_to_vertical(source, str(tmp_path / "serial.mp4"), 180, 320)
+    assert parallel.convert_video_to_vertical(source, str(tmp_path / "parallel.mp4"), 180, 320, workers=3)
+
+    assert parallel.crop_trajectory == serial.crop_trajectory
+    hashes = frame_hashes(str(tmp_path / "serial.mp4"))
+    assert len(hashes) == 60
+    assert frame_hashes(str(tmp_path / "parallel.mp4")) == hashes
@@ -0,0 +1,55 @@
+import hashlib
+
+import cv2
+import pytest
+
+from benchmarks.fixtures import make_talking_head_video
+from video_editor.vertical_video import VerticalVideoCreator, parse_layouts
+
+CASCADE = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+
+def frame_hashes(path):
+    cap = cv2.VideoCapture(path)
+    hashes = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        hashes.append(hashlib.md5(frame.tobytes()).hexdigest())
+    cap.release()
+    return hashes
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("layouts") / "source.mp4")
+    return make_talking_head_video(path, 320, 180, 15, 2.0, faces=2)
+
+
+def test_parse_layouts():
+    assert parse_layouts("9:16, 1:1,640x360") == {"9:16": (720, 1280), "1:1": (720, 720), "640x360": (640, 360)}
+    assert list(parse_layouts("4:5,9:16")) == ["4:5", "9:16"]
+    for spec in ("", "3:2", "641x360", "0x100", "abc"):
+        with pytest.raises(ValueError):
+            parse_layouts(spec)
+
+
+def test_layouts_match_separate_renders(source, tmp_path):
+    layouts = {"9:16": (180, 320), "1:1": (180, 180)}
+    clips = [(0.2, 1.0), (0.6, 1.6)]
+    creator = VerticalVideoCreator(CASCADE, writer_backend="opencv")
+
+    together = {name: [str(tmp_path / f"together_{size[1]}_{i}.mp4") for i in range(len(clips))]
+                for name, size in layouts.items()}
+    assert creator.render_layouts(source, layouts, together, clips=clips)
+    trajectory = creator.crop_trajectory
+
+    for name, (width, height) in layouts.items():
+        separate = [str(tmp_path / f"separate_{height}_{i}.mp4") for i in range(len(clips))]
+        assert creator.render_clips(source, clips, separate, width, height)
+        for together_path, separate_path in zip(together[name], separate):
+            hashes = frame_hashes(together_path)
+            assert hashes and hashes == frame_hashes(separate_path)
+        if name == "9:16":
+            assert creator.crop_trajectory == trajectory
@@ -0,0 +1,108 @@
+import argparse
+import os
+
+import pytest
+
+import autocontent
+import utils
+from autocontent import CreatorPool, add_pipeline_arguments, build_pipeline
+from utils import youtube_section_downloader
+from video_editor.vertical_video import VerticalVideoCreator
+
+REPO_CASCADE = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "cascade.xml")
+
+
+class FakeYoutubeDL:
+    """
+    Records the options and "downloads" every requested range as an empty file.
+    """
+    instances = []
+
+    def __init__(self, options):
+        self.options = options
+        self.urls = []
+        self.skip = set()
+        FakeYoutubeDL.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def download(self, urls):
+        self.urls.extend(urls)
+        for section in self.options["download_ranges"]({}, self):
+            if section["start_time"] in self.skip:
+                continue
+            path = self.options["outtmpl"].replace("%(title)s", "episode") % {
+                "section_start": section["start_time"], "section_end": section["end_time"], "ext": "mp4"}
+            open(path, "wb").close()
+            for hook in self.options["postprocessor_hooks"]:
+                hook({"status": "finished", "postprocessor": "MoveFiles",
+                      "info_dict": {"filepath": path, "section_start": section["start_time"]}})
+
+
+@pytest.fixture
+def fake_ytdl(monkeypatch):
+    FakeYoutubeDL.instances = []
+    monkeypatch.setattr(utils.yt_dlp, "YoutubeDL", FakeYoutubeDL)
+    return FakeYoutubeDL.instances
+
+
+def test_section_downloader_requests_merged_ranges_cut_at_keyframes(fake_ytdl, tmp_path):
+    sections = youtube_section_downloader("https://youtu.be/x", str(tmp_path), [(30.0, 40.0), (1.0, 5.0), (6.0, 8.0)],
+                                          margin=1.5, max_height=720)
+    [ydl] = fake_ytdl
+    assert ydl.urls == ["https://youtu.be/x"]
+    assert ydl.options["force_keyframes_at_cuts"] is True
+    assert ydl.options["format"] == utils.download_format(720)
+    # Margins are added, then overlapping ranges merged; a margin never reaches before 0.
+    assert list(ydl.options["download_ranges"]({}, ydl)) == [
+        {"start_time": 0.0, "end_time": 9.5}, {"start_time": 28.5, "end_time": 41.5},
+    ]
+    assert [(s["start"], s["end"], os.path.basename(s["path"])) for s in sections] == [
+        (0.0, 9.5, "episode.0.0-9.5.mp4"), (28.5, 41.5, "episode.28.5-41.5.mp4"),
+    ]
+
+
+def test_section_downloader_reports_missing_sections(monkeypatch, tmp_path):
+    class Incomplete(FakeYoutubeDL):
+        def __init__(self, options):
+            super().__init__(options)
+            self.skip = {28.5}
+
+    monkeypatch.setattr(utils.yt_dlp, "YoutubeDL", Incomplete)
+    with pytest.raises(RuntimeError, match="28.5-41.5"):
+        youtube_section_downloader("https://youtu.be/x", str(tmp_path), [(1.0, 5.0), (30.0, 40.0)], margin=1.5)
+
+
+def test_clips_are_rendered_at_section_relative_times(monkeypatch, fake_ytdl, tmp_path):
+    timestamps = [{"segment": 1, "start_time": 10.0, "end_time": 15.0},
+                  {"segment": 2, "start_time": 13.0, "end_time": 20.0},
+                  {"segment": 3, "start_time": 60.0, "end_time": 65.0}]
+    monkeypatch.setattr(autocontent, "load_and_match_from_files", lambda **kwargs: timestamps)
+    renders = []
+
+    def render_clips(self, input_path, clips, output_paths, **params):
+        renders.append((os.path.basename(input_path), clips, [os.path.basename(p) for p in output_paths]))
+        for path in output_paths:
+            open(path, "wb").close()
+        return True
+
+    monkeypatch.setattr(VerticalVideoCreator, "render_clips", render_clips)
+    parser = argparse.ArgumentParser()
+    add_pipeline_arguments(parser)
+    args = parser.parse_args(["--clips_only", "--download_sections", "--section_margin", "1.0",
+                              "--face_cascade_path", REPO_CASCADE])
+    args.link = "https://youtu.be/aaaaaaaaaaa"
+    args.viral_segments_file = args.audio_transcript_file = None
+
+    results = build_pipeline(args, str(tmp_path), CreatorPool(args), cache=None).run(max_workers=1)
+
+    assert [(s["start"], s["end"]) for s in results["download"]] == [(9.0, 21.0), (59.0, 66.0)]
+    assert renders == [
+        ("episode.9.0-21.0.mp4", [(1.0, 6.0), (4.0, 11.0)], ["clip_1.mp4", "clip_2.mp4"]),
+        ("episode.59.0-66.0.mp4", [(1.0, 6.0)], ["clip_3.mp4"]),
+    ]
+    assert "audio" not in results
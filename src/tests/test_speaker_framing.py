@@ -0,0 +1,123 @@
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from main_pipeline.transcript_store import ColumnarTranscript
+from video_editor.speaker_framing import SpeakerFraming, SpeakerTimeline, SpeakerTracker, calibrate_speaker_faces
+
+LEFT = (10, 30, 50, 50)
+RIGHT = (100, 30, 50, 50)
+FPS = 10
+
+
+def timeline(offset=0.0):
+    # A talks for 4 s, B for 4 s, then A again after a one second pause.
+    ms = int(offset * 1000)
+    return SpeakerTimeline([ms, ms + 4000, ms + 9000], [ms + 4000, ms + 8000, ms + 12000], ["A", "B", "A"])
+
+
+def write_video(path, seconds, draw):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, (160, 120))
+    rng = np.random.default_rng(0)
+    for index in range(seconds * FPS):
+        frame = np.full((120, 160, 3), 90, np.uint8)
+        draw(frame, index / FPS, rng)
+        writer.write(frame)
+    writer.release()
+
+
+def test_timeline_speaker_at_and_utterances():
+    speakers = timeline()
+    assert speakers.speaker_at(-1.0) is None
+    assert speakers.speaker_at(0.0) == "A"
+    assert speakers.speaker_at(3.999) == "A"
+    assert speakers.speaker_at(4.0) == "B"
+    # The pause keeps the previous speaker.
+    assert speakers.speaker_at(8.5) == "B"
+    assert speakers.speaker_at(9.0) == "A"
+    assert speakers.utterances("A") == [(0.0, 4.0), (9.0, 12.0)]
+    with pytest.raises(ValueError):
+        SpeakerTimeline([0], [1000, 2000], ["A"])
+
+
+def test_timeline_from_columnar_transcript(tmp_path):
+    utterances = [{"speaker": speaker, "start": start, "end": end, "text": "hello there",
+                   "words": [{"text": "hello", "start": start, "end": start + 300},
+                             {"text": "there", "start": start + 400, "end": end}]}
+                  for speaker, start, end in [("A", 0, 4000), ("B", 4000, 8000), ("A", 9000, 12000)]]
+    path = tmp_path / "transcript.json"
+    path.write_text(json.dumps({"utterances": utterances}), encoding="utf-8")
+    speakers = SpeakerTimeline.from_transcript(ColumnarTranscript.from_json_file(str(path)))
+    assert (speakers.starts_ms, speakers.ends_ms, speakers.speakers) == (
+        timeline().starts_ms, timeline().ends_ms, timeline().speakers)
+
+
+def test_tracker_switches_crops_at_utterance_boundaries():
+    framing = SpeakerFraming(timeline(), {"A": LEFT, "B": RIGHT})
+    tracker = SpeakerTracker(framing, FPS)
+    assert [tracker.face_for_frame(i) for i in (0, 39, 40, 79, 85, 90)] == [LEFT, LEFT, RIGHT, RIGHT, RIGHT, LEFT]
+
+
+def test_shifted_framing_follows_the_episode_clock():
+    framing = SpeakerFraming(timeline(), {"A": LEFT, "B": RIGHT})
+    # A clip downloaded from 3.5 s: its frame 5 is at 4.0 s in the episode.
+    tracker = SpeakerTracker(framing.shifted(3.5), FPS)
+    assert [tracker.face_for_frame(i) for i in (0, 4, 5, 54, 55)] == [LEFT, LEFT, RIGHT, RIGHT, LEFT]
+    assert framing.face_at(4.0) == RIGHT and framing.time_offset == 0.0
+
+
+def test_tracker_keeps_the_last_box_for_speakers_without_a_face():
+    speakers = SpeakerTimeline([1000, 2000, 3000], [2000, 3000, 4000], ["A", "C", "B"])
+    tracker = SpeakerTracker(SpeakerFraming(speakers, {"A": LEFT, "B": RIGHT}), FPS)
+    assert [tracker.face_for_frame(i) for i in (0, 10, 25, 30)] == [None, LEFT, LEFT, RIGHT]
+    tracker.reset()
+    assert tracker.face_for_frame(25) is None
+
+
+def cut_detector(frames, scale):
+    # The camera shows one face at a time; a bright frame corner marks the right-hand one.
+    return [[RIGHT] if frame[:8, :8].mean() > 128 else [LEFT] for frame in frames]
+
+
+def test_calibration_follows_camera_cuts_in_a_shifted_source(tmp_path):
+    path = str(tmp_path / "cuts.avi")
+    offset = 20.0
+
+    def draw(frame, seconds, rng):
+        if timeline().speaker_at(seconds) == "B":
+            frame[:8, :8] = 255
+
+    write_video(path, 12, draw)
+    sources = [{"path": path, "start": offset, "end": offset + 12.0}]
+    faces = calibrate_speaker_faces(sources, timeline(offset), cut_detector, samples_per_speaker=2)
+    assert faces == {"A": LEFT, "B": RIGHT}
+
+
+def two_shot_detector(frames, scale):
+    return [[LEFT, RIGHT] for _ in frames]
+
+
+def test_calibration_of_a_static_two_shot_uses_mouth_motion(tmp_path):
+    path = str(tmp_path / "two_shot.avi")
+
+    def draw(frame, seconds, rng):
+        for face in (LEFT, RIGHT):
+            x, y, w, h = face
+            frame[y:y + h, x:x + w] = 160
+        # Only the speaker's lower face changes between frames.
+        x, y, w, h = LEFT if timeline().speaker_at(seconds) == "A" else RIGHT
+        frame[y + h // 2:y + h, x:x + w] = rng.integers(0, 255, (h - h // 2, w, 3), np.uint8)
+
+    write_video(path, 12, draw)
+    faces = calibrate_speaker_faces([{"path": path, "start": 0.0, "end": 12.0}], timeline(), two_shot_detector)
+    assert faces == {"A": LEFT, "B": RIGHT}
+
+
+def test_calibration_skips_short_utterances(tmp_path):
+    path = str(tmp_path / "cuts.avi")
+    write_video(path, 12, lambda frame, seconds, rng: None)
+    speakers = SpeakerTimeline([0, 1000], [1000, 12000], ["A", "B"])
+    faces = calibrate_speaker_faces([{"path": path, "start": 0.0, "end": 12.0}], speakers, cut_detector)
+    assert faces == {"B": LEFT}
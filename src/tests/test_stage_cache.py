@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from main_pipeline.stage_cache import StageCache
+
+
+def write(path, data):
+    with open(path, "w") as f:
+        f.write(data)
+    return path
+
+
+def test_miss_then_hit(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    out = str(tmp_path / "project" / "out.txt")
+    os.makedirs(os.path.dirname(out))
+    key = StageCache.make_key("stage", value=1)
+    assert cache.run("stage", key, os.path.dirname(out), lambda: write(out, "a"), out) == out
+
+    os.remove(out)
+    produced = []
+    assert cache.run("stage", key, os.path.dirname(out), lambda: produced.append(1), out) == out
+    assert not produced
+    assert open(out).read() == "a"
+
+
+def test_failed_stage_is_neither_cached_nor_left_behind(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    out = str(tmp_path / "out.txt")
+    key = StageCache.make_key("stage", value=1)
+
+    def fail():
+        write(out, "partial")
+        raise RuntimeError("render failed")
+
+    with pytest.raises(RuntimeError, match="render failed"):
+        cache.run("stage", key, str(tmp_path), fail, out)
+    assert not os.path.exists(out)
+    assert cache.fetch(key, str(tmp_path)) is None
+
+
+@pytest.mark.parametrize("produce", [lambda out: None, lambda out: out, lambda out: write(out, "")])
+def test_missing_or_empty_artifact_raises(tmp_path, produce):
+    cache = StageCache(str(tmp_path / "cache"))
+    out = str(tmp_path / "out.txt")
+    key = StageCache.make_key("stage", value=1)
+    with pytest.raises(RuntimeError):
+        cache.run("stage", key, str(tmp_path), lambda: produce(out), out)
+    assert cache.fetch(key, str(tmp_path)) is None
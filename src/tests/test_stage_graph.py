@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from main_pipeline.stage_graph import StageGraph
+
+
+def test_stages_run_after_their_dependencies():
+    order = []
+    graph = StageGraph()
+    graph.add("a", lambda r: order.append("a") or 1)
+    graph.add("b", lambda r: order.append("b") or r["a"] + 1, deps=["a"])
+    graph.add("c", lambda r: order.append("c") or r["a"] + r["b"], deps=["a", "b"])
+    assert graph.run() == {"a": 1, "b": 2, "c": 3}
+    assert order == ["a", "b", "c"]
+    assert graph.critical_path() == ["a", "b", "c"]
+
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    graph = StageGraph()
+    graph.add("a", lambda r: None, deps=["b"])
+    graph.add("b", lambda r: None, deps=["a"])
+    with pytest.raises(ValueError):
+        graph.run()
+    graph = StageGraph()
+    graph.add("a", lambda r: None, deps=["missing"])
+    with pytest.raises(ValueError):
+        graph.run()
+
+
+def test_failure_skips_pending_and_resource_blocked_stages():
+    started = []
+
+    def slow(results):
+        started.append("slow")
+        time.sleep(0.3)
+        return "slow"
+
+    def fail(results):
+        time.sleep(0.05)
+        raise RuntimeError("boom")
+
+    def record(name):
+        return lambda results: started.append(name)
+
+    graph = StageGraph({"cpu": threading.Semaphore(1)})
+    graph.add("slow", slow, resource="cpu")
+    graph.add("fail", fail)
+    graph.add("waits_for_cpu", record("waits_for_cpu"), resource="cpu")
+    graph.add("after_slow", record("after_slow"), deps=["slow"])
+    with pytest.raises(RuntimeError, match="boom"):
+        graph.run(max_workers=4)
+    assert started == ["slow"]
+    assert "fail" in graph.timings
@@ -0,0 +1,60 @@
+import hashlib
+
+import cv2
+import pytest
+
+from benchmarks.fixtures import make_talking_head_video
+from video_editor.vertical_video import VerticalVideoCreator
+
+CASCADE = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+
+def frame_hashes(path):
+    cap = cv2.VideoCapture(path)
+    hashes = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        hashes.append(hashlib.md5(frame.tobytes()).hexdigest())
+    cap.release()
+    return hashes
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    # Two faces and a cut halfway, so both the schedule and the scene-change path run.
+    path = str(tmp_path_factory.mktemp("threaded") / "source.mp4")
+    return make_talking_head_video(path, 320, 180, 15, 3.0, faces=2)
+
+
+def creators():
+    options = dict(writer_backend="opencv", detect_interval=4, pipeline_workers=2, queue_depth=3)
+    return VerticalVideoCreator(CASCADE, **options), VerticalVideoCreator(CASCADE, threaded=True, **options)
+
+
+def test_convert_matches_serial(source, tmp_path):
+    serial, threaded = creators()
+    assert serial.convert_video_to_vertical(source, str(tmp_path / "serial.mp4"), 180, 320)
+    assert threaded.convert_video_to_vertical(source, str(tmp_path / "threaded.mp4"), 180, 320)
+    assert any(crop["detected"] for crop in serial.crop_trajectory)
+    assert any(crop["face"] for crop in serial.crop_trajectory)
+    assert threaded.crop_trajectory == serial.crop_trajectory
+    assert frame_hashes(str(tmp_path / "threaded.mp4")) == frame_hashes(str(tmp_path / "serial.mp4"))
+    assert threaded.frame_timings.summary()["detect"]["count"] == serial.frame_timings.summary()["detect"]["count"]
+
+
+def test_clips_and_frame_ranges_use_the_pipeline(source, tmp_path):
+    serial, threaded = creators()
+    clips = [(0.5, 1.5), (1.2, 2.6)]
+    for name, creator in (("serial", serial), ("threaded", threaded)):
+        assert creator.render_clips(source, clips, [str(tmp_path / f"{name}_{i}.mp4") for i in range(2)], 180, 320)
+    assert threaded.crop_trajectory == serial.crop_trajectory
+    for i in range(2):
+        assert frame_hashes(str(tmp_path / f"threaded_{i}.mp4")) == frame_hashes(str(tmp_path / f"serial_{i}.mp4"))
+
+    serial.crop_trajectory, threaded.crop_trajectory = [], []
+    assert serial.render_frame_range(source, str(tmp_path / "range_s.mp4"), 10, 30, 180, 320) == 20
+    assert threaded.render_frame_range(source, str(tmp_path / "range_t.mp4"), 10, 30, 180, 320) == 20
+    assert threaded.crop_trajectory == serial.crop_trajectory
+    assert [crop["frame"] for crop in threaded.crop_trajectory] == list(range(10, 30))
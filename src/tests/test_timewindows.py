@@ -0,0 +1,18 @@
+from video_editor.timewindows import merge_time_windows
+
+
+def test_disjoint_windows_are_kept_in_start_order():
+    assert merge_time_windows([(10.0, 12.0), (1.0, 2.0)]) == [(1.0, 2.0, [1]), (10.0, 12.0, [0])]
+
+
+def test_overlapping_and_touching_windows_are_merged():
+    merged = merge_time_windows([(0.0, 5.0), (5.0, 7.0), (3.0, 4.0), (20.0, 21.0)])
+    assert merged == [(0.0, 7.0, [0, 2, 1]), (20.0, 21.0, [3])]
+
+
+def test_contained_window_does_not_shrink_the_merge():
+    assert merge_time_windows([(0.0, 10.0), (2.0, 3.0)]) == [(0.0, 10.0, [0, 1])]
+
+
+def test_empty():
+    assert merge_time_windows([]) == []
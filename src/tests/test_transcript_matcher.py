@@ -0,0 +1,82 @@
+import json
+
+from main_pipeline.transcript_store import ColumnarTranscript
+from utils import IndexedTranscriptMatcher
+
+TEXT = ("so today we talk about the new rendering pipeline and why it matters "
+        "then we answer questions from the audience about cameras and lighting "
+        "and finally we say goodbye to everyone watching the show")
+
+
+def transcript_dict():
+    words = [{"text": word.capitalize() + ("," if i % 7 == 6 else ""), "start": i * 500, "end": i * 500 + 400}
+             for i, word in enumerate(TEXT.split())]
+    return {"words": words, "utterances": [{"speaker": "A", "start": 0, "end": words[-1]["end"],
+                                            "text": " ".join(w["text"] for w in words), "words": words}]}
+
+
+def segments(*snippets):
+    return {"viral_segments": [{"transcript": snippet} for snippet in snippets]}
+
+
+def test_exact_snippet_gets_word_timestamps():
+    matcher = IndexedTranscriptMatcher(segments("The new rendering pipeline, and why it matters!"), transcript_dict())
+    words = TEXT.split()
+    first = words.index("the")
+    last = words.index("matters")
+    assert matcher.match_all_segments() == [
+        {"segment": 1, "start_time": first * 0.5, "end_time": last * 0.5 + 0.4},
+    ]
+
+
+def test_fuzzy_snippet_and_threshold():
+    matcher = IndexedTranscriptMatcher(segments(), transcript_dict())
+    paraphrase = {"transcript": "we answer many questions from the audience about cameras and light"}
+    match = matcher.find_timestamp_for_segment(paraphrase, 0.6)
+    assert match is not None and 0.6 <= match["score"] < 1.0
+    assert match["start_seconds"] == TEXT.split().index("we", 10) * 0.5
+    assert matcher.find_timestamp_for_segment({"transcript": "completely unrelated words here"}, 0.6) is None
+    assert matcher.find_timestamp_for_segment({"transcript": ""}, 0.6) is None
+
+
+def test_short_snippet_uses_the_unigram_index():
+    matcher = IndexedTranscriptMatcher(segments("goodbye everyone"), transcript_dict(), ngram_size=3)
+    [result] = matcher.match_all_segments()
+    assert result["start_time"] == TEXT.split().index("goodbye") * 0.5
+
+
+def test_columnar_and_utterance_only_transcripts_match_like_the_dict(tmp_path):
+    snippets = segments("questions from the audience about cameras", "say goodbye to everyone watching")
+    expected = IndexedTranscriptMatcher(snippets, transcript_dict()).match_all_segments()
+
+    path = tmp_path / "transcript.json"
+    path.write_text(json.dumps(transcript_dict()), encoding="utf-8")
+    columnar = ColumnarTranscript.from_json_file(str(path))
+    assert IndexedTranscriptMatcher(snippets, columnar).match_all_segments() == expected
+
+    utterances_only = transcript_dict()
+    del utterances_only["words"]
+    assert IndexedTranscriptMatcher(snippets, utterances_only).match_all_segments() == expected
+
+
+def test_extend_matches_a_single_build():
+    words = [(w["text"], w["start"], w["end"]) for w in transcript_dict()["words"]]
+    snippets = segments("why it matters then we answer", "the show")
+    whole = IndexedTranscriptMatcher(snippets, transcript_dict())
+    grown = IndexedTranscriptMatcher(snippets, {"words": []})
+    for i in range(0, len(words), 4):
+        grown.extend(words[i:i + 4])
+    assert grown.index == whole.index
+    assert grown.unigram_index == whole.unigram_index
+    assert grown.match_all_segments() == whole.match_all_segments()
+
+
+def test_snippet_sharing_no_trigram_falls_back_to_word_votes():
+    # Every third word is changed, so no trigram of the snippet is in the transcript.
+    snippet = "then we really questions from honestly audience about basically and lighting"
+    matcher = IndexedTranscriptMatcher(segments(snippet), transcript_dict())
+    words = snippet.split()
+    assert not any(tuple(words[i:i + 3]) in matcher.index for i in range(len(words) - 2))
+    [result] = matcher.match_all_segments()
+    assert result["start_time"] == TEXT.split().index("then") * 0.5
+    assert result["end_time"] == TEXT.split().index("lighting") * 0.5 + 0.4
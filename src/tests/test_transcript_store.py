@@ -0,0 +1,125 @@
+import io
+import json
+import os
+
+import numpy as np
+import pytest
+
+from main_pipeline.transcript_store import ColumnarTranscript, _JsonStream, load_transcript
+
+TRANSCRIPT = {
+    "id": "t-1",
+    "text": "hello \"world\" \\ again",
+    "words": [{"text": "ignored", "start": 0, "end": 1}],
+    "utterances": [
+        {"speaker": "A", "start": 0, "end": 900, "text": "hello \"world\"",
+         "words": [{"text": "hello", "start": 0, "end": 400}, {"text": "\"world\"", "start": 500, "end": 900}]},
+        {"speaker": "B", "start": 1000, "end": 1500, "text": "hello \\ again",
+         "words": [{"text": "hello", "start": 1000, "end": 1200}, {"text": "\\", "start": 1200, "end": 1300},
+                   {"text": "again", "start": 1300, "end": 1500}]},
+    ],
+    "confidence": 0.9,
+    "flags": [True, None, {"nested": [1, 2]}],
+}
+
+
+def stream(value, chunk_size):
+    return _JsonStream(io.BytesIO(json.dumps(value).encode("utf-8")), chunk_size=chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1 << 20])
+def test_json_stream_reads_and_skips_values_across_chunks(chunk_size):
+    parser = stream(TRANSCRIPT, chunk_size)
+    seen = {}
+    for key in parser.iter_object_keys():
+        if key in ("text", "confidence", "flags"):
+            seen[key] = parser.read_value()
+        elif key == "utterances":
+            seen[key] = [parser.read_value() for _ in parser.iter_array()]
+        else:
+            parser.skip_value()
+    assert parser.peek() == b""
+    assert seen == {key: TRANSCRIPT[key] for key in ("text", "confidence", "flags", "utterances")}
+
+
+def test_json_stream_seek_and_empty_containers():
+    parser = stream({"a": [], "b": {}, "c": [1]}, 4)
+    offsets = {}
+    for key in parser.iter_object_keys():
+        offsets[key] = parser.tell()
+        if key == "a":
+            assert list(parser.iter_array()) == []
+        elif key == "b":
+            assert list(parser.iter_object_keys()) == []
+        else:
+            parser.skip_value()
+    parser.seek(offsets["c"])
+    assert parser.read_value() == [1]
+
+
+def test_json_stream_rejects_truncated_input():
+    parser = _JsonStream(io.BytesIO(b'{"a": [1, 2'), chunk_size=4)
+    with pytest.raises(ValueError):
+        for key in parser.iter_object_keys():
+            parser.skip_value()
+
+
+def test_columnar_transcript_from_json_and_sidecar(tmp_path):
+    path = str(tmp_path / "transcript.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(TRANSCRIPT, f)
+
+    transcript = load_transcript(path)
+    assert list(transcript.iter_words()) == [
+        ("hello", 0, 400), ('"world"', 500, 900), ("hello", 1000, 1200), ("\\", 1200, 1300), ("again", 1300, 1500),
+    ]
+    assert transcript.tokens.count("hello") == 1
+    assert [u["speaker"] for u in transcript.iter_utterances()] == ["A", "B"]
+    assert transcript.utterance_word_offset.tolist() == [0, 2, 5]
+
+    sidecar = path + ".columns"
+    assert os.path.exists(os.path.join(sidecar, "meta.json"))
+    loaded = load_transcript(path)
+    assert isinstance(loaded.word_start, np.memmap)
+    assert list(loaded.iter_utterances()) == list(transcript.iter_utterances())
+
+    # Saving over an existing sidecar replaces it whole and leaves no temporary directories.
+    ColumnarTranscript(["x"], ["A"], {"word_start": np.array([7], np.int32)}).save(sidecar)
+    assert sorted(os.listdir(sidecar)) == ["meta.json", "word_start.npy"]
+    assert sorted(os.listdir(tmp_path)) == ["transcript.json", "transcript.json.columns"]
+
+
+@pytest.mark.parametrize("swaps", [1, 2])
+def test_sidecar_replaced_while_loading(tmp_path, monkeypatch, swaps):
+    path = str(tmp_path / "transcript.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(TRANSCRIPT, f)
+    expected = list(load_transcript(path).iter_utterances())
+    sidecar = path + ".columns"
+    load = ColumnarTranscript.load.__func__
+    calls = []
+
+    def racing_load(cls, sidecar_dir):
+        calls.append(sidecar_dir)
+        if len(calls) > swaps:
+            return load(cls, sidecar_dir)
+        # A concurrent save has moved the checked directory aside and not yet put its own in place.
+        os.replace(sidecar_dir, sidecar + ".moved")
+        try:
+            return load(cls, sidecar_dir)
+        finally:
+            os.replace(sidecar + ".moved", sidecar_dir)
+
+    monkeypatch.setattr(ColumnarTranscript, "load", classmethod(racing_load))
+    assert list(load_transcript(path).iter_utterances()) == expected
+    assert len(calls) == 2
+
+
+def test_words_only_transcript(tmp_path):
+    path = str(tmp_path / "words.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"words": [{"text": "solo", "start": 5, "end": 9, "speaker": "C"}], "utterances": None}, f)
+    transcript = ColumnarTranscript.from_json_file(path)
+    assert list(transcript.iter_words()) == [("solo", 5, 9)]
+    assert transcript.utterance_count == 0
+    assert transcript.speakers == ["C"]
@@ -0,0 +1,125 @@
+import subprocess
+
+import cv2
+import numpy as np
+import pytest
+
+from video_editor.trimming import (constant_frame_rate, smart_cut_encode_args, snap_to_keyframe, trim_clip_precise,
+                                   trim_clips_exact)
+
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0]
+
+
+def test_snap_to_keyframe_directions():
+    assert snap_to_keyframe(2.9, KEYFRAMES) == 2.0
+    assert snap_to_keyframe(3.1, KEYFRAMES) == 4.0
+    assert snap_to_keyframe(3.9, KEYFRAMES, "back") == 2.0
+    assert snap_to_keyframe(4.0, KEYFRAMES, "back") == 4.0
+    assert snap_to_keyframe(2.1, KEYFRAMES, "forward") == 4.0
+    assert snap_to_keyframe(4.0, KEYFRAMES, "forward") == 4.0
+
+
+def test_snap_to_keyframe_past_the_keyframes():
+    assert snap_to_keyframe(7.5, KEYFRAMES, "forward") == 7.5
+    assert snap_to_keyframe(1.0, [], "back") == 1.0
+    assert snap_to_keyframe(1.0, [], "nearest") == 1.0
+    with pytest.raises(ValueError):
+        snap_to_keyframe(1.0, KEYFRAMES, "sideways")
+
+
+def test_smart_cut_encode_args_match_the_source():
+    stream = {"codec_name": "h264", "profile": "Constrained Baseline", "level": 31, "pix_fmt": "yuv420p"}
+    args = smart_cut_encode_args(stream, 18, "veryfast")
+    assert args[:2] == ["-c:v", "libx264"]
+    assert args[args.index("-profile:v") + 1] == "baseline"
+    assert args[args.index("-level:v") + 1] == "3.1"
+    assert args[args.index("-pix_fmt") + 1] == "yuv420p"
+    hevc = smart_cut_encode_args({"codec_name": "hevc", "profile": "Main 10", "level": 120,
+                                  "pix_fmt": "yuv420p10le"}, 18, "veryfast")
+    assert "level-idc=4.0" in hevc
+
+
+def test_smart_cut_encode_args_unmatched_source():
+    assert smart_cut_encode_args({"codec_name": "vp9", "profile": "Profile 0", "level": -99,
+                                  "pix_fmt": "yuv420p"}, 18, "veryfast") is None
+    assert smart_cut_encode_args({"codec_name": "h264", "profile": "Extended", "level": 30,
+                                  "pix_fmt": "yuv420p"}, 18, "veryfast") is None
+    assert smart_cut_encode_args({"codec_name": "h264", "profile": "High", "pix_fmt": "yuv420p"},
+                                 18, "veryfast") is None
+
+
+def frame_count(path):
+    cap = cv2.VideoCapture(path)
+    count = 0
+    while cap.read()[0]:
+        count += 1
+    cap.release()
+    return count
+
+
+def test_trim_clips_exact_widens_to_keyframes(tmp_path):
+    source = str(tmp_path / "source.mp4")
+    subprocess.run(["ffmpeg", "-y", "-v", "error", "-f", "lavfi", "-i", "testsrc2=size=160x120:rate=10",
+                    "-t", "8", "-c:v", "libx264", "-preset", "ultrafast", "-g", "20", "-keyint_min", "20",
+                    "-sc_threshold", "0", source], check=True)
+    outputs = [str(tmp_path / "first.mp4"), str(tmp_path / "second.mp4")]
+    cuts = trim_clips_exact(source, [(2.5, 3.5), (4.0, 7.2)], outputs, KEYFRAMES)
+    assert cuts == [(2.0, 4.0), (4.0, 7.2)]
+    assert [frame_count(path) for path in outputs] == [20, 32]
+
+
+BITS = 10
+
+
+def write_numbered_video(path, frames, fps, gop):
+    # Every frame shows its index as black and white bars, which survive lossy encoding.
+    width, height = 16 * BITS, 96
+    command = ["ffmpeg", "-y", "-v", "error", "-f", "rawvideo", "-pix_fmt", "gray", "-s", f"{width}x{height}",
+               "-r", str(fps), "-i", "-", "-f", "lavfi", "-i", f"sine=f=440:d={frames / fps}", "-shortest",
+               "-c:v", "libx264", "-preset", "ultrafast", "-g", str(gop), "-keyint_min", str(gop),
+               "-sc_threshold", "0", "-bf", "3", "-pix_fmt", "yuv420p", "-c:a", "aac", path]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE)
+    for index in range(frames):
+        frame = np.zeros((height, width), np.uint8)
+        for bit in range(BITS):
+            if index >> bit & 1:
+                frame[:, bit * 16:(bit + 1) * 16] = 255
+        process.stdin.write(frame.tobytes())
+    process.stdin.close()
+    assert process.wait() == 0
+
+
+def frame_numbers(path):
+    cap = cv2.VideoCapture(path)
+    numbers = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        bars = frame.mean(axis=(0, 2))
+        numbers.append(sum(1 << bit for bit in range(BITS) if bars[bit * 16 + 4:bit * 16 + 12].mean() > 128))
+    cap.release()
+    return numbers
+
+
+@pytest.fixture(scope="module")
+def numbered_source(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("precise") / "numbered.mp4")
+    write_numbered_video(path, 250, 25, 50)
+    return path
+
+
+@pytest.mark.parametrize("start, end", [(1.3, 7.7), (2.0, 6.0), (1.97, 6.05), (0.5, 9.9)])
+def test_trim_clip_precise_keeps_exactly_the_source_frames(numbered_source, tmp_path, start, end):
+    stream = {"codec_name": "h264", "profile": "High", "level": 12, "pix_fmt": "yuv420p",
+              "time_base": "1/12800", "r_frame_rate": "25/1", "avg_frame_rate": "25/1"}
+    output = str(tmp_path / "clip.mp4")
+    trim_clip_precise(numbered_source, start, end, output, [0.0, 2.0, 4.0, 6.0, 8.0], stream)
+    assert frame_numbers(output) == [i for i in range(250) if start <= i / 25 < end]
+
+
+def test_constant_frame_rate():
+    assert constant_frame_rate({"r_frame_rate": "30000/1001", "avg_frame_rate": "30000/1001"}) == pytest.approx(29.97, abs=1e-3)
+    assert constant_frame_rate({"r_frame_rate": "30/1", "avg_frame_rate": "2997/125"}) is None
+    assert constant_frame_rate({"r_frame_rate": "0/0", "avg_frame_rate": "0/0"}) is None
+    assert constant_frame_rate({}) is None
@@ -0,0 +1,23 @@
+import pytest
+
+from video_editor.ffmpeg_tools import FFmpegError, run_ffmpeg
+from video_editor.video_writers import FFmpegPipeWriter, frame_rate_rational
+
+
+@pytest.mark.parametrize("fps, expected", [
+    (30000 / 1001, "30000/1001"),
+    (24000 / 1001, "24000/1001"),
+    (25.0, "25/1"),
+    (12.5, "25/2"),
+    ("60000/1001", "60000/1001"),
+])
+def test_frame_rate_rational(fps, expected):
+    assert frame_rate_rational(fps) == expected
+
+
+def test_missing_ffmpeg_raises_ffmpeg_error(monkeypatch, tmp_path):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    with pytest.raises(FFmpegError):
+        FFmpegPipeWriter(str(tmp_path / "out.mp4"), 30.0, (64, 64))
+    with pytest.raises(FFmpegError):
+        run_ffmpeg(["ffmpeg", "-version"])
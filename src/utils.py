@@ -1,33 +1,79 @@
 
 import json
 import re
-import subprocess
 from difflib import SequenceMatcher
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 import yt_dlp
 import os
 
-def youtube_downloader(url: str, folder: str) -> str:
+from main_pipeline.transcript_store import ColumnarTranscript, load_transcript
+from video_editor.ffmpeg_tools import probe_audio_stream, run_ffmpeg
+from video_editor.timewindows import merge_time_windows
+
+# Container used when the native audio track is stream-copied, by codec.
+AUDIO_COPY_CONTAINERS = {
+    "aac": ".m4a",
+    "opus": ".webm",
+}
+# Codec arguments of the speech-recognition formats: mono, 16 kHz.
+ASR_AUDIO_FORMATS = {
+    "flac": ["-ac", "1", "-ar", "16000", "-sample_fmt", "s16", "-c:a", "flac"],
+    "wav": ["-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le"],
+}
+
+def download_format(max_height: Optional[int] = None) -> str:
+    """
+    yt-dlp format selector for the best video+audio, optionally capped in height.
+    """
+    if max_height is None:
+        return "bestvideo+bestaudio/best"
+    return f"bestvideo[height<={max_height}]+bestaudio/best[height<={max_height}]/best"
+
+
+def source_height_cap(target_width: int, target_height: int) -> int:
+    """
+    Largest source height worth downloading for a vertical target.
+
+    The top panel upscales a face crop to the full output width, so detail
+    is kept up to the output's long side; anything above it is discarded.
+    """
+    return max(target_width, target_height)
+
+
+def youtube_downloader(url: str, folder: str, max_height: Optional[int] = None) -> str:
     """
     Downloads the video and returns the full path to the downloaded file.
+
+    Args:
+        url: YouTube video link
+        folder: Destination folder
+        max_height: Optional cap on the video height (e.g. from `source_height_cap`)
     """
     final_path = {"name": None}  # mutable container to capture inside nested hook
 
     def _hook(d: dict):
         # Only capture once when download is fully finished
         if d.get("status") == "finished":
-            # yt‑d lp puts the final merged filename here
+            # yt‑d lp puts the final merged filename here
             full = d.get("info_dict", {}).get("_filename")
             if full:
                 final_path["name"] = full
 
+    def _pp_hook(d: dict):
+        # After merging, MoveFiles reports the final file path
+        if d.get("status") == "finished" and d.get("postprocessor") == "MoveFiles":
+            full = d.get("info_dict", {}).get("filepath")
+            if full:
+                final_path["name"] = full
+
     # Set your outtmpl as you like, e.g.
     ydl_opts = {
         "outtmpl": os.path.join(folder, "%(title)s.%(ext)s"),
-        "format": "bestvideo+bestaudio/best",
+        "format": download_format(max_height),
         "merge_output_format": "mp4",
         "progress_hooks": [_hook],
+        "postprocessor_hooks": [_pp_hook],
         # … optionally verbose/logging settings
     }
 
@@ -37,26 +83,144 @@ def youtube_downloader(url: str, folder: str) -> str:
     return str(final_path["name"])
 
 
-def run_command(command):
-    try:
-        # Run the command and wait for it to finish
-        result = subprocess.run(command, shell=True, text=True, capture_output=True)
-        
-        # Print the command's output and errors
-        print("STDOUT:\n", result.stdout)
-        print("STDERR:\n", result.stderr)
+def youtube_section_downloader(url: str, folder: str, sections: List[Tuple[float, float]],
+                               margin: float = 2.0, max_height: Optional[int] = None) -> List[Dict]:
+    """
+    Downloads only the given time ranges of a video, one file per merged range.
+
+    Each range is widened by `margin` seconds on both sides and overlapping
+    ranges are merged before downloading. Cuts are re-encoded at the range
+    boundaries so each file starts exactly at its requested start.
+
+    Args:
+        url: YouTube video link
+        folder: Destination folder
+        sections: (start_time, end_time) ranges in seconds
+        margin: Seconds added before and after each range
+        max_height: Optional cap on the video height
+
+    Returns:
+        List of {"path", "start", "end"} dicts, where start/end are the
+        positions of the file in the original video, sorted by start
+    """
+    ranges = [(start, end) for start, end, _ in merge_time_windows(
+        [(max(0.0, start - margin), end + margin) for start, end in sections]
+    )]
+    downloaded: Dict[float, str] = {}
+
+    def _pp_hook(d: dict):
+        if d.get("status") == "finished" and d.get("postprocessor") == "MoveFiles":
+            info = d.get("info_dict", {})
+            if info.get("filepath") and info.get("section_start") is not None:
+                downloaded[float(info["section_start"])] = info["filepath"]
+
+    ydl_opts = {
+        "outtmpl": os.path.join(folder, "%(title)s.%(section_start)s-%(section_end)s.%(ext)s"),
+        "format": download_format(max_height),
+        "merge_output_format": "mp4",
+        "download_ranges": yt_dlp.utils.download_range_func(None, ranges),
+        "force_keyframes_at_cuts": True,
+        "postprocessor_hooks": [_pp_hook],
+    }
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl.download([url])
+
+    results = []
+    for start, end in ranges:
+        path = downloaded.get(float(start))
+        if path is None:
+            raise RuntimeError(f"Section {start}-{end} of {url} was not downloaded")
+        results.append({"path": path, "start": start, "end": end})
+    return results
+
+
+def plan_audio_extraction(input_path: str, mode: str = "asr", accepted_codecs: Tuple[str, ...] = ("aac", "opus"),
+                          asr_format: str = "flac") -> Tuple[str, List[str]]:
+    """
+    Choose the output extension and codec arguments of an audio extraction.
+
+    In "copy" mode the native track is stream-copied when its codec is in
+    `accepted_codecs`; otherwise, and in "asr" mode, it is downmixed to a
+    16 kHz mono FLAC or WAV, the smallest input speech recognition needs.
+
+    Returns:
+        (extension, ffmpeg codec arguments)
+
+    Raises:
+        ValueError: If the mode or format is unknown or the input has no audio
+        FFmpegError: If probing the input fails
+    """
+    if mode not in ("asr", "copy"):
+        raise ValueError(f"Unknown audio mode: {mode}")
+    if asr_format not in ASR_AUDIO_FORMATS:
+        raise ValueError(f"Unknown ASR audio format: {asr_format}")
+    stream = probe_audio_stream(input_path)
+    if stream is None:
+        raise ValueError(f"No audio stream in {input_path}")
+    codec = stream.get("codec_name")
+    if mode == "copy" and codec in accepted_codecs and codec in AUDIO_COPY_CONTAINERS:
+        return AUDIO_COPY_CONTAINERS[codec], ["-c:a", "copy"]
+    return f".{asr_format}", list(ASR_AUDIO_FORMATS[asr_format])
+
+
+def extract_audio_ranges(input_path: str, output_base: str, ranges: Optional[List[Tuple[float, float]]] = None,
+                         mode: str = "asr", accepted_codecs: Tuple[str, ...] = ("aac", "opus"),
+                         asr_format: str = "flac") -> List[str]:
+    """
+    Extract the audio track, or only some time ranges of it, in one ffmpeg run.
 
-        # Check if command was successful
-        if result.returncode == 0:
-            print("Command executed successfully.")
-        else:
-            print(f"Command failed with return code {result.returncode}")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+    Each range is read from its own input-seeked view of the file and
+    written to `<output_base>_<i><ext>`; without ranges the whole track goes
+    to `<output_base><ext>`. Ranges may overlap; they are clamped to the
+    start and end of the track. The extension depends on the chosen format (see
+    `plan_audio_extraction`). Existing outputs are unlinked first, so hard
+    links to them (e.g. in the stage cache) are never overwritten.
 
-def extract_audio(input_path, output_path):
-    ffmpeg_command = f'ffmpeg -i "{input_path}" -map a -c:a libmp3lame -b:a 192k "{output_path}"'
-    run_command(ffmpeg_command)
+    Args:
+        input_path: Source video or audio file
+        output_base: Output path without extension
+        ranges: Optional (start_time, end_time) windows in seconds
+        mode: "copy" to stream-copy an accepted native codec, "asr" to always
+            produce 16 kHz mono audio
+        accepted_codecs: Native codecs the consumer accepts as-is in copy mode
+        asr_format: "flac" or "wav"
+
+    Returns:
+        The written files, one per range (or a single file)
+
+    Raises:
+        FFmpegError: If ffmpeg fails
+    """
+    extension, codec_args = plan_audio_extraction(input_path, mode, accepted_codecs, asr_format)
+    windows = ranges if ranges else [None]
+    if ranges:
+        output_paths = [f"{output_base}_{i}{extension}" for i in range(len(ranges))]
+    else:
+        output_paths = [f"{output_base}{extension}"]
+
+    command = ["ffmpeg", "-y", "-v", "error"]
+    for window in windows:
+        if window is not None:
+            command += ["-ss", f"{max(0.0, window[0]):.3f}", "-to", f"{window[1]:.3f}"]
+        command += ["-i", input_path]
+    for i, output_path in enumerate(output_paths):
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        command += ["-map", f"{i}:a:0", "-vn", *codec_args, output_path]
+    run_ffmpeg(command)
+    return output_paths
+
+
+def extract_audio(input_path: str, output_base: str, mode: str = "asr",
+                  accepted_codecs: Tuple[str, ...] = ("aac", "opus"), asr_format: str = "flac") -> str:
+    """
+    Extract the whole audio track; see `extract_audio_ranges`.
+
+    Returns:
+        Path of the written file (`output_base` plus the format's extension)
+    """
+    return extract_audio_ranges(input_path, output_base, None, mode, accepted_codecs, asr_format)[0]
 
 
 class TranscriptMatcher:
@@ -124,11 +288,162 @@ class TranscriptMatcher:
         return results
 
 
-def load_and_match_from_files(viral_segments_file: str, audio_transcript_file: str, similarity_threshold: float = 0.6):
+class IndexedTranscriptMatcher(TranscriptMatcher):
+    """
+    Word-level matcher backed by an n-gram index over the transcript words.
+
+    The transcript is normalised once. Each viral snippet votes for candidate
+    alignments through its n-grams, and only the best few candidate windows
+    are aligned with SequenceMatcher, so the cost per snippet no longer grows
+    with the size of every utterance. When fewer than `sparse_votes` of a
+    snippet's n-grams agree on an alignment (a paraphrase, or a snippet with
+    every few words changed), its single words vote as well. Start/end come from the first and last
+    aligned word, with millisecond precision. The transcript may be the raw
+    AssemblyAI dict or a ColumnarTranscript.
+
+    The matcher materializes the transcript: the normalised tokens, their
+    times and the n-gram index are Python lists and dicts built from the
+    (possibly memory-mapped) columns, so its memory grows with the number
+    of words. A ColumnarTranscript saves the JSON parse and the per-word
+    dicts, and each distinct word text is normalised only once.
+    """
+
+    def __init__(self, viral_segments_json: Dict, audio_transcript_json: Union[Dict, ColumnarTranscript],
+                 ngram_size: int = 3, max_candidates: int = 5, sparse_votes: float = 0.25):
+        super().__init__(viral_segments_json, audio_transcript_json)
+        self.ngram_size = ngram_size
+        self.max_candidates = max_candidates
+        self.sparse_votes = sparse_votes
+        self.tokens: List[str] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.index: Dict[tuple, List[int]] = {}
+        self.unigram_index: Dict[str, List[int]] = {}
+        self._cleaned: Dict[str, List[str]] = {}
+        self.extend(self._iter_words(audio_transcript_json))
+
+    def extend(self, words: Iterable[Tuple[str, int, int]]):
+        """
+        Append (text, start_ms, end_ms) words to the transcript and index them.
+
+        Only the new positions (and the n-grams that now end in them) are
+        indexed, so a transcript that grows window by window is indexed once
+        overall rather than once per window.
+        """
+        first = len(self.tokens)
+        for text, start, end in words:
+            if text not in self._cleaned:
+                self._cleaned[text] = self.clean_text(text).split()
+            for token in self._cleaned[text]:
+                self.tokens.append(token)
+                self.starts.append(start)
+                self.ends.append(end)
+        for pos in range(first, len(self.tokens)):
+            self.unigram_index.setdefault(self.tokens[pos], []).append(pos)
+        for pos in range(max(0, first - self.ngram_size + 1), len(self.tokens) - self.ngram_size + 1):
+            self.index.setdefault(tuple(self.tokens[pos:pos + self.ngram_size]), []).append(pos)
+
+    @staticmethod
+    def _iter_words(audio_transcript: Union[Dict, ColumnarTranscript]):
+        """
+        Yield (text, start_ms, end_ms) for every transcript word.
+
+        Falls back to the utterance words, then to whole utterances, when the
+        top-level `words` array is missing.
+        """
+        if isinstance(audio_transcript, ColumnarTranscript):
+            if len(audio_transcript):
+                yield from audio_transcript.iter_words()
+            else:
+                for utterance in audio_transcript.iter_utterances():
+                    yield utterance['text'], utterance['start'], utterance['end']
+            return
+        words = audio_transcript.get('words')
+        if not words:
+            words = [w for u in audio_transcript.get('utterances', []) for w in u.get('words', [])]
+        if words:
+            for word in words:
+                yield word.get('text', ''), word.get('start', 0), word.get('end', 0)
+            return
+        for utterance in audio_transcript.get('utterances', []):
+            yield utterance.get('text', ''), utterance.get('start', 0), utterance.get('end', 0)
+
+    def _votes(self, query: List[str], n: int) -> Dict[int, int]:
+        """
+        Count, for every alignment offset, the query n-grams found at that offset (n is 1 or ngram_size).
+        """
+        votes: Dict[int, int] = {}
+        for i in range(len(query) - n + 1):
+            if n == self.ngram_size:
+                positions = self.index.get(tuple(query[i:i + n]), [])
+            else:
+                positions = self.unigram_index.get(query[i], [])
+            for pos in positions:
+                votes[pos - i] = votes.get(pos - i, 0) + 1
+        return votes
+
+    def _best_offsets(self, votes: Dict[int, int], spread: int) -> List[int]:
+        # Votes of nearby offsets add up, so words shifted by an inserted or dropped word still agree.
+        support = {offset: sum(votes.get(offset + d, 0) for d in range(-spread, spread + 1)) for offset in votes}
+        return sorted(support, key=support.get, reverse=True)[:self.max_candidates]
+
+    def _candidate_offsets(self, query: List[str]) -> List[int]:
+        n = min(self.ngram_size, len(query))
+        votes = self._votes(query, n)
+        candidates = self._best_offsets(votes, 0 if n == 1 else 2)
+        if n > 1 and (not votes or max(votes.values()) < (len(query) - n + 1) * self.sparse_votes):
+            # Paraphrased snippets share few whole n-grams with the transcript, but
+            # most of their single words still vote for the right alignment.
+            for offset in self._best_offsets(self._votes(query, 1), 2):
+                if offset not in candidates:
+                    candidates.append(offset)
+        return candidates
+
+    def find_timestamp_for_segment(self, viral_segment: Dict, similarity_threshold: float = 0.6) -> Optional[Dict]:
+        query = self.clean_text(viral_segment.get('transcript', '')).split()
+        if not query or not self.tokens:
+            return None
+
+        slack = len(query) // 4 + 2
+        best_match = None
+        best_score = 0.0
+
+        for offset in self._candidate_offsets(query):
+            window_start = max(0, offset - slack)
+            window = self.tokens[window_start:offset + len(query) + slack]
+            blocks = [b for b in SequenceMatcher(None, query, window, autojunk=False).get_matching_blocks() if b.size]
+            if not blocks:
+                continue
+            score = sum(b.size for b in blocks) / len(query)
+            if score > best_score and score >= similarity_threshold:
+                first = window_start + blocks[0].b
+                last = window_start + blocks[-1].b + blocks[-1].size - 1
+                best_score = score
+                best_match = {
+                    'start_seconds': self.starts[first] / 1000,
+                    'end_seconds': self.ends[last] / 1000,
+                    'score': score,
+                }
+
+        return best_match
+
+
+MATCHERS = {
+    "legacy": TranscriptMatcher,
+    "indexed": IndexedTranscriptMatcher,
+}
+
+
+def load_and_match_from_files(viral_segments_file: str, audio_transcript_file: str, similarity_threshold: float = 0.6,
+                              matcher: str = "indexed"):
     with open(viral_segments_file, 'r', encoding='utf-8') as f:
         viral_segments = json.load(f)
-    with open(audio_transcript_file, 'r', encoding='utf-8') as f:
-        audio_transcript = json.load(f)
-    
-    matcher = TranscriptMatcher(viral_segments, audio_transcript)
-    return matcher.match_all_segments(similarity_threshold)
+    if matcher not in MATCHERS:
+        raise ValueError(f"Unknown matcher: {matcher}")
+    if matcher == "legacy":
+        with open(audio_transcript_file, 'r', encoding='utf-8') as f:
+            audio_transcript = json.load(f)
+    else:
+        # Streamed into columns once, then memory-mapped from the sidecar.
+        audio_transcript = load_transcript(audio_transcript_file)
+    return MATCHERS[matcher](viral_segments, audio_transcript).match_all_segments(similarity_threshold)
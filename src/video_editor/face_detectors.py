@@ -0,0 +1,193 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]
+
+
+def _downscale(frame: np.ndarray, scale: float) -> np.ndarray:
+    if scale == 1.0:
+        return frame
+    return cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def _to_full_resolution(boxes, scale: float) -> List[Box]:
+    return [tuple(int(round(v / scale)) for v in box) for box in boxes]
+
+
+class FaceDetector(ABC):
+    """
+    Interface of the face detector backends.
+
+    Backends work on downscaled copies of the frames and return (x, y, w, h)
+    boxes in full-resolution coordinates. `detect_batch` defaults to one
+    `detect` call per frame; only backends with `batched` set run a batch
+    through one inference call (dnn). Renders detect one frame at a time,
+    as the tracker decides per frame whether to detect; batches are used by
+    the face index and the speaker calibration.
+    """
+
+    name = ""
+    # True when detect_batch runs the whole batch through one inference call.
+    batched = False
+
+    @abstractmethod
+    def detect(self, frame: np.ndarray, scale: float = 1.0) -> List[Box]:
+        """
+        Detect faces in one frame, downscaled by `scale` first.
+        """
+
+    def detect_batch(self, frames: Sequence[np.ndarray], scale: float = 1.0) -> List[List[Box]]:
+        return [self.detect(frame, scale) for frame in frames]
+
+    @abstractmethod
+    def settings(self) -> Dict:
+        """
+        Constructor arguments needed to rebuild an equivalent detector.
+        """
+
+
+class HaarFaceDetector(FaceDetector):
+    name = "haar"
+
+    def __init__(self, cascade_path: str, scale_factor: float = 1.1, min_neighbors: int = 5):
+        """
+        Viola-Jones Haar cascade (frontal faces only, one frame at a time).
+        """
+        if not os.path.exists(cascade_path):
+            raise ValueError(f"Could not find face cascade classifier at: {cascade_path}")
+        self.cascade_path = cascade_path
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise ValueError("Could not load face cascade classifier")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def detect(self, frame: np.ndarray, scale: float = 1.0) -> List[Box]:
+        gray = _downscale(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), scale)
+        min_size = 30 if scale == 1.0 else max(12, int(30 * scale))
+        faces = self.cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(min_size, min_size),
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+        return _to_full_resolution(faces, scale)
+
+    def settings(self) -> Dict:
+        return {"cascade_path": self.cascade_path, "scale_factor": self.scale_factor,
+                "min_neighbors": self.min_neighbors}
+
+
+class DnnFaceDetector(FaceDetector):
+    name = "dnn"
+    batched = True
+
+    def __init__(self, model_path: str, config_path: str, confidence: float = 0.5,
+                 input_size: Tuple[int, int] = (300, 300)):
+        """
+        OpenCV DNN ResNet-10 SSD face detector (res10_300x300_ssd Caffe model).
+
+        Handles profiles and partial occlusion much better than the Haar
+        cascade. Frames of a batch go through the network as one blob.
+
+        Args:
+            model_path: .caffemodel weights
+            config_path: deploy .prototxt
+            confidence: Minimum detection score
+            input_size: (width, height) of the network input
+        """
+        for path in (model_path, config_path):
+            if not path or not os.path.exists(path):
+                raise ValueError(f"Could not find DNN face model file at: {path}")
+        self.model_path = model_path
+        self.config_path = config_path
+        self.confidence = confidence
+        self.input_size = tuple(input_size)
+        self.net = cv2.dnn.readNetFromCaffe(config_path, model_path)
+
+    def detect(self, frame: np.ndarray, scale: float = 1.0) -> List[Box]:
+        return self.detect_batch([frame], scale)[0]
+
+    def detect_batch(self, frames: Sequence[np.ndarray], scale: float = 1.0) -> List[List[Box]]:
+        if not frames:
+            return []
+        # The network resizes to its input size anyway; `scale` only matters
+        # for the cost of that resize, so it is applied first when given.
+        images = [_downscale(frame, scale) for frame in frames]
+        blob = cv2.dnn.blobFromImages(images, 1.0, self.input_size, (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward().reshape(-1, 7)
+        results: List[List[Box]] = [[] for _ in frames]
+        for image_id, _, score, x1, y1, x2, y2 in detections:
+            if score < self.confidence:
+                continue
+            height, width = frames[int(image_id)].shape[:2]
+            x1, x2 = np.clip([x1 * width, x2 * width], 0, width)
+            y1, y2 = np.clip([y1 * height, y2 * height], 0, height)
+            if x2 > x1 and y2 > y1:
+                results[int(image_id)].append((int(x1), int(y1), int(x2 - x1), int(y2 - y1)))
+        return results
+
+    def settings(self) -> Dict:
+        return {"model_path": self.model_path, "config_path": self.config_path,
+                "confidence": self.confidence, "input_size": list(self.input_size)}
+
+
+class YuNetFaceDetector(FaceDetector):
+    name = "yunet"
+
+    def __init__(self, model_path: str, confidence: float = 0.6, nms_threshold: float = 0.3):
+        """
+        OpenCV YuNet face detector (face_detection_yunet ONNX model).
+
+        Fast and robust to pose on CPU. The model runs on one image at a
+        time, so a batch is a loop over its frames; the input size is only
+        reconfigured when the frame size changes.
+
+        Args:
+            model_path: YuNet .onnx model
+            confidence: Minimum detection score
+            nms_threshold: Non-maximum suppression IoU threshold
+        """
+        if not model_path or not os.path.exists(model_path):
+            raise ValueError(f"Could not find YuNet face model at: {model_path}")
+        self.model_path = model_path
+        self.confidence = confidence
+        self.nms_threshold = nms_threshold
+        self.detector = cv2.FaceDetectorYN_create(model_path, "", (320, 320), confidence, nms_threshold)
+        self._input_size: Optional[Tuple[int, int]] = None
+
+    def detect(self, frame: np.ndarray, scale: float = 1.0) -> List[Box]:
+        image = _downscale(frame, scale)
+        size = (image.shape[1], image.shape[0])
+        if size != self._input_size:
+            self.detector.setInputSize(size)
+            self._input_size = size
+        _, faces = self.detector.detect(image)
+        boxes = [] if faces is None else [tuple(face[:4]) for face in faces]
+        return _to_full_resolution(boxes, scale)
+
+    def settings(self) -> Dict:
+        return {"model_path": self.model_path, "confidence": self.confidence,
+                "nms_threshold": self.nms_threshold}
+
+
+FACE_DETECTORS = {
+    "haar": HaarFaceDetector,
+    "dnn": DnnFaceDetector,
+    "yunet": YuNetFaceDetector,
+}
+
+
+def create_face_detector(backend: str, **options) -> FaceDetector:
+    """
+    Build a face detector backend by name ("haar", "dnn" or "yunet").
+    """
+    if backend not in FACE_DETECTORS:
+        raise ValueError(f"Unknown face detector: {backend}")
+    return FACE_DETECTORS[backend](**options)
@@ -0,0 +1,242 @@
+import bisect
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from video_editor.face_tracking import Box, FaceTracker, box_iou
+
+INDEX_VERSION = 1
+
+
+class FaceTrackIndex:
+    def __init__(self, detected_frames: np.ndarray, box_offsets: np.ndarray, boxes: np.ndarray,
+                 shot_boundaries: np.ndarray, meta: Dict):
+        """
+        Face detections of one source video, reusable by any later render.
+
+        Stores the boxes found at every frame where the tracker ran detection
+        (frame index -> boxes) and the frames where a new shot starts, i.e.
+        everything a FaceTracker needs to replay the analysis without vision.
+
+        Args:
+            detected_frames: Sorted frame indices where detection ran
+            box_offsets: Start of each detected frame's rows in `boxes` (len + 1 entries)
+            boxes: (N, 4) int32 array of (x, y, w, h) boxes
+            shot_boundaries: Sorted frame indices where a scene change was detected
+            meta: fps and total_frames of the indexed video
+        """
+        self.detected_frames = np.asarray(detected_frames, dtype=np.int32)
+        self.box_offsets = np.asarray(box_offsets, dtype=np.int32)
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.shot_boundaries = np.asarray(shot_boundaries, dtype=np.int32)
+        self.meta = meta
+        self._rows = {frame: row for row, frame in enumerate(self.detected_frames.tolist())}
+        self._frames = self.detected_frames.tolist()
+        self._shots = self.shot_boundaries.tolist()
+        self._shot_set = set(self._shots)
+
+    @staticmethod
+    def key(video_hash: str, detection_settings: Dict) -> str:
+        """
+        Index key for a source video (content hash) and the settings that affect detection.
+        """
+        payload = json.dumps({"video": video_hash, "settings": detection_settings, "version": INDEX_VERSION},
+                             sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def faces_at(self, frame_index: int) -> Optional[List[Box]]:
+        """
+        Boxes detected at `frame_index`, or None when detection did not run there.
+        """
+        row = self._rows.get(frame_index)
+        if row is None:
+            return None
+        return [tuple(box) for box in self.boxes[self.box_offsets[row]:self.box_offsets[row + 1]].tolist()]
+
+    def is_shot_boundary(self, frame_index: int) -> bool:
+        return frame_index in self._shot_set
+
+    def next_detection(self, frame_index: int) -> Optional[int]:
+        """
+        First frame after `frame_index` where detection ran, if it is in the same shot.
+        """
+        i = bisect.bisect_right(self._frames, frame_index)
+        if i == len(self._frames):
+            return None
+        shot = bisect.bisect_right(self._shots, frame_index)
+        if shot < len(self._shots) and self._shots[shot] <= self._frames[i]:
+            return None
+        return self._frames[i]
+
+    def nearest_faces(self, frame_index: int) -> List[Box]:
+        """
+        Detections closest to `frame_index` within its shot, preferring earlier frames.
+
+        Used to start tracking at an arbitrary frame, e.g. after a seek.
+        """
+        shot = bisect.bisect_right(self._shots, frame_index) - 1
+        shot_start = self._shots[shot] if shot >= 0 else 0
+        shot_end = self._shots[shot + 1] if shot + 1 < len(self._shots) else None
+        i = bisect.bisect_right(self._frames, frame_index) - 1
+        if i >= 0 and self._frames[i] >= shot_start:
+            return self.faces_at(self._frames[i])
+        if i + 1 < len(self._frames) and (shot_end is None or self._frames[i + 1] < shot_end):
+            return self.faces_at(self._frames[i + 1])
+        return []
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            detected_frames=self.detected_frames,
+            box_offsets=self.box_offsets,
+            boxes=self.boxes,
+            shot_boundaries=self.shot_boundaries,
+            meta=np.array(json.dumps(self.meta)),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FaceTrackIndex":
+        with np.load(path) as data:
+            return cls(data["detected_frames"], data["box_offsets"], data["boxes"],
+                       data["shot_boundaries"], json.loads(str(data["meta"])))
+
+
+class IndexTracker:
+    def __init__(self, index: FaceTrackIndex, tracker: FaceTracker, interpolate: bool = True):
+        """
+        Drop-in for FaceTracker that replays detections from a FaceTrackIndex.
+
+        Since the index knows the next detection, the box moves linearly
+        between two detections of the same face in the same shot instead of
+        holding the last one, so sparse detections do not make the crop lag
+        and then jump; the tracker's smoothing still applies on top. Without
+        `interpolate`, fed the same frames in order, it produces exactly the
+        boxes of the tracker that built the index. After a reset (a seek),
+        tracking starts from the nearest detection in the same shot.
+
+        Args:
+            index: Face detections of the video being rendered
+            tracker: Tracker providing the smoothing; its detection schedule is unused
+            interpolate: Interpolate the box between detections
+        """
+        self.index = index
+        self.tracker = tracker
+        self.interpolate = interpolate
+        self.detected = False
+        self.reset()
+
+    def reset(self):
+        self.tracker.reset()
+        self._fresh = True
+        self._anchor = None
+
+    def _interpolated(self, frame_index: int) -> Optional[List[Box]]:
+        """
+        Box between the last detection and the same face at the next one, or None.
+        """
+        if self._anchor is None:
+            return None
+        start_frame, start_box = self._anchor
+        end_frame = self.index.next_detection(frame_index)
+        if end_frame is None:
+            return None
+        end_box = max(self.index.faces_at(end_frame), key=lambda f: box_iou(f, start_box), default=None)
+        if end_box is None or box_iou(end_box, start_box) == 0.0:
+            return None
+        t = (frame_index - start_frame) / (end_frame - start_frame)
+        return [tuple(int(round(a + (b - a) * t)) for a, b in zip(start_box, end_box))]
+
+    def face_for_frame(self, frame_index: int) -> Optional[Box]:
+        faces = self.index.faces_at(frame_index)
+        self.detected = faces is not None
+        if self._fresh:
+            self._fresh = False
+            if faces is None:
+                faces = self.index.nearest_faces(frame_index)
+        elif self.index.is_shot_boundary(frame_index):
+            self.tracker.mark_cut()
+            self._anchor = None
+        if faces is None and self.interpolate:
+            faces = self._interpolated(frame_index)
+            if faces is not None:
+                return self.tracker.update(faces)
+        box = self.tracker.update(faces)
+        if faces is not None:
+            target = self.tracker.target
+            self._anchor = (frame_index, target) if faces and target is not None else None
+        return box
+
+
+def build_face_index(creator, input_path: str, batch_size: int = 8) -> FaceTrackIndex:
+    """
+    Run the creator's detection schedule over a whole video and record the results.
+
+    The schedule (every `detect_interval` frames and on scene changes) does
+    not depend on what the detector finds, so the frames to analyse are
+    collected in order and detected in batches.
+
+    Args:
+        creator: VerticalVideoCreator providing the tracker settings and detector
+        input_path: Source video
+        batch_size: Frames per detector call
+    """
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video {input_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    tracker = creator.create_face_tracker()
+    detected_frames: List[int] = []
+    shot_boundaries: List[int] = []
+    frame_boxes: List[List[Box]] = []
+    pending: List[np.ndarray] = []
+
+    def flush():
+        frame_boxes.extend(creator.detect_faces_batch(pending, creator.detection_scale))
+        pending.clear()
+
+    frame_index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if tracker.should_detect(frame):
+                detected_frames.append(frame_index)
+                pending.append(frame)
+                if len(pending) >= batch_size:
+                    flush()
+                # Only the schedule matters here; the boxes are filled in by flush().
+                tracker.update([])
+            else:
+                tracker.update(None)
+            if tracker.scene_changed:
+                shot_boundaries.append(frame_index)
+            frame_index += 1
+        if pending:
+            flush()
+    finally:
+        cap.release()
+
+    offsets = np.zeros(len(frame_boxes) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(boxes) for boxes in frame_boxes])
+    boxes = np.array([box for faces in frame_boxes for box in faces], dtype=np.int32).reshape(-1, 4)
+    meta = {"version": INDEX_VERSION, "fps": fps, "total_frames": frame_index}
+    return FaceTrackIndex(np.array(detected_frames), offsets, boxes, np.array(shot_boundaries), meta)
+
+
+def load_or_build_face_index(creator, input_path: str, index_path: str) -> FaceTrackIndex:
+    """
+    Load the index at `index_path`, building and saving it first if it does not exist.
+    """
+    if os.path.exists(index_path):
+        return FaceTrackIndex.load(index_path)
+    index = build_face_index(creator, input_path)
+    index.save(index_path)
+    return index
@@ -0,0 +1,141 @@
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+
+Box = Tuple[int, int, int, int]
+
+
+def box_iou(a: Box, b: Box) -> float:
+    """
+    Intersection over union of two (x, y, w, h) boxes.
+    """
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    inter_w = max(0, min(ax2, bx2) - max(a[0], b[0]))
+    inter_h = max(0, min(ay2, by2) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+class FaceTracker:
+    def __init__(self, detect_interval: int = 10, scene_change_threshold: float = 0.25,
+                 smoothing: float = 0.6, max_missed_detections: int = 3):
+        """
+        Decide when to run face detection and carry the face box between detections.
+
+        Detection is requested every `detect_interval` frames or when the frame
+        changes abruptly (a cut). In between, the box eases towards the last
+        detection with an exponential moving average, which also removes the
+        frame-to-frame jitter of the raw detector output. Live tracking cannot
+        see the next detection; IndexTracker, replaying stored detections,
+        feeds boxes interpolated towards it instead.
+
+        Args:
+            detect_interval: Run detection at most once every N frames (1 = every frame)
+            scene_change_threshold: Mean absolute thumbnail difference (0-1) treated as a cut
+            smoothing: EMA weight kept from the previous box (0 = no smoothing)
+            max_missed_detections: Consecutive empty detections before the face is dropped
+        """
+        if detect_interval < 1:
+            raise ValueError("detect_interval must be at least 1")
+        if not 0.0 <= smoothing < 1.0:
+            raise ValueError("smoothing must be in [0, 1)")
+        self.detect_interval = detect_interval
+        self.scene_change_threshold = scene_change_threshold
+        self.smoothing = smoothing
+        self.max_missed_detections = max_missed_detections
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all state, e.g. after seeking to a new position in the video.
+        """
+        self._frames_since_detection = None
+        self._previous_thumbnail = None
+        self._target: Optional[Box] = None
+        self._box: Optional[np.ndarray] = None
+        self._missed = 0
+        self._snap = True
+        self.scene_changed = False
+
+    @property
+    def target(self) -> Optional[Box]:
+        """
+        Detection the box is easing towards, None when no face is tracked.
+        """
+        return self._target
+
+    def _scene_changed(self, frame: np.ndarray) -> bool:
+        small = cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA)
+        thumbnail = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+        previous, self._previous_thumbnail = self._previous_thumbnail, thumbnail
+        if previous is None:
+            return False
+        return float(np.mean(np.abs(thumbnail - previous))) / 255.0 > self.scene_change_threshold
+
+    def should_detect(self, frame: np.ndarray) -> bool:
+        """
+        Check whether detection should run on this frame.
+
+        Must be called once per frame, in order, before `update`.
+        """
+        scene_changed = self.scene_changed = self._scene_changed(frame)
+        if scene_changed:
+            self.mark_cut()
+        return (
+            scene_changed
+            or self._frames_since_detection is None
+            or self._frames_since_detection + 1 >= self.detect_interval
+        )
+
+    def mark_cut(self):
+        """
+        Make the next box jump to its target instead of easing towards it.
+        """
+        self._snap = True
+
+    def update(self, faces: Optional[List[Box]]) -> Optional[Box]:
+        """
+        Advance the tracker by one frame.
+
+        Args:
+            faces: Detections for this frame, or None when detection was skipped
+
+        Returns:
+            Smoothed face box (x, y, w, h) or None when no face is being tracked
+        """
+        if faces is not None:
+            self._frames_since_detection = 0
+            if len(faces) > 0:
+                self._missed = 0
+                self._target = self._pick_face(faces)
+            else:
+                self._missed += 1
+                if self._missed > self.max_missed_detections:
+                    self._target = None
+                    self._box = None
+        else:
+            self._frames_since_detection += 1
+
+        if self._target is None:
+            return None
+
+        target = np.array(self._target, dtype=np.float64)
+        if self._box is None or self._snap:
+            self._box = target
+        else:
+            self._box = self.smoothing * self._box + (1.0 - self.smoothing) * target
+        self._snap = False
+        return tuple(int(round(v)) for v in self._box)
+
+    def _pick_face(self, faces: List[Box]) -> Box:
+        """
+        Prefer the face that overlaps the one being tracked, else the largest.
+        """
+        faces = [tuple(int(v) for v in face) for face in faces]
+        if self._target is not None and not self._snap:
+            best = max(faces, key=lambda f: box_iou(f, self._target))
+            if box_iou(best, self._target) > 0.0:
+                return best
+        return max(faces, key=lambda f: f[2] * f[3])
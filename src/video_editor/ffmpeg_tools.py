@@ -0,0 +1,144 @@
+import json
+import os
+import subprocess
+import tempfile
+from typing import Dict, List, Optional
+
+
+class FFmpegError(RuntimeError):
+    def __init__(self, command: List[str], returncode: int, stderr: str):
+        """
+        Raised when an ffmpeg/ffprobe invocation exits with a non-zero status.
+
+        Args:
+            command: The argument list that was executed
+            returncode: Process exit status
+            stderr: Captured standard error of the process
+        """
+        self.command = command
+        self.returncode = returncode
+        self.stderr = stderr
+        tail = "\n".join(stderr.strip().splitlines()[-5:])
+        super().__init__(f"{command[0]} failed with return code {returncode}: {tail}")
+
+
+def run_ffmpeg(command: List[str]) -> str:
+    """
+    Run an ffmpeg/ffprobe argument list and return its standard output.
+
+    Raises:
+        FFmpegError: If the process cannot be started or exits with a non-zero status
+    """
+    try:
+        result = subprocess.run(command, text=True, capture_output=True)
+    except OSError as e:
+        raise FFmpegError(command, 127, f"Could not start {command[0]}: {e}") from e
+    if result.returncode != 0:
+        raise FFmpegError(command, result.returncode, result.stderr)
+    return result.stdout
+
+
+def probe_keyframes(input_path: str) -> List[float]:
+    """
+    List the times (seconds) of the video keyframes, relative to the start of the video stream.
+
+    The stream's start_time is subtracted from the packet timestamps, so the
+    first frame is at 0 as for frame indices and input seeking (`-ss`), even
+    in containers whose timestamps start elsewhere (MPEG-TS, edit lists).
+    Reads packet flags only, so the video is demuxed but not decoded.
+    """
+    output = run_ffmpeg([
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=start_time:packet=pts_time,flags",
+        "-of", "json",
+        input_path,
+    ])
+    probe = json.loads(output)
+    streams = probe.get("streams") or [{}]
+    start_time = streams[0].get("start_time")
+    offset = float(start_time) if start_time not in (None, "", "N/A") else 0.0
+    keyframes = []
+    for packet in probe.get("packets", []):
+        pts_time = packet.get("pts_time")
+        if "K" not in packet.get("flags", "") or pts_time in (None, "", "N/A"):
+            continue
+        keyframes.append(float(pts_time) - offset)
+    return sorted(keyframes)
+
+
+def probe_video_stream(input_path: str) -> Dict:
+    """
+    Read codec parameters of the first video stream (codec_name, profile, level, pix_fmt, time_base, ...).
+    """
+    output = run_ffmpeg([
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=codec_name,profile,level,pix_fmt,width,height,r_frame_rate,avg_frame_rate,time_base",
+        "-of", "json",
+        input_path,
+    ])
+    streams = json.loads(output).get("streams", [])
+    if not streams:
+        raise ValueError(f"No video stream in {input_path}")
+    return streams[0]
+
+
+def probe_audio_stream(input_path: str) -> Optional[Dict]:
+    """
+    Read codec parameters of the first audio stream (codec_name, sample_rate, channels),
+    or None when the file has no audio.
+    """
+    output = run_ffmpeg([
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,sample_rate,channels",
+        "-of", "json",
+        input_path,
+    ])
+    streams = json.loads(output).get("streams", [])
+    return streams[0] if streams else None
+
+
+def probe_duration(input_path: str) -> float:
+    """
+    Duration of a file in seconds, from its container (also works on a growing MPEG-TS file).
+    """
+    output = run_ffmpeg([
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "csv=p=0",
+        input_path,
+    ]).strip()
+    try:
+        return float(output)
+    except ValueError:
+        raise ValueError(f"No duration for {input_path}: {output!r}") from None
+
+
+def concat_videos(input_paths: List[str], output_path: str, audio_source: Optional[str] = None):
+    """
+    Losslessly join videos with identical stream parameters using the concat demuxer.
+
+    Args:
+        input_paths: Videos to join, in order
+        output_path: Output file path
+        audio_source: Optional file whose first audio track is encoded to AAC
+            and muxed into the joined video
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", dir=output_dir, delete=False) as f:
+        for path in input_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+        list_path = f.name
+    command = ["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio_source:
+        command += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0?",
+                    "-c:v", "copy", "-c:a", "aac", "-shortest", "-movflags", "+faststart"]
+    else:
+        command += ["-c", "copy"]
+    try:
+        run_ffmpeg(command + [output_path])
+    finally:
+        os.remove(list_path)
@@ -0,0 +1,242 @@
+import bisect
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from video_editor.face_tracking import Box, box_iou
+
+
+class SpeakerTimeline:
+    def __init__(self, starts_ms: Sequence[int], ends_ms: Sequence[int], speakers: Sequence[str]):
+        """
+        Who is talking when, from diarized utterances.
+
+        Args:
+            starts_ms: Utterance start times in milliseconds, sorted
+            ends_ms: Utterance end times in milliseconds
+            speakers: Speaker label of each utterance
+        """
+        if not len(starts_ms) == len(ends_ms) == len(speakers):
+            raise ValueError("starts_ms, ends_ms and speakers must have the same length")
+        self.starts_ms = [int(v) for v in starts_ms]
+        self.ends_ms = [int(v) for v in ends_ms]
+        self.speakers = list(speakers)
+
+    @classmethod
+    def from_transcript(cls, transcript) -> "SpeakerTimeline":
+        """
+        Build the timeline from a ColumnarTranscript (main_pipeline.transcript_store).
+        """
+        labels = transcript.speakers
+        return cls(
+            transcript.utterance_start.tolist(),
+            transcript.utterance_end.tolist(),
+            [labels[i] for i in transcript.utterance_speaker.tolist()],
+        )
+
+    def speaker_at(self, seconds: float) -> Optional[str]:
+        """
+        Speaker of the utterance in progress at `seconds`.
+
+        Between utterances the previous speaker is kept, so the framing does
+        not jump around during pauses. Returns None before the first utterance.
+        """
+        index = bisect.bisect_right(self.starts_ms, seconds * 1000.0) - 1
+        return self.speakers[index] if index >= 0 else None
+
+    def utterances(self, speaker: str) -> List[Tuple[float, float]]:
+        """
+        (start, end) in seconds of every utterance by `speaker`.
+        """
+        return [
+            (start / 1000.0, end / 1000.0)
+            for start, end, label in zip(self.starts_ms, self.ends_ms, self.speakers)
+            if label == speaker
+        ]
+
+
+class SpeakerFraming:
+    def __init__(self, timeline: SpeakerTimeline, faces: Dict[str, Box], time_offset: float = 0.0):
+        """
+        Framing decided by the diarization timeline instead of per-frame detection.
+
+        Args:
+            timeline: Speaker turns of the episode
+            faces: Calibrated face box of each speaker, in source frame coordinates
+            time_offset: Position in the episode, in seconds, of frame 0 of the
+                video being rendered (non-zero for downloaded sections)
+        """
+        self.timeline = timeline
+        self.faces = faces
+        self.time_offset = time_offset
+
+    def shifted(self, time_offset: float) -> "SpeakerFraming":
+        """
+        Same framing for a video whose frame 0 is at `time_offset` in the episode.
+        """
+        return SpeakerFraming(self.timeline, self.faces, time_offset)
+
+    def face_at(self, seconds: float) -> Optional[Box]:
+        """
+        Face box of the active speaker at `seconds` into the rendered video.
+        """
+        return self.faces.get(self.timeline.speaker_at(self.time_offset + seconds))
+
+
+class SpeakerTracker:
+    def __init__(self, framing: SpeakerFraming, fps: float):
+        """
+        Drop-in for FaceTracker that takes the face from the speaker timeline.
+
+        The box cuts to the new speaker's face on a speaker change. When the
+        active speaker has no calibrated face, the last box is kept.
+        """
+        self.detected = False
+        self.framing = framing
+        self.fps = fps
+        self.reset()
+
+    def reset(self):
+        self._last: Optional[Box] = None
+
+    def face_for_frame(self, frame_index: int) -> Optional[Box]:
+        face = self.framing.face_at(frame_index / self.fps)
+        if face is not None:
+            self._last = face
+        return self._last
+
+
+def _sample_times(timeline: SpeakerTimeline, sources: List[Dict], samples_per_speaker: int,
+                  min_duration: float) -> List[Tuple[str, int, float]]:
+    """
+    Pick (speaker, source index, time in source) samples from the longest utterances.
+    """
+    samples = []
+    for speaker in dict.fromkeys(timeline.speakers):
+        candidates = []
+        for start, end in timeline.utterances(speaker):
+            if end - start < min_duration:
+                continue
+            middle = (start + end) / 2.0
+            for source_index, source in enumerate(sources):
+                if source["start"] <= middle < source["end"]:
+                    candidates.append((end - start, source_index, middle - source["start"]))
+                    break
+        candidates.sort(reverse=True)
+        samples.extend((speaker, source_index, time) for _, source_index, time in candidates[:samples_per_speaker])
+    return samples
+
+
+def _mouth_motion(frame: np.ndarray, later: Optional[np.ndarray], face: Box) -> float:
+    """
+    Mean absolute change of the lower half of a face box between two nearby frames.
+    """
+    if later is None:
+        return 0.0
+    x, y, w, h = face
+    y0, y1 = y + h // 2, y + h
+    regions = []
+    for image in (frame, later):
+        region = image[max(0, y0):max(0, y1), max(0, x):max(0, x + w)]
+        if region.size == 0:
+            return 0.0
+        regions.append(cv2.resize(cv2.cvtColor(region, cv2.COLOR_BGR2GRAY), (32, 16)).astype(np.int16))
+    return float(np.mean(np.abs(regions[0] - regions[1])))
+
+
+def calibrate_speaker_faces(sources: List[Dict], timeline: SpeakerTimeline,
+                            detect_batch: Callable[[List[np.ndarray], float], List[list]],
+                            samples_per_speaker: int = 6, min_duration: float = 1.5,
+                            scale: float = 0.5, batch_size: int = 8, motion_gap: float = 0.2) -> Dict[str, Box]:
+    """
+    Locate each speaker's face from a few frames sampled while they talk.
+
+    Frames are taken at the middle of each speaker's longest utterances and
+    run through the detector in batches. Detections from all samples are
+    grouped by position (IoU); each speaker gets the group that shows up
+    most in their own samples relative to the other speakers' samples (the
+    camera cuts to whoever talks); when faces are equally present, as in a
+    static two-shot, the group whose mouth region moves most over
+    `motion_gap` seconds while the speaker talks wins.
+
+    Args:
+        sources: Video files as {"path", "start", "end"} dicts, where start/end
+            are their positions in the episode in seconds
+        timeline: Speaker turns of the episode
+        detect_batch: Batched face detector, e.g. VerticalVideoCreator.detect_faces_batch
+        samples_per_speaker: Frames sampled per speaker
+        min_duration: Shortest utterance (seconds) worth sampling
+        scale: Downscale factor passed to the detector
+        batch_size: Frames per detector call
+        motion_gap: Seconds between the two frames compared for mouth motion
+
+    Returns:
+        Face box (x, y, w, h) per speaker; speakers without a usable sample are left out
+    """
+    samples = _sample_times(timeline, sources, samples_per_speaker, min_duration)
+    frames: List[np.ndarray] = []
+    later_frames: List[Optional[np.ndarray]] = []
+    frame_speakers: List[str] = []
+    for source_index, source in enumerate(sources):
+        wanted = sorted((time, speaker) for speaker, index, time in samples if index == source_index)
+        if not wanted:
+            continue
+        cap = cv2.VideoCapture(source["path"])
+        gap_frames = max(1, int(round(motion_gap * (cap.get(cv2.CAP_PROP_FPS) or 30.0))))
+        try:
+            for time, speaker in wanted:
+                cap.set(cv2.CAP_PROP_POS_MSEC, time * 1000.0)
+                ret, frame = cap.read()
+                if not ret:
+                    continue
+                for _ in range(gap_frames - 1):
+                    cap.grab()
+                ret, later = cap.read()
+                frames.append(frame)
+                later_frames.append(later if ret else None)
+                frame_speakers.append(speaker)
+        finally:
+            cap.release()
+
+    detections: List[list] = []
+    for i in range(0, len(frames), batch_size):
+        detections.extend(detect_batch(frames[i:i + batch_size], scale))
+
+    # Group detections by position; each group is one face seen across samples.
+    groups: List[Dict] = []
+    for sample_index, faces in enumerate(detections):
+        for face in faces:
+            face = tuple(int(v) for v in face)
+            best = max(groups, key=lambda g: box_iou(g["anchor"], face), default=None)
+            if best is None or box_iou(best["anchor"], face) < 0.3:
+                best = {"anchor": face, "boxes": {}}
+                groups.append(best)
+            if sample_index not in best["boxes"]:
+                best["boxes"][sample_index] = face
+                best.setdefault("motion", {})[sample_index] = _mouth_motion(
+                    frames[sample_index], later_frames[sample_index], face
+                )
+
+    sample_counts: Dict[str, int] = {}
+    for speaker in frame_speakers:
+        sample_counts[speaker] = sample_counts.get(speaker, 0) + 1
+
+    faces: Dict[str, Box] = {}
+    for speaker, own_total in sample_counts.items():
+        other_total = len(frame_speakers) - own_total
+        best_score, best_boxes = None, None
+        for group in groups:
+            own = [i for i in group["boxes"] if frame_speakers[i] == speaker]
+            if not own:
+                continue
+            others = len(group["boxes"]) - len(own)
+            share = len(own) / own_total
+            presence = round(share - (others / other_total if other_total else 0.0), 2)
+            motion = float(np.mean([group["motion"][i] for i in own]))
+            score = (presence, motion, share)
+            if best_score is None or score > best_score:
+                best_score, best_boxes = score, [group["boxes"][i] for i in own]
+        if best_boxes:
+            faces[speaker] = tuple(int(v) for v in np.median(np.array(best_boxes), axis=0))
+    return faces
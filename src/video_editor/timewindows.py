@@ -0,0 +1,23 @@
+from typing import List, Tuple
+
+
+def merge_time_windows(windows: List[Tuple[float, float]]) -> List[Tuple[float, float, List[int]]]:
+    """
+    Merge overlapping or touching time windows.
+
+    Args:
+        windows: List of (start_time, end_time) windows in seconds
+
+    Returns:
+        List of (start_time, end_time, member_indices) sorted by start time, where
+        member_indices are the positions in `windows` covered by the merged window
+    """
+    merged = []
+    for index in sorted(range(len(windows)), key=lambda i: windows[i][0]):
+        start, end = windows[index]
+        if merged and start <= merged[-1][1]:
+            last_start, last_end, members = merged[-1]
+            merged[-1] = (last_start, max(last_end, end), members + [index])
+        else:
+            merged.append((start, end, [index]))
+    return merged
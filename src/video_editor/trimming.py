@@ -0,0 +1,278 @@
+import bisect
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from typing import Dict, List, Optional, Tuple
+
+from video_editor.ffmpeg_tools import concat_videos, probe_keyframes, probe_video_stream, run_ffmpeg
+
+# Encoders used to re-encode the boundary GOPs of a smart cut, by source codec.
+SMART_CUT_ENCODERS = {
+    "h264": "libx264",
+    "hevc": "libx265",
+}
+
+# Encoder profile for each source profile reported by ffprobe, by source codec.
+SMART_CUT_PROFILES = {
+    "h264": {
+        "Constrained Baseline": "baseline",
+        "Baseline": "baseline",
+        "Main": "main",
+        "High": "high",
+        "High 10": "high10",
+        "High 4:2:2": "high422",
+        "High 4:4:4 Predictive": "high444",
+    },
+    "hevc": {
+        "Main": "main",
+        "Main 10": "main10",
+    },
+}
+
+
+def constant_frame_rate(stream: Dict) -> Optional[float]:
+    """
+    Frame rate of a constant frame rate stream (r_frame_rate equal to avg_frame_rate), else None.
+    """
+    rates = [stream.get("r_frame_rate"), stream.get("avg_frame_rate")]
+    try:
+        values = [float(Fraction(rate)) for rate in rates]
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    if values[0] <= 0 or abs(values[0] - values[1]) > 1e-3:
+        return None
+    return values[0]
+
+
+def _first_frame_at(time: float, fps: float) -> int:
+    """
+    Index of the first frame shown at or after `time` on a constant frame grid starting at 0.
+    """
+    return math.ceil(time * fps - 1e-6)
+
+
+def smart_cut_encode_args(stream: Dict, crf: int, preset: str) -> Optional[List[str]]:
+    """
+    Encoder arguments that re-encode parts of a video with the source's codec, profile, level and pixel format.
+
+    Parts joined to stream-copied video must share these parameters, or
+    strict decoders fail at the joins. Returns None when the source cannot
+    be matched (no encoder for its codec, an unknown profile or no level).
+    """
+    codec = stream.get("codec_name")
+    encoder = SMART_CUT_ENCODERS.get(codec)
+    profile = SMART_CUT_PROFILES.get(codec, {}).get(stream.get("profile"))
+    try:
+        level = int(stream.get("level"))
+    except (TypeError, ValueError):
+        level = 0
+    if encoder is None or profile is None or level <= 0 or not stream.get("pix_fmt"):
+        return None
+    args = ["-c:v", encoder, "-crf", str(crf), "-preset", preset, "-profile:v", profile,
+            "-pix_fmt", stream["pix_fmt"]]
+    if codec == "h264":
+        # H.264 levels are reported as level_idc, ten times the level number.
+        args += ["-level:v", f"{level / 10:.1f}"]
+    else:
+        # HEVC general_level_idc is thirty times the level number.
+        args += ["-x265-params", f"level-idc={level / 30:.1f}"]
+    return args
+
+
+def snap_to_keyframe(time: float, keyframes: List[float], direction: str = "nearest") -> float:
+    """
+    Return the keyframe closest to `time` (or `time` itself if there is none in that direction).
+
+    Args:
+        time: Time in seconds
+        keyframes: Sorted keyframe times
+        direction: "nearest", "back" (last keyframe at or before `time`) or
+            "forward" (first keyframe at or after `time`)
+    """
+    if direction == "back":
+        i = bisect.bisect_right(keyframes, time)
+        return keyframes[i - 1] if i else time
+    if direction == "forward":
+        i = bisect.bisect_left(keyframes, time)
+        return keyframes[i] if i < len(keyframes) else time
+    if direction != "nearest":
+        raise ValueError(f"Unknown snap direction: {direction}")
+    if not keyframes:
+        return time
+    i = bisect.bisect_left(keyframes, time)
+    candidates = keyframes[max(0, i - 1):i + 1]
+    return min(candidates, key=lambda k: abs(k - time))
+
+
+def trim_clips_exact(input_file: str, clips: List[Tuple[float, float]], output_files: List[str],
+                     keyframes: Optional[List[float]] = None) -> List[Tuple[float, float]]:
+    """
+    Cut several clips with stream copy in a single ffmpeg invocation.
+
+    Each clip start is snapped back to the keyframe before it and each end
+    forward to the keyframe after it, so no frame is re-encoded and no
+    speech inside the window is lost. The input is opened once and every
+    clip is an output of the same ffmpeg process; since the output-side
+    seek lands exactly on a keyframe, stream copy starts on a decodable frame.
+
+    Args:
+        input_file: Source video
+        clips: (start_time, end_time) windows in seconds
+        output_files: Output file for each window
+        keyframes: Keyframe times of the source; probed when omitted
+
+    Returns:
+        The (start_time, end_time) actually cut for each clip
+    """
+    if len(clips) != len(output_files):
+        raise ValueError("clips and output_files must have the same length")
+    if not clips:
+        return []
+    if keyframes is None:
+        keyframes = probe_keyframes(input_file)
+
+    cuts = [(snap_to_keyframe(start, keyframes, "back"), snap_to_keyframe(end, keyframes, "forward"))
+            for start, end in clips]
+
+    command = ["ffmpeg", "-y", "-v", "error", "-i", input_file]
+    for (start, end), output_file in zip(cuts, output_files):
+        command += [
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-ss", f"{start:.6f}", "-to", f"{end:.6f}",
+            "-c", "copy", "-avoid_negative_ts", "make_zero",
+            "-movflags", "+faststart",
+            output_file,
+        ]
+    run_ffmpeg(command)
+    return cuts
+
+
+def trim_clip_precise(input_file: str, start_time: float, end_time: float, output_file: str,
+                      keyframes: Optional[List[float]] = None, stream: Optional[Dict] = None,
+                      crf: int = 18, preset: str = "veryfast"):
+    """
+    Frame-accurate cut that only re-encodes the GOPs at the clip boundaries.
+
+    The video between the first keyframe after `start_time` and the last
+    keyframe before `end_time` is stream-copied; the partial GOPs before
+    and after it are re-encoded with the source codec and the three parts
+    are joined with the concat demuxer. The boundary parts are encoded with
+    the source's profile, level and pixel format (`smart_cut_encode_args`).
+    Each part is bounded by its number of frames on the source's constant
+    frame grid, so the output holds exactly the source frames shown in
+    [start_time, end_time); the copied GOPs are assumed closed (no frame
+    after a keyframe is shown before it). The audio of the window is
+    encoded once and muxed in. Sources whose parameters cannot be matched,
+    variable frame rate sources and clips shorter than a GOP are re-encoded
+    entirely.
+
+    Args:
+        input_file: Source video
+        start_time: Clip start in seconds
+        end_time: Clip end in seconds
+        output_file: Output path
+        keyframes: Keyframe times of the source; probed when omitted
+        stream: Output of `probe_video_stream` for the source; probed when omitted
+        crf: Constant rate factor for the re-encoded parts
+        preset: Encoder preset for the re-encoded parts
+    """
+    if keyframes is None:
+        keyframes = probe_keyframes(input_file)
+    if stream is None:
+        stream = probe_video_stream(input_file)
+
+    encode_args = smart_cut_encode_args(stream, crf, preset)
+    fps = constant_frame_rate(stream)
+    first = bisect.bisect_left(keyframes, start_time)
+    last = bisect.bisect_right(keyframes, end_time) - 1
+    if (encode_args is None or fps is None or first >= len(keyframes) or last < first
+            or keyframes[first] >= keyframes[last]):
+        encoder = SMART_CUT_ENCODERS.get(stream.get("codec_name"), "libx264")
+        run_ffmpeg([
+            "ffmpeg", "-y", "-v", "error",
+            "-ss", f"{start_time:.3f}", "-i", input_file, "-t", f"{end_time - start_time:.3f}",
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-c:v", encoder, "-crf", str(crf), "-preset", preset,
+            "-c:a", "aac", "-movflags", "+faststart",
+            output_file,
+        ])
+        return
+
+    copy_start, copy_end = keyframes[first], keyframes[last]
+    timescale = []
+    if stream.get("time_base", "").startswith("1/"):
+        timescale = ["-video_track_timescale", stream["time_base"][2:]]
+
+    work_dir = tempfile.mkdtemp(prefix="smartcut_", dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        parts = []
+        # Each part is bounded by its frame count rather than a duration: a
+        # duration lets stream copy run into the next GOP (the keyframe at
+        # copy_end and its reordered frames) and lets re-encoded parts gain
+        # duplicated frames. Frames are counted on the source's constant frame grid.
+        pieces = [
+            (start_time, copy_start, encode_args),
+            # make_zero keeps the keyframe, which sits just before the seek point, visible.
+            (copy_start, copy_end, ["-avoid_negative_ts", "make_zero", "-c:v", "copy"]),
+            (copy_end, end_time, encode_args),
+        ]
+        for i, (piece_start, piece_end, codec_args) in enumerate(pieces):
+            frames = _first_frame_at(piece_end, fps) - _first_frame_at(piece_start, fps)
+            if frames <= 0:
+                continue
+            part = os.path.join(work_dir, f"part_{i}.mp4")
+            run_ffmpeg([
+                "ffmpeg", "-y", "-v", "error",
+                # Just past a keyframe, so the seek lands on it and not on the one before.
+                "-ss", f"{piece_start + 0.0005:.4f}" if codec_args[-1] == "copy" else f"{piece_start:.6f}",
+                "-i", input_file, "-frames:v", str(frames),
+                "-map", "0:v:0", "-an", *codec_args, "-fps_mode", "passthrough", *timescale,
+                part,
+            ])
+            parts.append(part)
+
+        video_only = os.path.join(work_dir, "video.mp4")
+        concat_videos(parts, video_only)
+        run_ffmpeg([
+            "ffmpeg", "-y", "-v", "error",
+            "-i", video_only,
+            "-ss", f"{start_time:.6f}", "-to", f"{end_time:.6f}", "-i", input_file,
+            "-map", "0:v:0", "-map", "1:a:0?",
+            "-c:v", "copy", "-c:a", "aac",
+            "-movflags", "+faststart",
+            output_file,
+        ])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def trim_clips(input_file: str, clips: List[Tuple[float, float]], output_files: List[str],
+               mode: str = "exact", workers: int = 1):
+    """
+    Cut several clips from one input.
+
+    Args:
+        input_file: Source video
+        clips: (start_time, end_time) windows in seconds
+        output_files: Output file for each window
+        mode: "exact" widens clips to keyframes and stream-copies everything
+            in one ffmpeg run; "precise" smart-cuts each clip at the exact times
+        workers: Number of clips smart-cut in parallel in precise mode
+    """
+    if mode not in ("exact", "precise"):
+        raise ValueError(f"Unknown trim mode: {mode}")
+    keyframes = probe_keyframes(input_file)
+    if mode == "exact":
+        trim_clips_exact(input_file, clips, output_files, keyframes)
+        return
+    stream = probe_video_stream(input_file)
+
+    def cut(item):
+        (start, end), output_file = item
+        trim_clip_precise(input_file, start, end, output_file, keyframes, stream)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(cut, zip(clips, output_files)))
@@ -1,43 +1,200 @@
 
 import cv2
 import numpy as np
-from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
 from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
+from video_editor.face_detectors import create_face_detector
+from video_editor.face_index import FaceTrackIndex, IndexTracker, build_face_index
+from video_editor.face_tracking import FaceTracker
+from main_pipeline.metrics import FrameTimings
+from video_editor.speaker_framing import SpeakerFraming, SpeakerTracker
+from video_editor.ffmpeg_tools import FFmpegError, concat_videos, probe_keyframes
+from video_editor.timewindows import merge_time_windows
+from video_editor.video_writers import FFmpegPipeWriter, OpenCVVideoWriter
+
+# Settings that change how a render is scheduled but not its output.
+PIPELINE_SETTINGS = ("threaded", "pipeline_workers", "queue_depth")
+# Settings that decide which frames are analysed and what the detector finds.
+DETECTION_SETTINGS = ("face_detector", "face_cascade_path", "face_model_path", "face_config_path",
+                      "detection_scale", "detect_interval", "scene_change_threshold")
+# Output layouts by name, as (width, height).
+OUTPUT_LAYOUTS = {"9:16": (720, 1280), "4:5": (720, 900), "1:1": (720, 720)}
 
 class VerticalVideoCreator:
-    def __init__(self, face_cascade_path: str):
+    def __init__(self, face_cascade_path: str, detect_interval: int = 10,
+                 detection_scale: float = 0.5, smoothing: float = 0.6,
+                 scene_change_threshold: float = 0.25, writer_backend: str = "opencv",
+                 codec: str = "libx264", preset: str = "veryfast", crf: int = 23,
+                 keep_audio: bool = True, threaded: bool = False, pipeline_workers: int = 2,
+                 queue_depth: int = 8, face_detector: str = "haar",
+                 face_model_path: Optional[str] = None, face_config_path: Optional[str] = None):
         """
         Initialize the vertical video creator with face detection.
         
         Args:
             face_cascade_path: Path to Haar cascade file for face detection.
+            detect_interval: Run the detector every N frames when rendering videos
+                (a scene change always triggers detection). 1 detects on every frame.
+            detection_scale: Downscale factor applied to the frame before detection.
+            smoothing: EMA weight kept from the previous face box between frames.
+            scene_change_threshold: Mean thumbnail difference (0-1) treated as a cut.
+            writer_backend: "opencv" (mp4v, no audio) or "ffmpeg" (frames piped to an
+                ffmpeg encoder, fast-start MP4 with the source audio).
+            codec: ffmpeg video encoder used by the ffmpeg backend (libx264, libx265).
+            preset: Encoder preset used by the ffmpeg backend.
+            crf: Constant rate factor used by the ffmpeg backend.
+            keep_audio: Mux the source audio into the output (ffmpeg backend only).
+            threaded: Run decoding, face detection, frame composition and encoding
+                of `convert_video_to_vertical`, `render_frame_range` and
+                `render_clips` on separate threads (`render_layouts` always
+                composes and encodes each layout on its own thread).
+            pipeline_workers: Number of threads composing frames in the threaded pipeline.
+            queue_depth: Maximum number of frames waiting between two stages of the
+                threaded pipeline.
+            face_detector: Detector backend, "haar" (uses face_cascade_path), "dnn"
+                (OpenCV ResNet-10 SSD) or "yunet" (OpenCV YuNet); see face_detectors.
+            face_model_path: Model weights of the dnn (.caffemodel) or yunet (.onnx) backend.
+            face_config_path: Network definition (.prototxt) of the dnn backend.
         """
-        if not os.path.exists(face_cascade_path):
-            raise ValueError(f"Could not find face cascade classifier at: {face_cascade_path}")
-        self.face_cascade = cv2.CascadeClassifier(face_cascade_path)
-        if self.face_cascade.empty():
-            raise ValueError("Could not load face cascade classifier")
+        if writer_backend not in ("opencv", "ffmpeg"):
+            raise ValueError(f"Unknown writer backend: {writer_backend}")
+        if pipeline_workers < 1 or queue_depth < 1:
+            raise ValueError("pipeline_workers and queue_depth must be at least 1")
+        detector_options = {
+            "haar": {"cascade_path": face_cascade_path},
+            "dnn": {"model_path": face_model_path, "config_path": face_config_path},
+            "yunet": {"model_path": face_model_path},
+        }
+        if face_detector not in detector_options:
+            raise ValueError(f"Unknown face detector: {face_detector}")
+        self.face_cascade_path = face_cascade_path
+        self.face_detector = face_detector
+        self.face_model_path = face_model_path
+        self.face_config_path = face_config_path
+        self.detector = create_face_detector(face_detector, **detector_options[face_detector])
+        self.detect_interval = detect_interval
+        self.detection_scale = detection_scale
+        self.smoothing = smoothing
+        self.scene_change_threshold = scene_change_threshold
+        self.writer_backend = writer_backend
+        self.codec = codec
+        self.preset = preset
+        self.crf = crf
+        self.keep_audio = keep_audio
+        self.threaded = threaded
+        self.pipeline_workers = pipeline_workers
+        self.queue_depth = queue_depth
+        self.crop_trajectory: List[Dict] = []
+        # Per-frame decode/detect/resize/compose/encode durations of the last render.
+        self.frame_timings = FrameTimings()
+        # When set, renders frame the active speaker from the diarization
+        # timeline instead of detecting faces (see speaker_framing).
+        self.speaker_framing: Optional[SpeakerFraming] = None
+        # When set, renders replay these detections instead of running the detector.
+        self.face_index: Optional[FaceTrackIndex] = None
+        # Replayed boxes move between detections rather than holding the last one (see IndexTracker).
+        self.interpolate_index = True
 
-    def detect_faces(self, frame: np.ndarray) -> list:
+    def detect_faces(self, frame: np.ndarray, scale: float = 1.0) -> list:
         """
         Detect faces in a frame.
         
         Args:
             frame: Input frame as numpy array
+            scale: Downscale factor applied before detection; boxes are
+                returned in full-resolution coordinates
             
         Returns:
             List of face rectangles [(x, y, w, h), ...]
         """
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30),
-            flags=cv2.CASCADE_SCALE_IMAGE
+        return self.detector.detect(frame, scale)
+
+    def detect_faces_batch(self, frames: List[np.ndarray], scale: float = 1.0) -> List[list]:
+        """
+        Detect faces in several frames; one inference call only for batched backends (dnn).
+        """
+        return self.detector.detect_batch(frames, scale)
+
+    def settings(self) -> Dict:
+        """
+        Constructor arguments needed to rebuild an equivalent creator, e.g. in a worker process.
+        """
+        return {
+            "face_cascade_path": self.face_cascade_path,
+            "detect_interval": self.detect_interval,
+            "detection_scale": self.detection_scale,
+            "smoothing": self.smoothing,
+            "scene_change_threshold": self.scene_change_threshold,
+            "writer_backend": self.writer_backend,
+            "codec": self.codec,
+            "preset": self.preset,
+            "crf": self.crf,
+            "keep_audio": self.keep_audio,
+            "threaded": self.threaded,
+            "pipeline_workers": self.pipeline_workers,
+            "queue_depth": self.queue_depth,
+            "face_detector": self.face_detector,
+            "face_model_path": self.face_model_path,
+            "face_config_path": self.face_config_path,
+        }
+
+    def open_writer(self, output_path: str, fps: float, frame_size: Tuple[int, int],
+                    audio_source: Optional[str] = None, audio_start: Optional[float] = None,
+                    audio_end: Optional[float] = None):
+        """
+        Open a video writer for the configured backend.
+
+        Args:
+            output_path: Output file path
+            fps: Frame rate of the output
+            frame_size: (width, height) of the frames
+            audio_source: File whose audio is muxed in (ffmpeg backend with keep_audio only)
+            audio_start: Start of the audio window in seconds
+            audio_end: End of the audio window in seconds
+
+        Returns:
+            Writer with `write(frame)` and `release()` methods
+        """
+        if self.writer_backend == "ffmpeg":
+            # A keyframe every ~2 s keeps keyframe-snapped stream-copy trims close to the request.
+            return FFmpegPipeWriter(
+                output_path, fps, frame_size,
+                codec=self.codec, preset=self.preset, crf=self.crf,
+                audio_source=audio_source if self.keep_audio else None,
+                audio_start=audio_start, audio_end=audio_end,
+                keyframe_interval=max(1, int(round(fps * 2))),
+            )
+        return OpenCVVideoWriter(output_path, fps, frame_size)
+
+    def create_face_tracker(self) -> FaceTracker:
+        """
+        Create a face tracker configured with this creator's detection schedule.
+        """
+        return FaceTracker(
+            detect_interval=self.detect_interval,
+            scene_change_threshold=self.scene_change_threshold,
+            smoothing=self.smoothing,
         )
-        return list(faces)
+
+    def create_tracker(self, fps: float):
+        """
+        Create the tracker used by a render of a video at `fps`.
+
+        A SpeakerTracker when `speaker_framing` is set, an IndexTracker
+        replaying `face_index` when that is set, else a FaceTracker.
+        """
+        if self.speaker_framing is not None:
+            return SpeakerTracker(self.speaker_framing, fps)
+        if self.face_index is not None:
+            return IndexTracker(self.face_index, self.create_face_tracker(), self.interpolate_index)
+        return self.create_face_tracker()
 
     def get_face_region(self, frame: np.ndarray, face: Tuple[int, int, int, int],
                        padding_factor: float = 0.3) -> np.ndarray:
@@ -52,89 +209,865 @@ class VerticalVideoCreator:
         Returns:
             Cropped face region
         """
+        x1, y1, x2, y2 = self.get_face_box(frame.shape, face, padding_factor)
+        return frame[y1:y2, x1:x2]
+
+    def get_face_box(self, frame_shape: Tuple[int, ...], face: Tuple[int, int, int, int],
+                     padding_factor: float = 0.3) -> Tuple[int, int, int, int]:
+        """
+        Compute the padded face crop (x1, y1, x2, y2) clipped to the frame.
+        """
         x, y, w, h = face
-        height, width = frame.shape[:2]
+        height, width = frame_shape[:2]
         pad_w = int(w * padding_factor)
         pad_h = int(h * padding_factor)
         x1 = max(0, x - pad_w)
         y1 = max(0, y - pad_h)
         x2 = min(width, x + w + pad_w)
         y2 = min(height, y + h + pad_h)
-        return frame[y1:y2, x1:x2]
+        return x1, y1, x2, y2
 
-    def create_vertical_frame(self, frame: np.ndarray, target_width: int = 720,
-                            target_height: int = 1280, face_height_ratio: float = 0.4) -> np.ndarray:
+    def get_top_panel_box(self, frame_shape: Tuple[int, ...], face: Optional[Tuple[int, int, int, int]],
+                          target_width: int, face_height: int) -> Tuple[int, int, int, int]:
         """
-        Create a vertical frame with face on top and original content below.
+        Compute the source crop (x1, y1, x2, y2) shown in the top panel.
+
+        Uses the padded face box when a face is known, otherwise a centered
+        crop with the panel's aspect ratio.
+        """
+        if face is not None:
+            return self.get_face_box(frame_shape, face)
+        h, w = frame_shape[:2]
+        center_y, center_x = h // 2, w // 2
+        crop_h = min(h, int(w * face_height / target_width))
+        crop_w = min(w, int(h * target_width / face_height))
+        y1 = max(0, center_y - crop_h // 2)
+        y2 = min(h, y1 + crop_h)
+        x1 = max(0, center_x - crop_w // 2)
+        x2 = min(w, x1 + crop_w)
+        return x1, y1, x2, y2
+
+    def compose_vertical_frame(self, frame: np.ndarray, panel_box: Tuple[int, int, int, int],
+                               target_width: int = 720, target_height: int = 1280,
+                               face_height_ratio: float = 0.4) -> np.ndarray:
+        """
+        Compose a vertical frame from a top-panel crop and the full original frame.
         """
-        faces = self.detect_faces(frame)
         face_height = int(target_height * face_height_ratio)
         content_height = target_height - face_height
-        output_frame = np.zeros((target_height, target_width, 3), dtype=np.uint8)
-
-        if faces:
-            largest_face = max(faces, key=lambda f: f[2] * f[3])
-            face_region = self.get_face_region(frame, largest_face)
-            face_resized = cv2.resize(face_region, (target_width, face_height))
-            output_frame[0:face_height, :] = face_resized
-        else:
-            h, w = frame.shape[:2]
-            center_y, center_x = h // 2, w // 2
-            crop_h = min(h, int(w * face_height / target_width))
-            crop_w = min(w, int(h * target_width / face_height))
-            y1 = max(0, center_y - crop_h // 2)
-            y2 = min(h, y1 + crop_h)
-            x1 = max(0, center_x - crop_w // 2)
-            x2 = min(w, x1 + crop_w)
-            face_crop = frame[y1:y2, x1:x2]
-            face_resized = cv2.resize(face_crop, (target_width, face_height))
-            output_frame[0:face_height, :] = face_resized
+        start = time.perf_counter()
 
+        x1, y1, x2, y2 = panel_box
+        face_resized = cv2.resize(frame[y1:y2, x1:x2], (target_width, face_height))
         content_resized = cv2.resize(frame, (target_width, content_height))
+        resized = time.perf_counter()
+
+        output_frame = np.zeros((target_height, target_width, 3), dtype=np.uint8)
+        output_frame[0:face_height, :] = face_resized
         output_frame[face_height:, :] = content_resized
         cv2.line(output_frame, (0, face_height), (target_width, face_height), (255, 255, 255), 2)
+        self.frame_timings.add("resize", resized - start)
+        self.frame_timings.add("compose", time.perf_counter() - resized)
         return output_frame
 
+    def create_vertical_frame(self, frame: np.ndarray, target_width: int = 720,
+                            target_height: int = 1280, face_height_ratio: float = 0.4) -> np.ndarray:
+        """
+        Create a vertical frame with face on top and original content below.
+
+        Runs full-resolution detection on this single frame; video rendering
+        uses `render_tracked_frame` to detect sparsely instead.
+        """
+        faces = self.detect_faces(frame)
+        largest_face = max(faces, key=lambda f: f[2] * f[3]) if faces else None
+        face_height = int(target_height * face_height_ratio)
+        panel_box = self.get_top_panel_box(frame.shape, largest_face, target_width, face_height)
+        return self.compose_vertical_frame(frame, panel_box, target_width, target_height, face_height_ratio)
+
+    def track_face(self, frame: np.ndarray, tracker, frame_index: int) -> Tuple[Optional[Tuple[int, int, int, int]], bool]:
+        """
+        Advance the tracker by one frame.
+
+        Returns:
+            (face box or None, whether the detector ran on this frame)
+        """
+        if isinstance(tracker, (SpeakerTracker, IndexTracker)):
+            return tracker.face_for_frame(frame_index), tracker.detected
+        detected = tracker.should_detect(frame)
+        faces = None
+        if detected:
+            with self.frame_timings.phase("detect"):
+                faces = self.detect_faces(frame, scale=self.detection_scale)
+        return tracker.update(faces), detected
+
+    def track_frame(self, frame: np.ndarray, tracker, frame_index: int,
+                    target_width: int = 720, target_height: int = 1280,
+                    face_height_ratio: float = 0.4) -> Tuple[int, int, int, int]:
+        """
+        Advance the tracker by one frame and return the top panel crop box.
+
+        Faces are detected only when the tracker asks for it; SpeakerTracker
+        and IndexTracker never run the detector. The chosen crop is appended
+        to `crop_trajectory`. Frames must be passed in order.
+        """
+        face, detected = self.track_face(frame, tracker, frame_index)
+        return self._record_crop(frame.shape, face, detected, frame_index, target_width, target_height, face_height_ratio)
+
+    def _record_crop(self, frame_shape: Tuple[int, ...], face: Optional[Tuple[int, int, int, int]], detected: bool,
+                     frame_index: int, target_width: int, target_height: int,
+                     face_height_ratio: float) -> Tuple[int, int, int, int]:
+        face_height = int(target_height * face_height_ratio)
+        panel_box = self.get_top_panel_box(frame_shape, face, target_width, face_height)
+        self.crop_trajectory.append({
+            "frame": frame_index,
+            "face": face,
+            "crop": panel_box,
+            "detected": detected,
+        })
+        return panel_box
+
+    def render_tracked_frame(self, frame: np.ndarray, tracker, frame_index: int,
+                             target_width: int = 720, target_height: int = 1280,
+                             face_height_ratio: float = 0.4) -> np.ndarray:
+        """
+        Create a vertical frame, detecting faces only when the tracker asks for it.
+
+        The chosen crop is appended to `crop_trajectory`.
+        """
+        panel_box = self.track_frame(frame, tracker, frame_index, target_width, target_height, face_height_ratio)
+        return self.compose_vertical_frame(frame, panel_box, target_width, target_height, face_height_ratio)
+
+    def _run_threaded_pipeline(self, cap: cv2.VideoCapture, write: Callable[[int, np.ndarray], None], tracker,
+                               start_frame: int, end_frame: Optional[int], target_width: int, target_height: int,
+                               face_height_ratio: float, progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Decode, detect, compose and encode frames [start_frame, end_frame) on separate threads.
+
+        A decode thread reads frames into a bounded queue. A detect thread
+        replays the detection schedule on a FaceTracker of its own (the
+        schedule depends only on the frames, never on what the detector
+        found) and runs the detector on the frames that need it, so frame
+        N+k is being detected while frame N is composed and encoded. The
+        calling thread feeds the detections to `tracker` in frame order (it
+        is stateful) and hands each frame to a pool of worker threads for
+        composition; the resulting futures go, in frame order, through a
+        bounded queue to an encode thread that calls `write(frame_index,
+        vertical_frame)`. OpenCV and the writers release the GIL while
+        decoding, detecting, resizing and encoding, so the stages overlap.
+        The crops are exactly those of the serial loop. When a stage falls
+        behind, the full queue blocks the stage feeding it, which caps
+        memory at about three `queue_depth` worth of frames.
+
+        Args:
+            cap: Capture positioned at `start_frame`
+            write: Called on the encode thread with each composed frame, in order
+            tracker: Tracker of the render, in the state for `start_frame`
+            start_frame: Index of the next frame `cap` returns
+            end_frame: Frame to stop before, or None to read to the end
+            progress: Called with the number of frames written after each write
+
+        Returns:
+            Number of frames written
+        """
+        decoded = queue.Queue(maxsize=self.queue_depth)
+        analysed = queue.Queue(maxsize=self.queue_depth)
+        composed = queue.Queue(maxsize=self.queue_depth)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        written = [0]
+        # Speaker and index trackers never run the detector; they are cheap to advance in order.
+        schedule = self.create_face_tracker() if isinstance(tracker, FaceTracker) else None
+
+        def put(q: queue.Queue, item) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def get(q: queue.Queue):
+            while True:
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    if stop.is_set():
+                        return None
+
+        def fail(error: BaseException):
+            errors.append(error)
+            stop.set()
+
+        def decode():
+            frame_index = start_frame
+            try:
+                while not stop.is_set() and (end_frame is None or frame_index < end_frame):
+                    with self.frame_timings.phase("decode"):
+                        ret, frame = cap.read()
+                    if not ret:
+                        break
+                    if not put(decoded, frame):
+                        return
+                    frame_index += 1
+            except Exception as e:
+                fail(e)
+            put(decoded, None)
+
+        def detect():
+            try:
+                while True:
+                    frame = get(decoded)
+                    if frame is None:
+                        break
+                    faces, detected, cut = None, False, False
+                    if schedule is not None:
+                        detected = schedule.should_detect(frame)
+                        cut = schedule.scene_changed
+                        if detected:
+                            with self.frame_timings.phase("detect"):
+                                faces = self.detect_faces(frame, scale=self.detection_scale)
+                        # Only whether detection ran matters to the schedule.
+                        schedule.update([] if detected else None)
+                    if not put(analysed, (frame, faces, detected, cut)):
+                        return
+            except Exception as e:
+                fail(e)
+            put(analysed, None)
+
+        def encode():
+            try:
+                while True:
+                    item = get(composed)
+                    if item is None:
+                        return
+                    frame_index, future = item
+                    vertical_frame = future.result()
+                    with self.frame_timings.phase("encode"):
+                        write(frame_index, vertical_frame)
+                    written[0] += 1
+                    if progress is not None:
+                        progress(written[0])
+            except Exception as e:
+                fail(e)
+
+        threads = [
+            threading.Thread(target=decode, name="vertical-decode", daemon=True),
+            threading.Thread(target=detect, name="vertical-detect", daemon=True),
+        ]
+        encoder = threading.Thread(target=encode, name="vertical-encode", daemon=True)
+        with ThreadPoolExecutor(max_workers=self.pipeline_workers, thread_name_prefix="vertical-compose") as pool:
+            for thread in threads:
+                thread.start()
+            encoder.start()
+            frame_index = start_frame
+            try:
+                while True:
+                    item = get(analysed)
+                    if item is None:
+                        break
+                    frame, faces, detected, cut = item
+                    if schedule is not None:
+                        # What FaceTracker.should_detect would have done on this thread.
+                        if cut:
+                            tracker.mark_cut()
+                        face = tracker.update(faces)
+                    else:
+                        face, detected = self.track_face(frame, tracker, frame_index)
+                    panel_box = self._record_crop(
+                        frame.shape, face, detected, frame_index, target_width, target_height, face_height_ratio
+                    )
+                    future = pool.submit(
+                        self.compose_vertical_frame, frame, panel_box, target_width, target_height, face_height_ratio
+                    )
+                    if not put(composed, (frame_index, future)):
+                        break
+                    frame_index += 1
+            except Exception as e:
+                fail(e)
+            finally:
+                put(composed, None)
+                encoder.join()
+                stop.set()
+                for thread in threads:
+                    thread.join()
+
+        if errors:
+            raise errors[0]
+        return written[0]
+
     def convert_video_to_vertical(self, input_path: str, output_path: str,
                                 target_width: int = 720, target_height: int = 1280,
-                                face_height_ratio: float = 0.4) -> bool:
+                                face_height_ratio: float = 0.4, workers: int = 1) -> bool:
         """
         Convert a horizontal video to vertical format.
+
+        The per-frame crop is recorded in `crop_trajectory`.
+
+        Args:
+            workers: Number of worker processes. Above 1 the video is split into
+                keyframe-aligned chunks that are rendered in parallel and joined
+                without re-encoding, with the same crops; without `face_index`
+                or `speaker_framing`, a serial face-indexing pass comes first
+                (see `convert_video_to_vertical_parallel`).
+
+        With `threaded` set on the creator, decoding, detection, composition
+        and encoding run concurrently (see `_run_threaded_pipeline`); the
+        output is the same.
         """
+        if workers > 1:
+            return self.convert_video_to_vertical_parallel(
+                input_path, output_path, target_width, target_height, face_height_ratio, workers
+            )
+
         cap = cv2.VideoCapture(input_path)
         if not cap.isOpened():
             print(f"Error: Could not open video {input_path}")
             return False
 
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        fps = cap.get(cv2.CAP_PROP_FPS)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (target_width, target_height))
+        try:
+            out = self.open_writer(output_path, fps, (target_width, target_height), audio_source=input_path)
+        except FFmpegError as e:
+            cap.release()
+            print(f"Error encoding video: {e}")
+            return False
         frame_count = 0
+        tracker = self.create_tracker(fps)
+        self.crop_trajectory = []
+        self.frame_timings = FrameTimings()
 
+        error = None
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                vertical_frame = self.create_vertical_frame(
-                    frame, target_width, target_height, face_height_ratio
+            if self.threaded:
+                def report(written: int):
+                    if written % 30 == 0:
+                        print(f"Progress: {(written / total_frames) * 100:.1f}% ({written}/{total_frames})")
+
+                frame_count = self._run_threaded_pipeline(
+                    cap, lambda _, vertical_frame: out.write(vertical_frame), tracker, 0, None,
+                    target_width, target_height, face_height_ratio, progress=report,
                 )
-                out.write(vertical_frame)
-                frame_count += 1
-                if frame_count % 30 == 0:
-                    progress = (frame_count / total_frames) * 100
-                    print(f"Progress: {progress:.1f}% ({frame_count}/{total_frames})")
+            else:
+                while True:
+                    with self.frame_timings.phase("decode"):
+                        ret, frame = cap.read()
+                    if not ret:
+                        break
+                    vertical_frame = self.render_tracked_frame(
+                        frame, tracker, frame_count, target_width, target_height, face_height_ratio
+                    )
+                    with self.frame_timings.phase("encode"):
+                        out.write(vertical_frame)
+                    frame_count += 1
+                    if frame_count % 30 == 0:
+                        progress = (frame_count / total_frames) * 100
+                        print(f"Progress: {progress:.1f}% ({frame_count}/{total_frames})")
+        except Exception as e:
+            error = f"Error processing video: {e}"
+        finally:
+            cap.release()
+        try:
+            out.release()
+        except FFmpegError as e:
+            error = error or f"Error encoding video: {e}"
+        if error:
+            print(error)
+            return False
+
+        print(f"Video conversion completed: {output_path}")
+        return True
+
+    def convert_video_to_vertical_parallel(self, input_path: str, output_path: str,
+                                           target_width: int = 720, target_height: int = 1280,
+                                           face_height_ratio: float = 0.4, workers: int = 2) -> bool:
+        """
+        Convert a video to vertical format using several worker processes.
+
+        Crops are those of `convert_video_to_vertical`, frame for frame. The
+        tracker of a chunk has to start in the state the serial run reaches
+        at that frame, which depends on every earlier frame, so the faces
+        are taken from a face-track index (`face_index`, built here with one
+        serial decode and detection pass when not set) or from the speaker
+        timeline, and each worker replays its tracker from frame 0 up to its
+        chunk without decoding (see `render_frame_range`). An index built
+        here is replayed without interpolation, as the serial render tracks
+        live.
+
+        The input is then split at keyframes into about `workers` chunks, the
+        last one read to the end of the file. Each chunk is decoded, composed
+        and encoded by its own process with the writer settings of the serial
+        path, and the pieces are joined with the ffmpeg concat demuxer (the
+        source audio is muxed in at that step for the ffmpeg backend). Each
+        chunk starts with a keyframe of its own, so a lossy encode differs
+        from the serial one in its bits, not in its crops.
+        """
+        cap = cv2.VideoCapture(input_path)
+        if not cap.isOpened():
+            print(f"Error: Could not open video {input_path}")
+            return False
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        self.crop_trajectory = []
+        self.frame_timings = FrameTimings()
+        face_index = self.face_index
+        interpolate = self.interpolate_index and face_index is not None
+        if self.speaker_framing is None and face_index is None:
+            print("Indexing faces for the chunked render...")
+            try:
+                face_index = build_face_index(self, input_path)
+            except Exception as e:
+                print(f"Error indexing faces: {e}")
+                return False
+        if face_index is not None and face_index.meta.get("total_frames"):
+            total_frames = face_index.meta["total_frames"]  # counted while decoding, unlike CAP_PROP_FRAME_COUNT
+
+        try:
+            keyframes = [int(round(t * fps)) for t in probe_keyframes(input_path)]
+        except FFmpegError as e:
+            print(f"Error probing keyframes: {e}")
+            return False
+        chunks: List[Tuple[int, Optional[int]]] = list(plan_chunks(keyframes, total_frames, workers))
+        chunks[-1] = (chunks[-1][0], None)
+
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        chunk_dir = tempfile.mkdtemp(prefix="chunks_", dir=output_dir)
+        chunk_paths = [os.path.join(chunk_dir, f"chunk_{i:04d}.mp4") for i in range(len(chunks))]
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(
+                        _render_chunk, self.settings(), input_path, chunk_path, start, end,
+                        target_width, target_height, face_height_ratio, self.speaker_framing, face_index,
+                        interpolate,
+                    )
+                    for chunk_path, (start, end) in zip(chunk_paths, chunks)
+                ]
+                for i, future in enumerate(futures):
+                    trajectory, timings = future.result()
+                    self.crop_trajectory.extend(trajectory)
+                    self.frame_timings.merge(timings)
+                    print(f"Progress: chunk {i + 1}/{len(chunks)} rendered")
+            audio_source = input_path if self.writer_backend == "ffmpeg" and self.keep_audio else None
+            concat_videos(chunk_paths, output_path, audio_source=audio_source)
         except Exception as e:
             print(f"Error processing video: {e}")
             return False
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+
+        print(f"Video conversion completed: {output_path}")
+        return True
+
+    def render_frame_range(self, input_path: str, output_path: str, start_frame: int, end_frame: Optional[int],
+                           target_width: int = 720, target_height: int = 1280,
+                           face_height_ratio: float = 0.4) -> int:
+        """
+        Render source frames [start_frame, end_frame) into a vertical video.
+
+        With `speaker_framing` or `face_index` set, the tracker is first
+        replayed over frames [0, start_frame) from the timeline or index
+        alone, so the crops are exactly those of a render of the whole video.
+        A detecting tracker cannot be replayed without the frames and starts
+        fresh at `start_frame`.
+
+        The output carries no audio; it is meant to be joined with other ranges.
+
+        Args:
+            end_frame: Frame to stop before, or None to render to the end of the file
+
+        Returns:
+            Number of frames written
+        """
+        cap = cv2.VideoCapture(input_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video {input_path}")
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        out = self.open_writer(output_path, fps, (target_width, target_height))
+        tracker = self.create_tracker(fps)
+        if not isinstance(tracker, FaceTracker):
+            for frame_index in range(start_frame):
+                tracker.face_for_frame(frame_index)
+        frame_index = start_frame
+
+        try:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+            if self.threaded:
+                frame_index += self._run_threaded_pipeline(
+                    cap, lambda _, vertical_frame: out.write(vertical_frame), tracker, start_frame, end_frame,
+                    target_width, target_height, face_height_ratio,
+                )
+            else:
+                while end_frame is None or frame_index < end_frame:
+                    with self.frame_timings.phase("decode"):
+                        ret, frame = cap.read()
+                    if not ret:
+                        break
+                    vertical_frame = self.render_tracked_frame(
+                        frame, tracker, frame_index, target_width, target_height, face_height_ratio
+                    )
+                    with self.frame_timings.phase("encode"):
+                        out.write(vertical_frame)
+                    frame_index += 1
         finally:
             cap.release()
             out.release()
+        return frame_index - start_frame
 
-        print(f"Video conversion completed: {output_path}")
+    def render_clips(self, input_path: str, clips: List[Tuple[float, float]], output_paths: List[str],
+                     target_width: int = 720, target_height: int = 1280,
+                     face_height_ratio: float = 0.4) -> bool:
+        """
+        Render only the given time windows of a video straight into vertical clips.
+
+        Overlapping windows are merged into a single decode pass, so every source
+        frame is read and converted at most once even when clips share footage.
+
+        Args:
+            input_path: Path to the source (horizontal) video
+            clips: List of (start_time, end_time) windows in seconds
+            output_paths: Output file for each window, in the same order as clips
+            target_width: Output frame width
+            target_height: Output frame height
+            face_height_ratio: Fraction of the output height used for the face panel
+
+        Returns:
+            True if every clip was rendered, False otherwise
+        """
+        if len(clips) != len(output_paths):
+            raise ValueError("clips and output_paths must have the same length")
+
+        cap = cv2.VideoCapture(input_path)
+        if not cap.isOpened():
+            print(f"Error: Could not open video {input_path}")
+            return False
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        frames_to_render = sum(
+            int(round(end * fps)) - int(round(start * fps)) for start, end, _ in merge_time_windows(clips)
+        )
+        frame_count = 0
+        tracker = self.create_tracker(fps)
+        self.crop_trajectory = []
+        self.frame_timings = FrameTimings()
+
+        try:
+            for start, end, members in merge_time_windows(clips):
+                start_frame = int(round(start * fps))
+                end_frame = int(round(end * fps))
+                if total_frames > 0:
+                    end_frame = min(end_frame, total_frames)
+                bounds = {i: (int(round(clips[i][0] * fps)), int(round(clips[i][1] * fps))) for i in members}
+                writers = {
+                    i: self.open_writer(
+                        output_paths[i], fps, (target_width, target_height),
+                        audio_source=input_path, audio_start=clip_start / fps, audio_end=clip_end / fps,
+                    )
+                    for i, (clip_start, clip_end) in bounds.items()
+                }
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+                tracker.reset()
+
+                def write(frame_index: int, vertical_frame: np.ndarray):
+                    for i, (clip_start, clip_end) in bounds.items():
+                        if clip_start <= frame_index < clip_end:
+                            writers[i].write(vertical_frame)
+
+                def report(written: int):
+                    if (frame_count + written) % 30 == 0:
+                        progress = ((frame_count + written) / max(frames_to_render, 1)) * 100
+                        print(f"Progress: {progress:.1f}% ({frame_count + written}/{frames_to_render})")
+
+                try:
+                    if self.threaded:
+                        frame_count += self._run_threaded_pipeline(
+                            cap, write, tracker, start_frame, end_frame,
+                            target_width, target_height, face_height_ratio, progress=report,
+                        )
+                    else:
+                        for frame_index in range(start_frame, end_frame):
+                            with self.frame_timings.phase("decode"):
+                                ret, frame = cap.read()
+                            if not ret:
+                                break
+                            vertical_frame = self.render_tracked_frame(
+                                frame, tracker, frame_index, target_width, target_height, face_height_ratio
+                            )
+                            with self.frame_timings.phase("encode"):
+                                write(frame_index, vertical_frame)
+                            frame_count += 1
+                            report(0)
+                finally:
+                    for writer in writers.values():
+                        writer.release()
+        except Exception as e:
+            print(f"Error rendering clips: {e}")
+            return False
+        finally:
+            cap.release()
+
+        print(f"Rendered {len(clips)} clips from {frame_count} frames")
         return True
 
+    def render_layouts(self, input_path: str, layouts: Dict[str, Tuple[int, int]],
+                       output_paths: Dict[str, List[str]], clips: Optional[List[Tuple[float, float]]] = None,
+                       face_height_ratio: float = 0.4) -> bool:
+        """
+        Render several output layouts (e.g. 9:16, 4:5 and 1:1) from one decode and detection pass.
+
+        Every source frame is decoded and tracked once on the calling thread.
+        Each layout then composes and encodes it on its own thread with its
+        own writers, so N layouts cost about one decode plus N encodes
+        instead of N full renders. All layouts frame the same face;
+        `crop_trajectory` records the crops of the first layout.
+
+        Args:
+            input_path: Path to the source (horizontal) video
+            layouts: Output (width, height) by layout name, e.g. from `parse_layouts`
+            output_paths: For each layout name, the output file of each clip, in
+                the order of `clips` (a single file when `clips` is None)
+            clips: (start_time, end_time) windows in seconds, merged as in
+                `render_clips`; None renders the whole video
+            face_height_ratio: Fraction of the output height used for the face panel
+
+        Returns:
+            True if every output was rendered, False otherwise
+        """
+        expected = 1 if clips is None else len(clips)
+        if set(output_paths) != set(layouts) or any(len(paths) != expected for paths in output_paths.values()):
+            raise ValueError("output_paths needs one path per clip for every layout")
+
+        cap = cv2.VideoCapture(input_path)
+        if not cap.isOpened():
+            print(f"Error: Could not open video {input_path}")
+            return False
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if clips is None:
+            end_frame = total_frames if total_frames > 0 else float("inf")
+            windows = [(0, end_frame, {0: (0, end_frame)})]
+        else:
+            windows = []
+            for start, end, members in merge_time_windows(clips):
+                end_frame = int(round(end * fps))
+                if total_frames > 0:
+                    end_frame = min(end_frame, total_frames)
+                bounds = {i: (int(round(clips[i][0] * fps)), int(round(clips[i][1] * fps))) for i in members}
+                windows.append((int(round(start * fps)), end_frame, bounds))
+        frames_to_render = sum(end - start for start, end, _ in windows)
+
+        primary_width, primary_height = next(iter(layouts.values()))
+        primary_face_height = int(primary_height * face_height_ratio)
+        tracker = self.create_tracker(fps)
+        self.crop_trajectory = []
+        self.frame_timings = FrameTimings()
+        encoders = {
+            name: _LayoutEncoder(self, size, face_height_ratio, self.queue_depth) for name, size in layouts.items()
+        }
+        frame_count = 0
+
+        try:
+            for start_frame, end_frame, bounds in windows:
+                for name, encoder in encoders.items():
+                    for i, (clip_start, clip_end) in bounds.items():
+                        audio_window = {} if clips is None else {
+                            "audio_start": clip_start / fps, "audio_end": clip_end / fps,
+                        }
+                        encoder.add_writer(
+                            self.open_writer(output_paths[name][i], fps, layouts[name],
+                                             audio_source=input_path, **audio_window),
+                            clip_start, clip_end,
+                        )
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+                tracker.reset()
+                frame_index = start_frame
+                while frame_index < end_frame:
+                    with self.frame_timings.phase("decode"):
+                        ret, frame = cap.read()
+                    if not ret:
+                        break
+                    face, detected = self.track_face(frame, tracker, frame_index)
+                    self.crop_trajectory.append({
+                        "frame": frame_index,
+                        "face": face,
+                        "crop": self.get_top_panel_box(frame.shape, face, primary_width, primary_face_height),
+                        "detected": detected,
+                    })
+                    for encoder in encoders.values():
+                        encoder.submit(frame_index, frame, face)
+                    frame_index += 1
+                    frame_count += 1
+                    if frame_count % 30 == 0 and frames_to_render != float("inf"):
+                        progress = (frame_count / max(frames_to_render, 1)) * 100
+                        print(f"Progress: {progress:.1f}% ({frame_count}/{frames_to_render})")
+                for encoder in encoders.values():
+                    encoder.release_writers()
+        except Exception as e:
+            print(f"Error rendering layouts: {e}")
+            return False
+        finally:
+            cap.release()
+            for encoder in encoders.values():
+                encoder.close()
+
+        print(f"Rendered {len(layouts)} layouts from {frame_count} frames")
+        return True
+
+class _LayoutEncoder:
+    def __init__(self, creator: "VerticalVideoCreator", size: Tuple[int, int], face_height_ratio: float,
+                 queue_depth: int):
+        """
+        Composes and encodes one output layout on its own thread.
+
+        Frames arrive in order with their tracked face. Each is composed once
+        for this layout and written to every open writer whose frame range
+        contains it. After an error, queued frames are drained and dropped
+        so the producer never blocks; the error is raised on the next call.
+        """
+        self.creator = creator
+        self.width, self.height = size
+        self.face_height_ratio = face_height_ratio
+        self.writers: List[Tuple[object, int, int]] = []
+        self.error: Optional[BaseException] = None
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self.thread = threading.Thread(target=self._run, name=f"layout-{self.width}x{self.height}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        face_height = int(self.height * self.face_height_ratio)
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is None:
+                    frame_index, frame, face = item
+                    panel_box = self.creator.get_top_panel_box(frame.shape, face, self.width, face_height)
+                    vertical_frame = self.creator.compose_vertical_frame(
+                        frame, panel_box, self.width, self.height, self.face_height_ratio
+                    )
+                    with self.creator.frame_timings.phase("encode"):
+                        for writer, start_frame, end_frame in self.writers:
+                            if start_frame <= frame_index < end_frame:
+                                writer.write(vertical_frame)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def add_writer(self, writer, start_frame: int, end_frame: int):
+        """
+        Send frames [start_frame, end_frame) to `writer`. Call between windows only.
+        """
+        self.writers.append((writer, start_frame, end_frame))
+
+    def submit(self, frame_index: int, frame: np.ndarray, face: Optional[Tuple[int, int, int, int]]):
+        if self.error is not None:
+            raise self.error
+        self.queue.put((frame_index, frame, face))
+
+    def release_writers(self):
+        """
+        Wait for the queued frames to be encoded, then close the writers.
+        """
+        self.queue.join()
+        writers, self.writers = self.writers, []
+        for writer, _, _ in writers:
+            try:
+                writer.release()
+            except Exception as e:
+                self.error = self.error or e
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        for writer, _, _ in self.writers:
+            try:
+                writer.release()
+            except Exception:
+                pass
+        self.writers = []
+
+def _render_chunk(settings: Dict, input_path: str, output_path: str, start_frame: int, end_frame: Optional[int],
+                  target_width: int, target_height: int, face_height_ratio: float,
+                  speaker_framing: Optional[SpeakerFraming] = None,
+                  face_index: Optional[FaceTrackIndex] = None,
+                  interpolate: bool = True) -> Tuple[List[Dict], FrameTimings]:
+    """
+    Worker-process entry point for `convert_video_to_vertical_parallel`.
+
+    Returns the chunk's crop trajectory and frame timings.
+    """
+    creator = VerticalVideoCreator(**settings)
+    creator.speaker_framing = speaker_framing
+    creator.face_index = face_index
+    creator.interpolate_index = interpolate
+    creator.render_frame_range(
+        input_path, output_path, start_frame, end_frame, target_width, target_height, face_height_ratio
+    )
+    return creator.crop_trajectory, creator.frame_timings
+
+def plan_chunks(keyframes: List[int], total_frames: int, chunks: int) -> List[Tuple[int, int]]:
+    """
+    Split [0, total_frames) into about `chunks` ranges that start on keyframes.
+
+    Args:
+        keyframes: Frame indices of the keyframes
+        total_frames: Number of frames in the video
+        chunks: Desired number of chunks
+
+    Returns:
+        List of (start_frame, end_frame) ranges covering the whole video
+    """
+    candidates = sorted(k for k in set(keyframes) if 0 < k < total_frames)
+    boundaries = [0]
+    for i in range(1, chunks):
+        if not candidates:
+            break
+        ideal = total_frames * i / chunks
+        nearest = min(candidates, key=lambda k: abs(k - ideal))
+        if nearest > boundaries[-1]:
+            boundaries.append(nearest)
+    boundaries.append(total_frames)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def parse_layouts(spec: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse a comma-separated list of output layouts.
+
+    Each entry is a name from OUTPUT_LAYOUTS ("9:16", "4:5", "1:1") or a
+    WIDTHxHEIGHT size. The first layout is the primary one.
+
+    Returns:
+        (width, height) by layout name, in the given order
+    """
+    layouts = {}
+    for name in (part.strip() for part in spec.split(",")):
+        if not name:
+            continue
+        if name in OUTPUT_LAYOUTS:
+            layouts[name] = OUTPUT_LAYOUTS[name]
+            continue
+        try:
+            width, height = (int(v) for v in name.lower().split("x"))
+        except ValueError:
+            raise ValueError(f"Unknown output layout: {name}") from None
+        if width <= 0 or height <= 0 or width % 2 or height % 2:
+            raise ValueError(f"Output layout sizes must be positive and even: {name}")
+        layouts[name] = (width, height)
+    if not layouts:
+        raise ValueError("At least one output layout is required")
+    return layouts
+
 def trim_video(input_file: str, start_time: float, end_time: float, output_file: str):
     """
     Trims a video file to a specified start and end time.
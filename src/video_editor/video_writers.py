@@ -0,0 +1,136 @@
+import subprocess
+import tempfile
+from fractions import Fraction
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from video_editor.ffmpeg_tools import FFmpegError
+
+
+def frame_rate_rational(fps: Union[float, str, Fraction]) -> str:
+    """
+    Frame rate as the "num/den" rational ffmpeg expects, e.g. 29.97002997 -> "30000/1001".
+
+    OpenCV reports the source rate as a float; rounding it back to the nearest
+    rational with a denominator of at most 1001 recovers the NTSC rates exactly,
+    so the output timestamps do not drift from the source audio.
+    """
+    if isinstance(fps, str):
+        return fps
+    rate = Fraction(fps).limit_denominator(1001)
+    return f"{rate.numerator}/{rate.denominator}"
+
+
+class OpenCVVideoWriter:
+    def __init__(self, output_path: str, fps: float, frame_size: Tuple[int, int]):
+        """
+        MPEG-4 Part 2 writer backed by cv2.VideoWriter (video only).
+
+        Args:
+            output_path: Output file path
+            fps: Frame rate of the output
+            frame_size: (width, height) of the frames
+        """
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self.writer = cv2.VideoWriter(output_path, fourcc, fps, frame_size)
+
+    def write(self, frame: np.ndarray):
+        self.writer.write(frame)
+
+    def release(self):
+        self.writer.release()
+
+
+class FFmpegPipeWriter:
+    def __init__(self, output_path: str, fps: Union[float, str, Fraction], frame_size: Tuple[int, int],
+                 codec: str = "libx264", preset: str = "veryfast", crf: int = 23,
+                 audio_source: Optional[str] = None, audio_start: Optional[float] = None,
+                 audio_end: Optional[float] = None, audio_bitrate: str = "160k",
+                 keyframe_interval: Optional[int] = None):
+        """
+        Stream raw BGR frames into a persistent ffmpeg encoder process.
+
+        The output is a fast-start MP4. When `audio_source` is given, its first
+        audio track (optionally limited to [audio_start, audio_end] seconds) is
+        muxed in the same pass, so the file is ready to publish.
+
+        Args:
+            output_path: Output file path
+            fps: Frame rate of the output, as a float or a "num/den" rational
+            frame_size: (width, height) of the frames
+            codec: ffmpeg video encoder, e.g. libx264 or libx265
+            preset: Encoder speed/size preset
+            crf: Constant rate factor (lower is better quality)
+            audio_source: File to take the audio track from
+            audio_start: Start of the audio window in seconds
+            audio_end: End of the audio window in seconds
+            audio_bitrate: AAC bitrate of the muxed audio
+            keyframe_interval: Maximum frames between keyframes (encoder default when None)
+
+        Raises:
+            FFmpegError: If the ffmpeg executable cannot be started
+        """
+        width, height = frame_size
+        self.frame_bytes = width * height * 3
+        command = [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", frame_rate_rational(fps),
+            "-i", "pipe:0",
+        ]
+        if audio_source:
+            if audio_start is not None:
+                command += ["-ss", f"{audio_start:.3f}"]
+            if audio_end is not None:
+                command += ["-to", f"{audio_end:.3f}"]
+            command += ["-i", audio_source, "-map", "0:v:0", "-map", "1:a:0?",
+                        "-c:a", "aac", "-b:a", audio_bitrate, "-shortest"]
+        command += ["-c:v", codec, "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p"]
+        if keyframe_interval:
+            command += ["-g", str(keyframe_interval)]
+        if codec in ("libx265", "hevc"):
+            command += ["-tag:v", "hvc1"]
+        command += ["-movflags", "+faststart", output_path]
+
+        self.command = command
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self._stderr)
+        except OSError as e:
+            self._stderr.close()
+            raise FFmpegError(command, 127, f"Could not start {command[0]}: {e}") from e
+
+    def _error(self) -> FFmpegError:
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode(errors="replace")
+        return FFmpegError(self.command, self.process.returncode, stderr)
+
+    def write(self, frame: np.ndarray):
+        if frame.nbytes != self.frame_bytes:
+            raise ValueError("Frame size does not match the writer's frame_size")
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).tobytes())
+        except BrokenPipeError:
+            self.process.wait()
+            raise self._error()
+
+    def release(self):
+        """
+        Flush the encoder and wait for ffmpeg to finalize the file.
+
+        Raises:
+            FFmpegError: If ffmpeg exited with a non-zero status
+        """
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        self.process.wait()
+        try:
+            if self.process.returncode != 0:
+                raise self._error()
+        finally:
+            self._stderr.close()